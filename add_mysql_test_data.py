@@ -21,19 +21,17 @@ def add_canadian_test_data():
         ("Daniel", "Garcia", "Moncton", "Nouveau-Brunswick", "daniel.garcia@email.com")
     ]
     
-    successful_additions = 0
     total_students = len(canadian_students)
     
     print("=== Ajout d'étudiants canadiens dans MySQL ===")
     print()
     
-    for first_name, last_name, city, state, email in canadian_students:
-        success = db.add_student(first_name, last_name, city, state, email)
-        if success:
-            successful_additions += 1
-            print(f"✓ {first_name} {last_name} - {city}, {state}")
-        else:
-            print(f"✗ Échec pour {first_name} {last_name}")
+    # Un seul INSERT multi-lignes au lieu d'une connexion par étudiant
+    report = db.add_students_bulk(canadian_students)
+    successful_additions = report["written"]
+    
+    for index, student, message in report["errors"]:
+        print(f"✗ Échec pour la ligne {index + 1} {student}: {message}")
     
     print()
     print(f"=== Résumé ===")
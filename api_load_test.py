@@ -0,0 +1,220 @@
+"""
+Test de charge du service REST (student_api.py).
+
+N clients concurrents enchaînent des requêtes pendant une durée fixe:
+pages d'étudiants, lecture par ID, recherche et quelques modifications.
+Chaque client garde les ETag reçus et les renvoie (If-None-Match), comme un
+vrai client HTTP avec cache: les réponses 304 sont comptées à part. Le
+rapport donne les requêtes par seconde et les latences (p50/p95/p99) par
+type de requête.
+
+Sans --url, le service est lancé dans un processus séparé sur une base SQLite
+temporaire remplie d'étudiants synthétiques (aucun serveur MySQL requis).
+
+    python api_load_test.py --clients 200 --duration 20
+    python api_load_test.py --url http://127.0.0.1:8080 --clients 100 --output charge.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from synthetic_data import FIRST_NAMES, LAST_NAMES, PROVINCE_CITIES
+
+# Part de chaque type de requête dans le mélange
+REQUEST_MIX = (("page", 0.45), ("student", 0.25), ("search", 0.2), ("states", 0.05), ("update", 0.05))
+
+
+def free_port():
+    """Port TCP libre sur la boucle locale"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(session, url, process, timeout=120.0):
+    """Attendre que le service réponde (le remplissage de la base peut prendre un moment)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Le service s'est arrêté (code {process.returncode})")
+        try:
+            async with session.get(f"{url}/stats") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Le service ne répond pas sur {url}")
+
+
+class Client:
+    """Un client simulé: une boucle de requêtes et ses ETag"""
+
+    def __init__(self, session, url, students, rng, results, page_size):
+        self.session = session
+        self.url = url
+        self.students = students
+        self.rng = rng
+        self.results = results
+        self.page_size = page_size
+        self.etags = {}
+
+    async def run(self, deadline):
+        kinds = [kind for kind, _ in REQUEST_MIX]
+        weights = [weight for _, weight in REQUEST_MIX]
+        while time.monotonic() < deadline:
+            kind = self.rng.choices(kinds, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = await getattr(self, kind)()
+            except aiohttp.ClientError:
+                status = "erreur"
+            self.results.setdefault(kind, []).append((time.perf_counter() - started, status))
+
+    async def get(self, path):
+        headers = {"Accept-Encoding": "gzip"}
+        if path in self.etags:
+            headers["If-None-Match"] = self.etags[path]
+        async with self.session.get(self.url + path, headers=headers) as response:
+            await response.read()
+            if "ETag" in response.headers:
+                self.etags[path] = response.headers["ETag"]
+            return response.status
+
+    async def page(self):
+        # Surtout les premières pages, comme un utilisateur qui fait défiler la liste
+        after = int(self.rng.paretovariate(1.2) * self.page_size) - self.page_size
+        return await self.get(f"/students?limit={self.page_size}" + (f"&after={after}" if after > 0 else ""))
+
+    async def student(self):
+        return await self.get(f"/students/{self.rng.randint(1, self.students)}")
+
+    async def search(self):
+        term = self.rng.choice((self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)[:4],
+                                self.rng.choice(list(PROVINCE_CITIES))))
+        return await self.get(f"/students/search?q={term}&limit=20")
+
+    async def states(self):
+        return await self.get("/states")
+
+    async def update(self):
+        student_id = self.rng.randint(1, self.students)
+        async with self.session.get(f"{self.url}/students/{student_id}") as response:
+            if response.status != 200:
+                return response.status
+            student = await response.json()
+        student["firstName"] = self.rng.choice(FIRST_NAMES)
+        async with self.session.put(f"{self.url}/students/{student_id}", json=student) as response:
+            await response.read()
+            return response.status
+
+
+def percentile(values, fraction):
+    return values[int(fraction * (len(values) - 1))]
+
+
+def summarize(results, elapsed):
+    """Requêtes/s, codes HTTP et latences (ms) par type de requête"""
+    report = {"requests": 0, "requests_per_second": 0.0, "elapsed_s": round(elapsed, 2), "by_kind": {}}
+    for kind, samples in sorted(results.items()):
+        timings = sorted(timing * 1000 for timing, _ in samples)
+        statuses = {}
+        for _, status in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        report["by_kind"][kind] = {
+            "requests": len(samples),
+            "statuses": statuses,
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+            "p99_ms": round(percentile(timings, 0.99), 2),
+        }
+        report["requests"] += len(samples)
+    report["requests_per_second"] = round(report["requests"] / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+async def run_load(url, clients, duration, students, page_size, seed, process=None):
+    """Lancer `clients` clients pendant `duration` secondes et retourner le rapport"""
+    connector = aiohttp.TCPConnector(limit=clients)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await wait_until_ready(session, url, process)
+        results = {}
+        runners = [Client(session, url, students, random.Random(seed + index), results, page_size)
+                   for index in range(clients)]
+        started = time.monotonic()
+        await asyncio.gather(*(runner.run(started + duration) for runner in runners))
+        elapsed = time.monotonic() - started
+        report = summarize(results, elapsed)
+        async with session.get(f"{url}/stats") as response:
+            stats = await response.json()
+        report["server"] = {"pool": stats.get("pool"), "cache": stats.get("cache")}
+        return report
+
+
+def print_report(report, clients):
+    print(f"\n{clients} clients, {report['requests']} requêtes en {report['elapsed_s']} s: "
+          f"{report['requests_per_second']} requêtes/s")
+    print(f"{'type':<10}{'requêtes':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  codes")
+    for kind, stats in report["by_kind"].items():
+        codes = ", ".join(f"{status}: {count}" for status, count in sorted(stats["statuses"].items()))
+        print(f"{kind:<10}{stats['requests']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}"
+              f"  {codes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du service REST des étudiants")
+    parser.add_argument("--url", help="Service déjà lancé (par défaut: lancé ici sur une base SQLite temporaire)")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="Durée du test en secondes")
+    parser.add_argument("--students", type=int, default=20000,
+                        help="Étudiants de la base temporaire (avec --url: plage des ID tirés)")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=10, help="Connexions du service lancé ici")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Écrire le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+
+    process = directory = None
+    url = args.url.rstrip("/") if args.url else None
+    if url is None:
+        directory = tempfile.mkdtemp(prefix="api_load_")
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        print(f"Lancement du service sur {url} ({args.students} étudiants synthétiques)...")
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_api.py"),
+             "--sqlite", os.path.join(directory, "charge.sqlite3"), "--seed", str(args.students),
+             "--port", str(port), "--pool-size", str(args.pool_size)],
+            stdout=subprocess.DEVNULL)
+    try:
+        report = asyncio.run(run_load(url, args.clients, args.duration, args.students, args.page_size,
+                                      args.seed, process))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+    report["meta"] = {"url": args.url or "local (SQLite)", "clients": args.clients, "duration_s": args.duration,
+                      "page_size": args.page_size, "seed": args.seed}
+    print_report(report, args.clients)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"Rapport écrit dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark de la recherche: ancien chemin LIKE '%terme%' contre l'index FULLTEXT.
+
+ATTENTION: le benchmark vide la table students_info; utilisez une base
+dédiée (par défaut 'db_students_bench', à créer au préalable).
+
+    python benchmark_search.py --sizes 10000 100000 1000000
+"""
+import argparse
+import statistics
+import time
+
+from connect_database import DatabaseManager
+from synthetic_data import generate_students
+
+# Termes cherchés: prénom complet, début de nom, ville, fragment d'email
+SEARCH_TERMS = ["Marie", "Trem", "Montréal", "gagnon", "Saint John", "student12345"]
+
+LEGACY_LIKE_QUERY = """
+    SELECT * FROM students_info
+    WHERE firstName LIKE %s OR lastName LIKE %s OR
+          city LIKE %s OR state LIKE %s OR emailAddress LIKE %s
+    ORDER BY studentId
+"""
+
+
+def time_call(function, repeat):
+    """Exécuter `function` `repeat` fois et retourner (médiane, p95) en millisecondes"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+
+def legacy_like_search(db, term):
+    """Recherche telle qu'elle était faite avant l'index FULLTEXT"""
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        pattern = f"%{term}%"
+        cursor.execute(LEGACY_LIKE_QUERY, (pattern,) * 5)
+        rows = cursor.fetchall()
+        cursor.close()
+        return rows
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LIKE vs FULLTEXT de search_students")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="root")
+    parser.add_argument("--database", default="db_students_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.host, args.user, args.password, args.database)
+    db.clear_all_students()
+    loaded = 0
+    print(f"{'lignes':>9} {'terme':<12} {'LIKE méd.':>10} {'LIKE p95':>10} {'FT méd.':>10} {'FT p95':>10}")
+    for size in sorted(args.sizes):
+        if size > loaded:
+            db.add_students_bulk(generate_students(loaded, size - loaded), batch_size=5000)
+            loaded = size
+        for term in SEARCH_TERMS:
+            like_median, like_p95 = time_call(lambda: legacy_like_search(db, term), args.repeat)
+            ft_median, ft_p95 = time_call(lambda: db.search_students(term), args.repeat)
+            print(f"{size:>9} {term:<12} {like_median:>9.1f}ms {like_p95:>9.1f}ms "
+                  f"{ft_median:>9.1f}ms {ft_p95:>9.1f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
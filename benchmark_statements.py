@@ -0,0 +1,127 @@
+"""
+Microbenchmark des requêtes préparées de DatabaseManager.
+
+Chaque opération courante (lecture par ID, page, comptage, mise à jour,
+ajout puis suppression) est appelée en boucle deux fois: sans cache de
+requêtes (statement_cache_size=0: la requête est analysée à chaque appel)
+puis avec les requêtes préparées gardées par connexion (par le pool pour
+MySQL, par sqlite3 lui-même pour SQLite). Le rapport donne le coût moyen
+d'un appel et le gain.
+
+Par défaut le benchmark tourne sur une base SQLite temporaire. Avec
+--backend mysql, la table students_info est VIDÉE: utilisez une base
+dédiée (par défaut 'db_students_bench', à créer au préalable).
+
+    python benchmark_statements.py --rows 10000 --calls 2000
+    python benchmark_statements.py --backend mysql
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from connect_database import DatabaseManager
+from storage_backends import MySQLBackend, SQLiteBackend
+from synthetic_data import generate_students
+
+
+def operations(db, student_ids, rng):
+    """Opérations chronométrées: nom -> fonction sans argument"""
+    counter = iter(range(10 ** 9))
+
+    def read_by_id():
+        db.get_student_by_id(rng.choice(student_ids))
+
+    def read_page():
+        db.get_students_page(rng.choice(student_ids), 20)
+
+    def update():
+        student = db.get_student_by_id(rng.choice(student_ids))
+        db.update_student(student.studentId, student.firstName, student.lastName, student.city, student.state,
+                          student.emailAddress)
+
+    def add_and_delete():
+        student_id = db.add_student("Micro", "Bench", "Laval", "Québec", f"micro{next(counter)}@bench.test")
+        db.delete_student(student_id)
+
+    return {
+        "get_student_by_id": read_by_id,
+        "get_students_page": read_page,
+        "get_student_count": db.get_student_count,
+        "get_student_by_id+update": update,
+        "add_student+delete": add_and_delete,
+    }
+
+
+def time_per_call(function, calls):
+    """Durée moyenne d'un appel de `function`, en microsecondes"""
+    # Les messages de DatabaseManager ne doivent pas noyer le rapport
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(min(calls, 100)):
+            function()  # préparation des requêtes et cache de pages hors chrono
+        started = time.perf_counter()
+        for _ in range(calls):
+            function()
+        return (time.perf_counter() - started) / calls * 1e6
+
+
+def build_database(args, cache_size, pool_size=5):
+    """DatabaseManager de la base de benchmark gardant `cache_size` requêtes préparées par connexion"""
+    if args.backend == "mysql":
+        backend = MySQLBackend(args.host, args.user, args.password, args.database)
+    else:
+        backend = SQLiteBackend(args.path, statement_cache_size=cache_size)
+    return DatabaseManager(backend=backend, pool_size=pool_size, statement_cache_size=cache_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gain des requêtes préparées de DatabaseManager")
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--path", help="Fichier SQLite (par défaut: fichier temporaire supprimé à la fin)")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="root")
+    parser.add_argument("--database", default="db_students_bench")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--calls", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    temporary_dir = None
+    if args.backend == "sqlite" and args.path is None:
+        temporary_dir = tempfile.mkdtemp(prefix="students_bench_")
+        args.path = os.path.join(temporary_dir, "bench.sqlite3")
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = build_database(args, 64)
+            db.clear_all_students()
+            db.add_students_bulk(generate_students(0, args.rows, args.seed), batch_size=5000)
+            student_ids = [student_id for student_id, in db.get_all_students(columns=("studentId",))]
+            db.close()
+
+        timings = {}
+        for label, cache_size in (("sans cache", 0), ("préparées", 64)):
+            db = build_database(args, cache_size, pool_size=1)
+            try:
+                for name, function in operations(db, student_ids, random.Random(args.seed)).items():
+                    timings.setdefault(name, {})[label] = time_per_call(function, args.calls)
+            finally:
+                db.close()
+
+        print(f"--- {args.rows} étudiants, {args.calls} appels par opération ({args.backend}) ---")
+        print(f"{'opération':<28} {'sans cache':>12} {'préparées':>12} {'gain':>8}")
+        for name, results in timings.items():
+            before, after = results["sans cache"], results["préparées"]
+            print(f"{name:<28} {before:>10.1f}µs {after:>10.1f}µs {1 - after / before:>7.0%}")
+    finally:
+        if temporary_dir is not None:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
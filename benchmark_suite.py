@@ -0,0 +1,274 @@
+"""
+Suite de benchmarks reproductible de DatabaseManager et du rendu du tableau.
+
+Pour chaque taille demandée, la base est remplie avec des étudiants
+synthétiques (synthetic_data) puis chaque opération est chronométrée:
+insertion, import en masse, get_all, pagination, recherche par champ,
+provinces/villes (cache froid et chaud), mise à jour, suppression et
+MainWindow.populate_table sous Qt offscreen. Les résultats sont écrits en
+JSON pour comparer deux exécutions (--compare).
+
+Par défaut la suite tourne sur une base SQLite temporaire (aucun serveur
+requis). Avec --backend mysql, la table students_info est VIDÉE: utilisez
+une base dédiée (par défaut 'db_students_bench', à créer au préalable).
+
+    python benchmark_suite.py --sizes 1000 10000 100000 --output bench.json
+    python benchmark_suite.py --backend mysql --sizes 1000000
+    python benchmark_suite.py --output apres.json --compare avant.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from connect_database import DatabaseManager
+from instrumentation import QueryInstrumentation
+from storage_backends import MySQLBackend, SQLiteBackend
+from synthetic_data import generate_students
+
+# Terme cherché pour chaque valeur de search_field
+SEARCH_TERMS = {
+    "all": "gagnon",
+    "firstName": "Marie",
+    "lastName": "Trem",
+    "city": "Montréal",
+    "state": "Québec",
+    "emailAddress": "student12345",
+}
+
+
+def summarize(timings):
+    """Statistiques (en millisecondes) d'une liste de durées en secondes"""
+    timings = sorted(timing * 1000 for timing in timings)
+    return {
+        "runs": len(timings),
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+        "min_ms": round(timings[0], 3),
+        "max_ms": round(timings[-1], 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+    }
+
+
+def measure(function, repeat, setup=None):
+    """Chronométrer `repeat` appels de `function`; `setup` est appelé avant chacun, hors chrono"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        # Les messages de DatabaseManager ne doivent pas noyer le rapport
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+    return summarize(timings)
+
+
+def measure_each(function, arguments):
+    """Chronométrer un appel de `function` par tuple d'arguments; retourne (stats, résultats)"""
+    timings, results = [], []
+    for args in arguments:
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            results.append(function(*args))
+            timings.append(time.perf_counter() - started)
+    return summarize(timings), results
+
+
+def benchmark_database(db, size, repeat):
+    """Chronométrer les opérations de DatabaseManager sur une base de `size` étudiants"""
+    results = {
+        "get_student_count": measure(db.get_student_count, repeat),
+        "get_all_students": measure(db.get_all_students, repeat),
+        "get_students_page": measure(lambda: db.get_students_page(limit=200), repeat),
+    }
+    for field, term in SEARCH_TERMS.items():
+        results[f"search_students[{field}]"] = measure(lambda: db.search_students(term, field), repeat)
+
+    results["get_states[froid]"] = measure(db.get_states, repeat, setup=db.invalidate_location_cache)
+    results["get_states[chaud]"] = measure(db.get_states, repeat)
+    results["get_cities_by_state[froid]"] = measure(lambda: db.get_cities_by_state("Québec"), repeat,
+                                                    setup=db.invalidate_location_cache)
+    results["get_cities_by_state[chaud]"] = measure(lambda: db.get_cities_by_state("Québec"), repeat)
+
+    # Les étudiants ajoutés sont modifiés puis supprimés: la base garde sa taille
+    new_students = [(f"Bench{number}", "Suite", "Laval", "Québec", f"bench{size}.{number}@example.com")
+                    for number in range(repeat)]
+    results["add_student"], student_ids = measure_each(db.add_student, new_students)
+    student_ids = [student_id for student_id in student_ids if student_id is not None]
+    results["update_student"], _ = measure_each(
+        db.update_student,
+        [(student_id, "Bench", "Modifié", "Gatineau", "Québec", f"bench{size}.{student_id}.m@example.com")
+         for student_id in student_ids])
+    results["delete_student"], _ = measure_each(db.delete_student, [(student_id,) for student_id in student_ids])
+    return results
+
+
+class TableBenchmark:
+    """Fenêtre principale hors écran utilisée pour chronométrer populate_table"""
+
+    def __init__(self, db):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PySide6.QtWidgets import QApplication
+        from main import MainWindow
+        self.app = QApplication.instance() or QApplication(sys.argv)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.window = MainWindow(db_manager=db)
+            self.window.resize(1200, 800)
+            self.window.show()
+            self.settle()
+
+    def settle(self):
+        """Attendre la fin des requêtes lancées par la fenêtre et traiter les événements"""
+        self.window.db_worker.wait_for_done()
+        self.app.processEvents()
+
+    def populate(self, students):
+        self.window.populate_table(students)
+        # Peindre les lignes visibles: c'est le coût que l'utilisateur attend
+        self.window.ui.tableView.viewport().repaint()
+
+    def run(self, students, repeat):
+        stats = measure(lambda: self.populate(students), repeat)
+        stats["rows"] = len(students)
+        return stats
+
+    def close(self):
+        # hide() et non close(): closeEvent fermerait le DatabaseManager partagé
+        self.settle()
+        self.window.hide()
+        self.window.deleteLater()
+        self.app.processEvents()
+
+
+def build_database(args):
+    """Créer le DatabaseManager de la base de benchmark (vidée)"""
+    if args.backend == "mysql":
+        backend = MySQLBackend(args.host, args.user, args.password, args.database)
+    else:
+        backend = SQLiteBackend(args.path)
+    # Instrumentation optionnelle: elle ajoute son propre coût aux mesures
+    instrumentation = QueryInstrumentation(slow_query_threshold=args.slow_ms / 1000) if args.instrument else None
+    db = DatabaseManager(backend=backend, instrumentation=instrumentation)
+    db.clear_all_students()
+    return db
+
+
+def compare(previous, current, threshold, min_ms):
+    """Afficher les opérations dont la médiane a varié de plus de `threshold` (fraction) et de `min_ms`"""
+    before = {(result["size"], result["operation"]): result for result in previous["results"]}
+    regressions = 0
+    print()
+    print(f"Comparaison (seuil {threshold:.0%}):")
+    for result in current["results"]:
+        old = before.get((result["size"], result["operation"]))
+        if old is None or old["median_ms"] <= 0:
+            continue
+        change = result["median_ms"] / old["median_ms"] - 1
+        # Sous la milliseconde, le bruit de mesure dépasse vite le seuil relatif
+        if abs(change) < threshold or abs(result["median_ms"] - old["median_ms"]) < min_ms:
+            continue
+        label = "RÉGRESSION" if change > 0 else "amélioration"
+        regressions += change > 0
+        print(f"  {label:<13} {result['size']:>9} {result['operation']:<30} "
+              f"{old['median_ms']:>9.2f}ms -> {result['median_ms']:>9.2f}ms ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de DatabaseManager et du tableau")
+    parser.add_argument("--backend", choices=["sqlite", "mysql"], default="sqlite")
+    parser.add_argument("--path", help="Fichier SQLite (par défaut: fichier temporaire supprimé à la fin)")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="root")
+    parser.add_argument("--database", default="db_students_bench")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-ui", action="store_true", help="Ne pas mesurer populate_table")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Ajouter au JSON le détail par opération (attente de connexion, requête, lignes)")
+    parser.add_argument("--slow-ms", type=float, default=200.0,
+                        help="Seuil (ms) des requêtes lentes journalisées avec --instrument")
+    parser.add_argument("--output", help="Fichier JSON des résultats")
+    parser.add_argument("--compare", help="JSON d'une exécution précédente à comparer")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Variation de la médiane signalée par --compare (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="Écart absolu minimal (ms) signalé par --compare")
+    args = parser.parse_args()
+
+    temporary_dir = None
+    if args.backend == "sqlite" and args.path is None:
+        temporary_dir = tempfile.mkdtemp(prefix="students_bench_")
+        args.path = os.path.join(temporary_dir, "bench.sqlite3")
+
+    report = {
+        "meta": {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "backend": args.backend,
+            "sizes": sorted(args.sizes),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": [],
+    }
+
+    db = build_database(args)
+    table = None
+    try:
+        table = None if args.no_ui else TableBenchmark(db)
+        loaded = 0
+        for size in sorted(args.sizes):
+            results = {}
+            if size > loaded:
+                started = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    db.add_students_bulk(generate_students(loaded, size - loaded, args.seed), batch_size=5000)
+                elapsed = time.perf_counter() - started
+                results["add_students_bulk"] = summarize([elapsed])
+                results["add_students_bulk"]["rows"] = size - loaded
+                results["add_students_bulk"]["rows_per_second"] = round((size - loaded) / elapsed)
+                loaded = size
+
+            results.update(benchmark_database(db, size, args.repeat))
+            if table is not None:
+                results["populate_table"] = table.run(db.get_all_students(), args.repeat)
+
+            print(f"--- {size} étudiants ({args.backend}) ---")
+            print(f"{'opération':<30} {'médiane':>10} {'p95':>10}")
+            for operation, stats in results.items():
+                print(f"{operation:<30} {stats['median_ms']:>8.2f}ms {stats['p95_ms']:>8.2f}ms")
+                report["results"].append({"size": size, "operation": operation, **stats})
+        if args.instrument:
+            report["query_stats"] = db.get_query_stats()
+    finally:
+        if table is not None:
+            table.close()
+        db.close()
+        if temporary_dir is not None:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as previous:
+            if compare(json.load(previous), report, args.threshold, args.min_ms):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
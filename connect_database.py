@@ -1,70 +1,222 @@
-import mysql.connector
-from mysql.connector import Error
 import os
-from typing import List, Tuple, Optional
+import re
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from connection_pool import ConnectionPool, PooledConnection, PoolTimeoutError
+from instrumentation import QueryInstrumentation, instrumented_operation
+from storage_backends import MySQLBackend, StorageBackend, fold_text
+from student_cache import StudentCache
+from student_record import STUDENT_COLUMNS, Student, projector, row_type, select_list
+import migrations
+
+
+class StudentWriteError(Exception):
+    """
+    Base of the errors raised when a student cannot be written as requested
+    """
+
+    def __init__(self, student_id: int, message: str):
+        """
+        Args:
+            student_id: The student's ID
+            message: Explanation shown to the user
+        """
+        super().__init__(message)
+        self.student_id = student_id
+
+
+class StudentConflictError(StudentWriteError):
+    """
+    Raised when a student was changed by someone else since the version being written
+    """
+
+    def __init__(self, student_id: int, current: Student):
+        """
+        Args:
+            student_id: The student's ID
+            current: The student as it is now in the database
+        """
+        super().__init__(student_id, f"L'étudiant ID {student_id} a été modifié par un autre utilisateur")
+        self.current = current
+
+
+class StudentNotFoundError(StudentWriteError):
+    """
+    Raised when the student being written does not exist (never did, or was deleted meanwhile)
+    """
+
+    def __init__(self, student_id: int):
+        """
+        Args:
+            student_id: The student's ID
+        """
+        super().__init__(student_id, f"Aucun étudiant trouvé avec l'ID {student_id}")
+
 
 class DatabaseManager:
-    def __init__(self, host: str = "localhost", user: str = "root", password: str = "root", database: str = "db_students"):
+    # Columns a search can be restricted to
+    SEARCH_FIELDS = ("firstName", "lastName", "city", "state", "emailAddress")
+    # Words of a search term, as tokenized by the InnoDB full-text parser
+    FULLTEXT_WORD = re.compile(r"\w+")
+    # Position of each searchable column in a Student row
+    FIELD_POSITIONS = {field: STUDENT_COLUMNS.index(field) for field in SEARCH_FIELDS}
+    # Position of the row version (see update_student)
+    VERSION_POSITION = STUDENT_COLUMNS.index("version")
+    # Position of the enrolment timestamp (NULL for students added before migration 8)
+    CREATED_POSITION = STUDENT_COLUMNS.index("createdAt")
+    # Every query names its columns: a schema change cannot silently shift the Student fields
+    STUDENT_SELECT = f"SELECT {select_list(STUDENT_COLUMNS)} FROM students_info"
+    # Grouping keys of the reports, computed by the server (see email_domain and enrolment_month)
+    EMAIL_DOMAIN_EXPRESSION = "LOWER(SUBSTR(emailAddress, INSTR(emailAddress, '@') + 1))"
+    ENROLMENT_MONTH_EXPRESSION = "SUBSTR(createdAt, 1, 7)"
+    # Entries kept in the student_changes log (older ones are pruned)
+    CHANGE_LOG_SIZE = 100_000
+    # Students re-read at once in get_changes
+    CHANGE_FETCH_BATCH = 500
+    # Statements run on almost every call, prepared once per pooled connection (see _execute)
+    INSERT_STUDENT = """
+        INSERT INTO students_info (firstName, lastName, city, state, emailAddress, createdAt)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+    """
+    SELECT_STUDENT = f"{STUDENT_SELECT} WHERE studentId = %s"
+    
+    def __init__(self, host: str = "localhost", user: str = "root", password: str = "root", database: str = "db_students",
+                 pool_size: int = 5, pool_timeout: float = 10.0, health_check_interval: float = 30.0,
+                 location_cache_ttl: Optional[float] = 300.0, backend: Optional[StorageBackend] = None,
+                 instrumentation: Optional[QueryInstrumentation] = None,
+                 cache_max_rows: Optional[int] = None, statement_cache_size: int = 64):
         """
-        Initialize database connection and create tables if they don't exist
+        Initialize database connection and bring the schema up to date
+        
+        Args:
+            host, user, password, database: MySQL connection settings (ignored when `backend` is given)
+            pool_size: Maximum number of pooled connections
+            pool_timeout: Seconds to wait for a free connection when the pool is exhausted
+            health_check_interval: Idle seconds after which a pooled connection is pinged before reuse
+            location_cache_ttl: Seconds before the state/city cache is reloaded (None: never expires)
+            backend: Storage backend (MySQLBackend or SQLiteBackend); MySQL with the settings above by default
+            instrumentation: Records timings of every call (see get_query_stats); None disables it
+            cache_max_rows: Keep a local copy of up to this many students (see StudentCache)
+                to serve the unfiltered reads; None disables it
+            statement_cache_size: Prepared statements kept per pooled connection (0 disables them)
         """
         self.host = host
         self.user = user
         self.password = password
         self.database = database
-        self.create_tables()
+        self.backend = backend or MySQLBackend(host, user, password, database)
+        self.instrumentation = instrumentation
+        self.pool = ConnectionPool(
+            self.backend.connect,
+            pool_size=pool_size,
+            timeout=pool_timeout,
+            health_check_interval=health_check_interval,
+            ping=self.backend.ping,
+            prepare=self.backend.prepared_cursor,
+            statement_cache_size=statement_cache_size
+        )
+        # state -> {city -> number of students}, loaded by one grouped query
+        self.location_cache_ttl = location_cache_ttl
+        self._locations: Optional[Dict[str, Dict[Optional[str], int]]] = None
+        self._locations_loaded_at = 0.0
+        self._locations_lock = threading.Lock()
+        # Last position returned by get_change_position
+        self._change_position: Optional[Tuple[int, int]] = None
+        self.student_cache = StudentCache(self, cache_max_rows) if cache_max_rows is not None else None
+        self.ensure_schema()
     
-    def get_connection(self):
+    def get_connection(self) -> Optional[PooledConnection]:
         """
-        Create and return a database connection
+        Check out a database connection from the pool
+        
+        Returns:
+            Pooled connection (close() gives it back to the pool) or None on failure
         """
+        started = time.perf_counter()
         try:
-            conn = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database
-            )
-            return conn
-        except Error as e:
-            print(f"Erreur de connexion à la base de données MySQL: {e}")
+            conn = self.pool.get_connection()
+        except (self.backend.Error, PoolTimeoutError) as e:
+            print(f"Erreur de connexion à la base de données ({self.backend.name}): {e}")
             return None
+        if self.instrumentation is not None:
+            conn = self.instrumentation.wrap_connection(conn, time.perf_counter() - started,
+                                                        self.backend.explain_prefix)
+        return conn
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get the connection pool statistics
+        
+        Returns:
+            Dictionary of pool counters (checkouts, waits, created, reconnects, in_use...)
+        """
+        return self.pool.get_stats()
+    
+    def get_query_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the per-operation timings recorded by the instrumentation
+        
+        Returns:
+            operation -> {calls, p50_ms, p95_ms, p99_ms, acquire_ms, query_ms, rows, bytes...}
+            (empty when instrumentation is disabled)
+        """
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.snapshot()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the student cache counters (hits, misses, full_loads, refreshes, rows...)
+        
+        Returns:
+            Dictionary of cache counters (empty when the cache is disabled)
+        """
+        if self.student_cache is None:
+            return {}
+        return self.student_cache.get_stats()
+    
+    def _students_changed(self, cleared: bool = False):
+        """
+        Tell the student cache about a local write so the next read picks it up
+        """
+        if self.student_cache is not None:
+            if cleared:
+                self.student_cache.clear()
+            else:
+                self.student_cache.invalidate()
     
-    def create_tables(self):
+    def close(self):
         """
-        Create the students_info table with the exact schema from SQL Workbench
+        Close all pooled connections
+        """
+        self.pool.close()
+        if self.instrumentation is not None:
+            self.instrumentation.flush()
+    
+    def ensure_schema(self):
+        """
+        Apply the pending schema migrations (never drops existing data)
+        
+        When the schema is up to date this costs a single SELECT, plus the
+        pruning of the student_changes log.
         """
         conn = self.get_connection()
         if conn:
             try:
-                cursor = conn.cursor()
-                
-                # Drop table if exists to recreate with correct schema
-                cursor.execute("DROP TABLE IF EXISTS students_info")
-                
-                # Create table with your exact SQL schema
-                cursor.execute("""
-                    CREATE TABLE students_info (
-                        studentId INT NOT NULL AUTO_INCREMENT,
-                        firstName VARCHAR(45) NOT NULL,
-                        lastName VARCHAR(45),
-                        state VARCHAR(45),
-                        city VARCHAR(45),
-                        emailAddress VARCHAR(45),
-                        PRIMARY KEY (studentId),
-                        UNIQUE INDEX studentId_UNIQUE (studentId ASC) VISIBLE
-                    )
-                """)
-                conn.commit()
-                print("Table 'students_info' créée avec succès.")
-            except Error as e:
-                print(f"Erreur lors de la création de la table: {e}")
+                version = self.backend.migrate(conn)
+                if version < migrations.LATEST_VERSION:
+                    print(f"Schéma en version {version}, {migrations.LATEST_VERSION} attendue.")
+                else:
+                    self._prune_change_log(conn)
+            except (self.backend.Error, RuntimeError) as e:
+                print(f"Erreur lors de la migration du schéma: {e}")
             finally:
-                if conn.is_connected():
-                    cursor.close()
-                    conn.close()
+                conn.close()
     
-    def add_student(self, first_name: str, last_name: str, city: str, state: str, email: str) -> bool:
+    @instrumented_operation
+    def add_student(self, first_name: str, last_name: str, city: str, state: str, email: str) -> Optional[int]:
         """
         Add a new student to the database
         
@@ -76,85 +228,257 @@ class DatabaseManager:
             email: Student's email address
             
         Returns:
-            bool: True if successful, False otherwise
+            The new student's ID (lastrowid), or None on failure
         """
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO students_info (firstName, lastName, city, state, emailAddress)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (first_name, last_name, city, state, email))
+                cursor = self._execute(conn, self.INSERT_STUDENT, (first_name, last_name, city, state, email))
                 conn.commit()
+                self._count_location(state, city, 1)
+                self._students_changed()
                 print(f"Étudiant {first_name} {last_name} ajouté avec succès.")
-                return True
-            except mysql.connector.IntegrityError:
+                return cursor.lastrowid
+            except self.backend.IntegrityError:
                 print(f"Erreur: L'email {email} existe déjà dans la base de données.")
-                return False
-            except Error as e:
+                return None
+            except self.backend.Error as e:
                 print(f"Erreur lors de l'ajout de l'étudiant: {e}")
-                return False
+                return None
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
-        return False
+                conn.close()
+        return None
     
-    def get_all_students(self) -> List[Tuple]:
+    @instrumented_operation
+    def add_students_bulk(self, students: Iterable[Tuple[str, str, str, str, str]],
+                          batch_size: int = 1000, upsert: bool = False) -> Dict[str, Any]:
+        """
+        Add many students using batched multi-row INSERTs, one transaction per batch
+        
+        The input is consumed lazily, so a generator keeps memory flat whatever
+        its size. When a batch is rejected, it is rolled back and replayed row by
+        row so that only the faulty rows are reported instead of aborting the load.
+        
+        Args:
+            students: Iterable of (first_name, last_name, city, state, email) tuples
+            batch_size: Number of rows sent per INSERT statement and transaction
+            upsert: If True, a row whose email already exists updates that student
+            
+        Returns:
+            Dictionary with 'processed' (rows read), 'written' (rows inserted or
+            updated), 'batches' and 'errors', a list of (row_index, row, message)
+        """
+        report = {"processed": 0, "written": 0, "batches": 0, "errors": []}
+        query = self.INSERT_STUDENT
+        if upsert:
+            query += self.backend.upsert_on_email_clause()
+        
+        conn = self.get_connection()
+        if not conn:
+            return report
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            rows = iter(students)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                first_index = report["processed"]
+                report["processed"] += len(batch)
+                report["batches"] += 1
+                
+                valid = []
+                for offset, row in enumerate(batch):
+                    if len(row) != 5:
+                        report["errors"].append((first_index + offset, row, "5 champs attendus"))
+                    else:
+                        valid.append((first_index + offset, tuple(row)))
+                if not valid:
+                    continue
+                
+                try:
+                    conn.start_transaction()
+                    cursor.executemany(query, [row for _, row in valid])
+                    conn.commit()
+                    report["written"] += len(valid)
+                except self.backend.Error:
+                    conn.rollback()
+                    # Replay the batch row by row to isolate the rejected rows
+                    for index, row in valid:
+                        try:
+                            cursor.execute(query, row)
+                            report["written"] += 1
+                        except self.backend.Error as e:
+                            report["errors"].append((index, row, str(e)))
+            if report["written"]:
+                self.invalidate_location_cache()
+                self._students_changed()
+                self._prune_change_log(conn)
+            print(f"{report['written']}/{report['processed']} étudiants importés "
+                  f"en {report['batches']} lots ({len(report['errors'])} erreurs).")
+        except self.backend.Error as e:
+            print(f"Erreur lors de l'import en lot des étudiants: {e}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+        return report
+    
+    @instrumented_operation
+    def insert_students(self, students: List[Tuple[str, str, str, str, str]]) -> Dict[str, Any]:
+        """
+        Insert a batch of students in one transaction and return them as stored
+        
+        Unlike add_students_bulk, the caller gets every new student back (ID,
+        version, createdAt) and a failure of the database itself is reported
+        apart from the rows it refused, so the batch can be retried later
+        (write-behind queue). New rows are read back by email, which is required.
+        
+        Args:
+            students: (first_name, last_name, city, state, email) tuples
+            
+        Returns:
+            Dictionary with 'added' [(index, Student, or None if it could not be
+            read back)], 'rejected' [(index, message)]
+            for the rows the database refused (duplicate email...) and 'error' (message
+            when the database failed or could not be reached, None otherwise). Rows in
+            neither list were not written.
+        """
+        report = {"added": [], "rejected": [], "error": None}
+        if not students:
+            return report
+        # Plain cursor: executemany sends one multi-row INSERT, a prepared statement would run per row
+        query = self.INSERT_STUDENT
+        conn = self.get_connection()
+        if not conn:
+            report["error"] = "Aucune connexion à la base de données disponible"
+            return report
+        added = []
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            try:
+                self.backend.start_write_transaction(conn)
+                cursor.executemany(query, students)
+                conn.commit()
+                added = list(range(len(students)))
+            except self.backend.IntegrityError:
+                conn.rollback()
+                # Replay the batch row by row to isolate the refused rows
+                for index, student in enumerate(students):
+                    try:
+                        cursor.execute(query, student)
+                        added.append(index)
+                    except self.backend.IntegrityError:
+                        report["rejected"].append(
+                            (index, f"L'email {student[4]} existe déjà dans la base de données"))
+            if added:
+                emails = tuple(students[index][4] for index in added)
+                cursor.execute(f"{self.STUDENT_SELECT} WHERE emailAddress IN ({self._placeholders(emails)})",
+                               emails)
+                # Rows are stored with the email exactly as given: matching on the exact string keeps
+                # emails differing only by case apart (the SQLite unique index is case-sensitive)
+                stored = {student.emailAddress: student for student in map(Student._make, cursor.fetchall())}
+                report["added"] = [(index, stored.get(students[index][4])) for index in added]
+        except self.backend.Error as e:
+            report["error"] = str(e)
+            if added and not report["added"]:
+                # Written before the failure but not read back: known by index only
+                report["added"] = [(index, None) for index in added]
+            print(f"Erreur lors de l'ajout d'un lot d'étudiants: {e}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+        
+        if added:
+            for index in added:
+                _, _, city, state, _ = students[index]
+                self._count_location(state, city, 1)
+            self._students_changed()
+        return report
+    
+    @instrumented_operation
+    def get_all_students(self, columns: Optional[Sequence[str]] = None) -> List[Student]:
         """
         Retrieve all students from the database
         
+        Args:
+            columns: Columns to read (e.g. ("studentId", "firstName", "lastName")), None for all
+        
         Returns:
-            List of tuples containing student data
+            List of Student rows (rows of `columns` only when given, see student_record.row_type)
         """
+        columns = self._columns(columns)
+        if self.student_cache is not None:
+            students = self.student_cache.get_all()
+            if students is not None:
+                return projector(columns)(students)
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM students_info ORDER BY studentId")
-                students = cursor.fetchall()
-                return students
-            except Error as e:
+                cursor.execute(f"SELECT {select_list(columns)} FROM students_info ORDER BY studentId")
+                return self._students(cursor.fetchall(), columns)
+            except self.backend.Error as e:
                 print(f"Erreur lors de la récupération des étudiants: {e}")
                 return []
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
+                conn.close()
         return []
     
-    def get_student_by_id(self, student_id: int) -> Optional[Tuple]:
+    @instrumented_operation
+    def get_student_by_id(self, student_id: int, columns: Optional[Sequence[str]] = None) -> Optional[Student]:
         """
         Retrieve a specific student by ID
         
         Args:
             student_id: The student's ID
+            columns: Columns to read, None for all
             
         Returns:
-            Tuple containing student data or None if not found
+            Student row (of `columns` only when given) or None if not found
         """
+        columns = self._columns(columns)
+        if self.student_cache is not None:
+            served, student = self.student_cache.get(student_id)
+            if served:
+                return None if student is None else projector(columns)([student])[0]
+        query = self.SELECT_STUDENT if columns == STUDENT_COLUMNS else \
+            f"SELECT {select_list(columns)} FROM students_info WHERE studentId = %s"
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM students_info WHERE studentId = %s", (student_id,))
+                cursor = self._execute(conn, query, (student_id,))
                 student = cursor.fetchone()
-                return student
-            except Error as e:
+                return None if student is None else row_type(columns)._make(student)
+            except self.backend.Error as e:
                 print(f"Erreur lors de la récupération de l'étudiant: {e}")
                 return None
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
+                conn.close()
         return None
     
+    @instrumented_operation
     def update_student(self, student_id: int, first_name: str, last_name: str, 
-                      city: str, state: str, email: str) -> bool:
+                      city: str, state: str, email: str, expected_version: Optional[int] = None) -> Optional[Student]:
         """
         Update an existing student's information
         
+        No row is locked while the user edits: the update locks the row,
+        checks that it still has the version the caller edited, writes it
+        and increments the version, all in one short transaction.
+        
         Args:
             student_id: The student's ID
             first_name: Updated first name
@@ -162,138 +486,848 @@ class DatabaseManager:
             city: Updated city
             state: Updated state
             email: Updated email address
+            expected_version: Version of the row the changes were made on
+                (None: overwrite whatever version is current)
             
         Returns:
-            bool: True if successful, False otherwise
+            The updated Student (with its new version), or None if nothing was
+            written (duplicate email, database unavailable)
+            
+        Raises:
+            StudentNotFoundError: If no student has this ID
+            StudentConflictError: If the row changed since `expected_version`
         """
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
-                cursor = conn.cursor()
-                cursor.execute("""
+                # Ligne verrouillée jusqu'au commit: version et ancienne province/ville (cache des lieux) exactes
+                previous = self._lock_row(conn, student_id)
+                if previous is None:
+                    conn.rollback()
+                    raise StudentNotFoundError(student_id)
+                if expected_version is not None and previous.version != expected_version:
+                    conn.rollback()
+                    raise StudentConflictError(student_id, previous)
+                cursor = self._execute(conn, """
                     UPDATE students_info 
-                    SET firstName = %s, lastName = %s, city = %s, state = %s, emailAddress = %s
+                    SET firstName = %s, lastName = %s, city = %s, state = %s, emailAddress = %s,
+                        version = version + 1
                     WHERE studentId = %s
                 """, (first_name, last_name, city, state, email, student_id))
-                
-                if cursor.rowcount > 0:
-                    conn.commit()
-                    print(f"Étudiant ID {student_id} mis à jour avec succès.")
-                    return True
-                else:
-                    print(f"Aucun étudiant trouvé avec l'ID {student_id}.")
-                    return False
-            except mysql.connector.IntegrityError:
+                conn.commit()
+                self._count_location(previous.state, previous.city, -1)
+                self._count_location(state, city, 1)
+                self._students_changed()
+                print(f"Étudiant ID {student_id} mis à jour avec succès.")
+                return previous._replace(firstName=first_name, lastName=last_name, state=state, city=city,
+                                         emailAddress=email, version=previous.version + 1)
+            except self.backend.IntegrityError:
+                conn.rollback()
                 print(f"Erreur: L'email {email} existe déjà dans la base de données.")
-                return False
-            except Error as e:
+                return None
+            except self.backend.Error as e:
+                conn.rollback()
                 print(f"Erreur lors de la mise à jour de l'étudiant: {e}")
-                return False
+                return None
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
-        return False
+                conn.close()
+        return None
     
-    def delete_student(self, student_id: int) -> bool:
+    @instrumented_operation
+    def delete_student(self, student_id: int, expected_version: Optional[int] = None) -> bool:
         """
         Delete a student from the database
         
         Args:
             student_id: The student's ID to delete
+            expected_version: Only delete the row if it still has this version (None: any version)
             
         Returns:
             bool: True if successful, False otherwise
+            
+        Raises:
+            StudentConflictError: If the row changed since `expected_version`
         """
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM students_info WHERE studentId = %s", (student_id,))
-                
-                if cursor.rowcount > 0:
-                    conn.commit()
-                    print(f"Étudiant ID {student_id} supprimé avec succès.")
-                    return True
-                else:
+                previous = self._lock_row(conn, student_id)
+                if previous is None:
+                    conn.rollback()
                     print(f"Aucun étudiant trouvé avec l'ID {student_id}.")
                     return False
-            except Error as e:
+                if expected_version is not None and previous.version != expected_version:
+                    conn.rollback()
+                    raise StudentConflictError(student_id, previous)
+                cursor = self._execute(conn, "DELETE FROM students_info WHERE studentId = %s", (student_id,))
+                conn.commit()
+                self._count_location(previous.state, previous.city, -1)
+                self._students_changed()
+                print(f"Étudiant ID {student_id} supprimé avec succès.")
+                return True
+            except self.backend.Error as e:
+                conn.rollback()
                 print(f"Erreur lors de la suppression de l'étudiant: {e}")
                 return False
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
+                conn.close()
         return False
     
-    def search_students(self, search_term: str, search_field: str = "all") -> List[Tuple]:
+    def _lock_row(self, conn, student_id: int) -> Optional[Student]:
+        """
+        Start a write transaction and read a student, locked until commit or rollback
+        """
+        self.backend.start_write_transaction(conn)
+        cursor = self._execute(conn, self.SELECT_STUDENT + self.backend.lock_rows_clause, (student_id,))
+        try:
+            student = cursor.fetchone()
+            return None if student is None else Student._make(student)
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _execute(conn, query: str, params: tuple = ()):
+        """
+        Run `query` as a prepared statement of `conn` (reused by the next calls on this connection)
+        
+        Returns:
+            The statement's cursor: fetch its rows, then close it
+        """
+        cursor = conn.statement(query)
+        cursor.execute(query, params)
+        return cursor
+    
+    @staticmethod
+    def _columns(columns: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        """
+        Validate the columns a caller asked for (all of them when None)
+        
+        Raises:
+            ValueError: If a column is unknown or repeated
+        """
+        if columns is None:
+            return STUDENT_COLUMNS
+        columns = tuple(columns)
+        row_type(columns)
+        return columns
+    
+    @staticmethod
+    def _students(rows: Iterable[tuple], columns: Tuple[str, ...] = STUDENT_COLUMNS) -> List[Student]:
+        """
+        Typed rows of a query selecting `columns`
+        """
+        return list(map(row_type(columns)._make, rows))
+    
+    @classmethod
+    def merge_student(cls, base: Student, mine: Student, theirs: Student) -> Tuple[Student, List[str]]:
+        """
+        Three-way merge of a student edited while someone else changed it
+        
+        A field changed on one side only takes that side's value. A field
+        changed differently on both sides keeps `mine` and is reported.
+        
+        Args:
+            base: Student the edit started from
+            mine: Student with the local changes
+            theirs: Current Student in the database
+            
+        Returns:
+            (merged Student carrying the version of `theirs`, names of the conflicting fields)
+        """
+        merged = list(theirs)
+        conflicts = []
+        for field, position in cls.FIELD_POSITIONS.items():
+            if mine[position] == base[position]:
+                continue
+            if theirs[position] != base[position] and theirs[position] != mine[position]:
+                conflicts.append(field)
+            merged[position] = mine[position]
+        return Student._make(merged), conflicts
+    
+    @instrumented_operation
+    def delete_students(self, student_ids: Iterable[int], expected_versions: Optional[Dict[int, int]] = None,
+                        batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Delete many students in one transaction, `batch_size` IDs per DELETE ... IN (...)
+        
+        Args:
+            student_ids: IDs of the students to delete
+            expected_versions: studentId -> version the caller saw; a student whose
+                version changed since is kept and reported (None: delete whatever the version)
+            batch_size: Number of IDs per statement
+            
+        Returns:
+            Dictionary with 'deleted' (IDs deleted), 'conflicts' (current Student rows of the
+            students kept because they changed), 'missing' (IDs no longer in the table)
+            and 'error' (message, or None)
+        """
+        return self._write_students("delete", sorted(set(student_ids)), {}, expected_versions, batch_size)
+    
+    @instrumented_operation
+    def update_students(self, changes: Dict[int, Dict[str, Optional[str]]],
+                        expected_versions: Optional[Dict[int, int]] = None,
+                        batch_size: int = 500) -> Dict[str, Any]:
+        """
+        Apply field changes to many students in one transaction
+        
+        Each batch is a single UPDATE ... WHERE studentId IN (...): a field set
+        to the same value for the whole batch is a plain assignment, otherwise a
+        CASE studentId WHEN ... THEN ... END picks each student's value.
+        Either every change is applied or, on error (a duplicate email for
+        example), none is.
+        
+        Args:
+            changes: studentId -> {column: new value}, columns among FIELD_POSITIONS
+            expected_versions: studentId -> version the caller saw; a student whose
+                version changed since is left untouched and reported (None: no check)
+            batch_size: Number of students per statement
+            
+        Returns:
+            Dictionary with 'updated' (Student rows of the updated students, with their new
+            version), 'conflicts' (current Student rows of the students left untouched
+            because they changed), 'missing' (IDs of the students deleted meanwhile), 'error'
+            (message, or None) and 'rejected' (True when the error comes from the data,
+            e.g. a duplicate email, so that retrying the same changes would fail again)
+        """
+        unknown = {field for fields in changes.values() for field in fields} - set(self.FIELD_POSITIONS)
+        if unknown:
+            raise ValueError(f"Colonnes inconnues: {', '.join(sorted(unknown))}")
+        return self._write_students("update", sorted(changes), changes, expected_versions, batch_size)
+    
+    def update_students_fields(self, student_ids: Iterable[int], fields: Dict[str, Optional[str]],
+                               expected_versions: Optional[Dict[int, int]] = None) -> Dict[str, Any]:
+        """
+        Give the same values to some fields of many students (e.g. move them to another city)
+        
+        Args:
+            student_ids: IDs of the students to change
+            fields: column -> new value, columns among FIELD_POSITIONS
+            expected_versions: See update_students
+            
+        Returns:
+            Same report as update_students
+        """
+        return self.update_students({student_id: fields for student_id in student_ids}, expected_versions)
+    
+    def _write_students(self, action: str, student_ids: List[int], changes: Dict[int, Dict[str, Optional[str]]],
+                        expected_versions: Optional[Dict[int, int]], batch_size: int) -> Dict[str, Any]:
+        """
+        Run a batch update or delete: lock the rows, drop the ones whose version changed, write the others
+        """
+        report = {"updated" if action == "update" else "deleted": [], "conflicts": [], "missing": [],
+                  "error": None, "rejected": False}
+        if not student_ids:
+            return report
+        conn = self.get_connection()
+        if not conn:
+            report["error"] = "Aucune connexion à la base de données disponible"
+            return report
+        written = []
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            self.backend.start_write_transaction(conn)
+            for start in range(0, len(student_ids), batch_size):
+                batch = student_ids[start:start + batch_size]
+                cursor.execute(f"{self.STUDENT_SELECT} WHERE studentId IN ({self._placeholders(batch)})"
+                               f"{self.backend.lock_rows_clause}", tuple(batch))
+                current = self._students(cursor.fetchall())
+                found = {student.studentId for student in current}
+                report["missing"].extend(student_id for student_id in batch if student_id not in found)
+                if expected_versions is not None:
+                    unchanged = []
+                    for student in current:
+                        if expected_versions.get(student.studentId, student.version) == student.version:
+                            unchanged.append(student)
+                        else:
+                            report["conflicts"].append(student)
+                    current = unchanged
+                if not current:
+                    continue
+                ids = tuple(student[0] for student in current)
+                if action == "delete":
+                    cursor.execute(f"DELETE FROM students_info WHERE studentId IN ({self._placeholders(ids)})", ids)
+                    written.extend(current)
+                else:
+                    query, params = self._batch_update_query(current, changes)
+                    cursor.execute(query, params)
+                    written.extend(self._apply_changes(student, changes[student[0]]) for student in current)
+            conn.commit()
+        except self.backend.Error as e:
+            conn.rollback()
+            written = []
+            report["conflicts"] = []
+            report["missing"] = []
+            if isinstance(e, self.backend.IntegrityError):
+                report["error"] = "Un des emails existe déjà dans la base de données"
+                report["rejected"] = True
+            else:
+                report["error"] = str(e)
+            print(f"Erreur lors de la modification en lot des étudiants: {e}")
+        finally:
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+        
+        if written:
+            self.invalidate_location_cache()
+            self._students_changed()
+        if action == "delete":
+            report["deleted"] = [student[0] for student in written]
+            print(f"{len(written)} étudiants supprimés.")
+        else:
+            report["updated"] = written
+            print(f"{len(written)} étudiants mis à jour.")
+        return report
+    
+    @staticmethod
+    def _placeholders(values) -> str:
+        return ", ".join(["%s"] * len(values))
+    
+    def _batch_update_query(self, students: List[Student], changes: Dict[int, Dict[str, Optional[str]]]
+                            ) -> Tuple[str, tuple]:
+        """
+        Build the UPDATE applying `changes` to `students` in one statement
+        """
+        ids = tuple(student[0] for student in students)
+        assignments, params = [], []
+        for field in self.FIELD_POSITIONS:
+            values = {student_id: changes[student_id][field] for student_id in ids if field in changes[student_id]}
+            if not values:
+                continue
+            distinct = set(values.values())
+            if len(values) == len(ids) and len(distinct) == 1:
+                assignments.append(f"{field} = %s")
+                params.append(distinct.pop())
+            else:
+                cases = " ".join("WHEN %s THEN %s" for _ in values)
+                assignments.append(f"{field} = CASE studentId {cases} ELSE {field} END")
+                for pair in values.items():
+                    params.extend(pair)
+        assignments.append("version = version + 1")
+        query = f"UPDATE students_info SET {', '.join(assignments)} WHERE studentId IN ({self._placeholders(ids)})"
+        return query, tuple(params) + ids
+    
+    @staticmethod
+    def _apply_changes(student: Student, fields: Dict[str, Optional[str]]) -> Student:
+        """
+        Student after an update of `fields` (and of its version)
+        """
+        return student._replace(**fields, version=student.version + 1)
+    
+    @instrumented_operation
+    def search_students(self, search_term: str, search_field: str = "all", limit: Optional[int] = None,
+                        columns: Optional[Sequence[str]] = None) -> List[Student]:
         """
         Search for students based on a search term and field
         
+        Every word of the term must start a word of the searched field(s)
+        ("mont" finds "Montréal", "marie trem" finds "Marie Tremblay"). The
+        lookup uses the FULLTEXT indexes and results come best match first.
+        
         Args:
             search_term: The term to search for
             search_field: The field to search in ('all', 'firstName', 'lastName', 'city', 'state', 'emailAddress')
+            limit: Maximum number of students returned (None for all)
+            columns: Columns to read (e.g. ID and names for a picker), None for all
             
         Returns:
-            List of tuples containing matching student data
+            List of matching Student rows (of `columns` only when given), most relevant first
         """
+        columns = self._columns(columns)
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
-                cursor = conn.cursor()
-                search_term = f"%{search_term}%"
+                condition = self._search_condition(search_term, search_field)
+                if condition is None:
+                    return []
+                where, params = condition
                 
-                if search_field == "all":
-                    cursor.execute("""
-                        SELECT * FROM students_info 
-                        WHERE firstName LIKE %s OR lastName LIKE %s OR 
-                              city LIKE %s OR state LIKE %s OR emailAddress LIKE %s
-                        ORDER BY studentId
-                    """, (search_term, search_term, search_term, search_term, search_term))
-                elif search_field in ["firstName", "lastName", "city", "state", "emailAddress"]:
-                    query = f"SELECT * FROM students_info WHERE {search_field} LIKE %s ORDER BY studentId"
-                    cursor.execute(query, (search_term,))
+                words = self.FULLTEXT_WORD.findall(search_term)
+                if words:
+                    query, params = self.backend.ranked_search_query(words, self._search_columns(search_field), columns)
                 else:
-                    return []
+                    query = f"SELECT {select_list(columns)} FROM students_info WHERE {where} ORDER BY studentId"
+                if limit is not None:
+                    query += " LIMIT %s"
+                    params += (limit,)
                 
-                students = cursor.fetchall()
-                return students
-            except Error as e:
+                cursor = self._execute(conn, query, params)
+                return self._students(cursor.fetchall(), columns)
+            except self.backend.Error as e:
                 print(f"Erreur lors de la recherche: {e}")
                 return []
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
+                conn.close()
         return []
     
-    def get_states(self) -> List[str]:
+    def _search_columns(self, search_field: str = "all") -> Tuple[str, ...]:
+        """
+        Columns covered by a search on `search_field`
+        """
+        return self.SEARCH_FIELDS if search_field == "all" else (search_field,)
+    
+    @staticmethod
+    def normalize_search_text(text: str) -> str:
+        """
+        Fold case and accents the way the server collation compares them ("Québec" -> "quebec")
         """
-        Get all unique states from the database
+        return fold_text(text)
+    
+    @classmethod
+    def search_words(cls, search_term: str) -> List[str]:
+        """
+        Normalized words of a search term, as looked up in the FULLTEXT index
+        """
+        return cls.FULLTEXT_WORD.findall(cls.normalize_search_text(search_term))
+    
+    @classmethod
+    def search_key(cls, student: Student, search_field: str = "all") -> str:
+        """
+        Normalized words of a student's searchable field(s), each preceded by a space
         
+        A search word w matches the student when " " + w is a substring of the key,
+        which mirrors the prefix match done by the FULLTEXT query.
+        """
+        fields = cls.SEARCH_FIELDS if search_field == "all" else (search_field,)
+        text = " ".join(student[cls.FIELD_POSITIONS[field]] or "" for field in fields)
+        return " " + " ".join(cls.search_words(text))
+    
+    @classmethod
+    def matches_search(cls, student: Student, search_term: str, search_field: str = "all") -> bool:
+        """
+        Check client-side whether a student matches a search (same rules as search_students)
+        
+        Args:
+            student: Student row
+            search_term: The term to search for
+            search_field: The field to search in ('all' or one of SEARCH_FIELDS)
+            
         Returns:
-            List of state names
+            True if the server would return this student for the search
+        """
+        words = cls.search_words(search_term)
+        if words:
+            key = cls.search_key(student, search_field)
+            return all(f" {word}" in key for word in words)
+        fields = cls.SEARCH_FIELDS if search_field == "all" else (search_field,)
+        term = cls.normalize_search_text(search_term)
+        return any(term in cls.normalize_search_text(student[cls.FIELD_POSITIONS[field]] or "")
+                   for field in fields)
+    
+    def _search_condition(self, search_term: str, search_field: str = "all") -> Optional[Tuple[str, tuple]]:
+        """
+        Build the WHERE condition matching a search term
+        
+        Args:
+            search_term: The term to search for (empty matches every student)
+            search_field: The field to search in ('all' or one of SEARCH_FIELDS)
+            
+        Returns:
+            (sql_condition, parameters) or None if the field is unknown
+        """
+        if search_field != "all" and search_field not in self.SEARCH_FIELDS:
+            return None
+        if not search_term:
+            return "1 = 1", ()
+        words = self.FULLTEXT_WORD.findall(search_term)
+        if words:
+            return self.backend.fulltext_condition(words, self._search_columns(search_field))
+        
+        # Only punctuation (e.g. "@"): no word to look up in the index
+        pattern = f"%{search_term}%"
+        fields = self.SEARCH_FIELDS if search_field == "all" else (search_field,)
+        condition = " OR ".join(f"{field} LIKE %s" for field in fields)
+        return f"({condition})", (pattern,) * len(fields)
+    
+    @instrumented_operation
+    def get_students_page(self, after_id: Optional[Any] = None, limit: int = 200,
+                          search_term: str = "", search_field: str = "all",
+                          order_by: Optional[str] = None, descending: bool = False,
+                          filters: Optional[Dict[str, str]] = None) -> Tuple[List[Student], Optional[Any]]:
+        """
+        Retrieve one page of students using keyset pagination
+        
+        The page starts right after `after_id` (WHERE studentId > after_id),
+        so each page is an index range scan on the primary key whatever its depth.
+        With `order_by` the key is (column, studentId) and the continuation token
+        is that pair; text columns compare case-insensitively (backend sort_collation).
+        
+        Args:
+            after_id: Continuation token returned by the previous page (None for the first page)
+            limit: Maximum number of students in the page
+            search_term: Optional term restricting the students (same rules as search_students)
+            search_field: The field to search in ('all' or one of SEARCH_FIELDS)
+            order_by: Column to sort on ('studentId' or one of SEARCH_FIELDS), None for studentId
+            descending: Sort in descending order
+            filters: Column -> text the column must contain (LIKE '%text%')
+            
+        Returns:
+            (students, next_token): next_token is None when there is no further page
+        """
+        condition = self._search_condition(search_term, search_field)
+        if condition is None:
+            return [], None
+        if order_by == "studentId":
+            order_by = None
+        if order_by is not None and order_by not in self.SEARCH_FIELDS:
+            return [], None
+        filter_condition = self._filter_condition(filters or {})
+        if filter_condition is None:
+            return [], None
+        if (self.student_cache is not None and not search_term and order_by is None
+                and not descending and not filters):
+            students = self.student_cache.get_page(after_id, limit)
+            if students is not None:
+                return students, students[-1][0] if len(students) == limit else None
+        where, params = condition
+        where += filter_condition[0]
+        params += filter_condition[1]
+        comparison = "<" if descending else ">"
+        direction = " DESC" if descending else ""
+        if order_by is None:
+            if after_id is not None:
+                where += f" AND studentId {comparison} %s"
+                params += (after_id,)
+            order = f"studentId{direction}"
+        else:
+            key = f"COALESCE({order_by}, ''){self.backend.sort_collation}"
+            if after_id is not None:
+                value, last_id = after_id
+                where += f" AND ({key} {comparison} %s OR ({key} = %s AND studentId {comparison} %s))"
+                params += (value, value, last_id)
+            order = f"{key}{direction}, studentId{direction}"
+        
+        conn = self.get_connection()
+        if conn:
+            cursor = None
+            try:
+                cursor = self._execute(conn, f"{self.STUDENT_SELECT} WHERE {where} ORDER BY {order} LIMIT %s",
+                                       params + (limit,))
+                students = self._students(cursor.fetchall())
+                next_token = None
+                if len(students) == limit:
+                    last = students[-1]
+                    next_token = last[0] if order_by is None else \
+                        (last[self.FIELD_POSITIONS[order_by]] or "", last[0])
+                return students, next_token
+            except self.backend.Error as e:
+                print(f"Erreur lors de la récupération d'une page d'étudiants: {e}")
+                return [], None
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                conn.close()
+        return [], None
+    
+    def _filter_condition(self, filters: Dict[str, str]) -> Optional[Tuple[str, tuple]]:
+        """
+        Build the WHERE terms of per-column filters
+        
+        Args:
+            filters: Column ('studentId' or one of SEARCH_FIELDS) -> text the column must contain
+            
+        Returns:
+            (" AND ..." condition, parameters) or None if a column is unknown
+        """
+        condition, params = "", ()
+        for column, text in filters.items():
+            if column == "studentId":
+                column = "CAST(studentId AS CHAR)"
+            elif column not in self.SEARCH_FIELDS:
+                return None
+            escaped = text.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+            condition += f" AND {column} LIKE %s ESCAPE '!'"
+            params += (f"%{escaped}%",)
+        return condition, params
+    
+    @instrumented_operation
+    def iter_students(self, search_term: str = "", search_field: str = "all",
+                      batch_size: int = 1000, raise_errors: bool = False,
+                      columns: Optional[Sequence[str]] = None) -> Iterator[Student]:
+        """
+        Stream students ordered by ID through an unbuffered cursor
+        
+        Rows are read from the server `batch_size` at a time, so memory does not
+        depend on the table size. The pooled connection stays checked out until
+        the generator is exhausted or closed.
+        
+        Args:
+            search_term: Optional term restricting the students (same rules as search_students)
+            search_field: The field to search in ('all' or one of SEARCH_FIELDS)
+            batch_size: Number of rows fetched from the server at a time
+            raise_errors: Raise database errors instead of ending the stream early
+                (for callers that must not mistake a failure for the end of the data)
+            columns: Columns to read, None for all
+            
+        Yields:
+            Student rows (of `columns` only when given)
+        """
+        columns = self._columns(columns)
+        condition = self._search_condition(search_term, search_field)
+        if condition is None:
+            return
+        where, params = condition
+        make = row_type(columns)._make
+        
+        conn = self.get_connection()
+        if not conn:
+            if raise_errors:
+                raise ConnectionError("Aucune connexion à la base de données disponible")
+            return
+        exhausted = False
+        try:
+            cursor = conn.cursor(buffered=False)
+            cursor.execute(f"SELECT {select_list(columns)} FROM students_info WHERE {where} ORDER BY studentId", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from map(make, rows)
+            cursor.close()
+            exhausted = True
+        except self.backend.Error as e:
+            if raise_errors:
+                raise
+            print(f"Erreur lors de la lecture en continu des étudiants: {e}")
+        finally:
+            if exhausted:
+                conn.close()
+            else:
+                # Abandoned or failed mid-stream: dropping the connection is cheaper
+                # than draining the unread rows before giving it back to the pool
+                conn.discard()
+    
+    @instrumented_operation
+    def get_last_change_id(self) -> Optional[int]:
+        """
+        Get the position of the latest entry of the student_changes log
+    
+        Returns:
+            Latest changeId (0 when the log is empty), or None on failure
+        """
+        conn = self.get_connection()
+        if conn:
+            cursor = None
+            try:
+                cursor = self._execute(conn, "SELECT COALESCE(MAX(changeId), 0) FROM student_changes")
+                return cursor.fetchone()[0]
+            except self.backend.Error as e:
+                print(f"Erreur lors de la lecture du journal des modifications: {e}")
+                return None
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                conn.close()
+        return None
+    
+    @instrumented_operation
+    def get_change_position(self, overlap: int = 1000) -> Optional[Tuple[int, int]]:
+        """
+        Get a position of the change log that moves whenever students_info changes (HTTP ETags)
+        
+        Change ids are allocated before commit, so an entry may become visible
+        below the latest one: the number of entries among the last `overlap`
+        ids moves when that happens. When the position moved since the last
+        call, the cached states and cities are dropped and the student cache
+        checks the log on its next read, so reads made after this call are at
+        least as recent as the position.
+        
+        Args:
+            overlap: Number of ids before the latest one whose entries are counted
+            
+        Returns:
+            (latest changeId, number of entries in that window), or None on failure
         """
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
+                cursor = self._execute(conn, """
+                    SELECT COALESCE(MAX(changeId), 0), COUNT(*) FROM student_changes
+                    WHERE changeId > (SELECT COALESCE(MAX(changeId), 0) FROM student_changes) - %s
+                """, (overlap,))
+                position = tuple(cursor.fetchone())
+            except self.backend.Error as e:
+                print(f"Erreur lors de la lecture du journal des modifications: {e}")
+                return None
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                conn.close()
+            if position != self._change_position:
+                self._change_position = position
+                self.invalidate_location_cache()
+                self._students_changed()
+            return position
+        return None
+    
+    @instrumented_operation
+    def get_changes(self, after_change_id: int, overlap: int = 0, max_students: int = 10_000
+                    ) -> Optional[Tuple[int, List[int], List[Student]]]:
+        """
+        Get the students added, updated or deleted since a position of the change log
+    
+        Args:
+            after_change_id: Position returned by get_last_change_id or by a previous call
+            overlap: When there are new entries, also re-read this many entries before
+                `after_change_id` (an entry numbered before commit may become visible late)
+            max_students: Above this many changed students, give up (reloading everything is cheaper)
+    
+        Returns:
+            (last_change_id, changed_ids, students): `students` holds the current
+            row of the changed students still present, so the changed IDs missing
+            from it were deleted. None when the log no longer goes back to
+            `after_change_id` (pruned), when there are too many changes, or on failure.
+        """
+        conn = self.get_connection()
+        if conn:
+            cursor = None
+            try:
+                cursor = self._execute(conn, "SELECT MIN(changeId), MAX(changeId) FROM student_changes")
+                first_change_id, last_change_id = cursor.fetchone()
+                cursor.close()
+                if last_change_id is None or last_change_id <= after_change_id:
+                    return after_change_id, [], []
+                after_change_id = max(0, after_change_id - overlap)
+                if first_change_id > after_change_id + 1:
+                    return None
+                cursor = self._execute(conn, """
+                    SELECT DISTINCT studentId FROM student_changes
+                    WHERE changeId > %s AND changeId <= %s
+                    LIMIT %s
+                """, (after_change_id, last_change_id, max_students + 1))
+                changed_ids = sorted(row[0] for row in cursor.fetchall())
+                cursor.close()
+                if len(changed_ids) > max_students:
+                    return None
+    
+                # IN lists of every length: a plain cursor rather than a statement per length
                 cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT state FROM students_info WHERE state IS NOT NULL ORDER BY state")
-                states = [row[0] for row in cursor.fetchall()]
-                return states
-            except Error as e:
-                print(f"Erreur lors de la récupération des états: {e}")
-                return []
+                students = []
+                for start in range(0, len(changed_ids), self.CHANGE_FETCH_BATCH):
+                    batch = changed_ids[start:start + self.CHANGE_FETCH_BATCH]
+                    placeholders = ", ".join(["%s"] * len(batch))
+                    cursor.execute(f"{self.STUDENT_SELECT} WHERE studentId IN ({placeholders})", tuple(batch))
+                    students.extend(map(Student._make, cursor.fetchall()))
+                return last_change_id, changed_ids, students
+            except self.backend.Error as e:
+                print(f"Erreur lors de la lecture du journal des modifications: {e}")
+                return None
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
-        return []
+                conn.close()
+        return None
+    
+    def _prune_change_log(self, conn):
+        """
+        Delete the change log entries older than the latest CHANGE_LOG_SIZE ones
     
+        A client whose position was pruned reloads the whole table (see get_changes).
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(changeId) FROM student_changes")
+            last_change_id = cursor.fetchone()[0]
+            if last_change_id is not None and last_change_id > self.CHANGE_LOG_SIZE:
+                cursor.execute("DELETE FROM student_changes WHERE changeId <= %s",
+                               (last_change_id - self.CHANGE_LOG_SIZE,))
+                conn.commit()
+        except self.backend.Error as e:
+            print(f"Erreur lors de la purge du journal des modifications: {e}")
+        finally:
+            cursor.close()
+    
+    def _get_locations(self) -> Dict[str, Dict[Optional[str], int]]:
+        """
+        Return the state -> {city -> student count} map, loading it if missing or expired
+        """
+        if self.student_cache is not None:
+            locations = self.student_cache.get_locations()
+            if locations is not None:
+                return locations
+        with self._locations_lock:
+            expired = (self.location_cache_ttl is not None
+                       and time.monotonic() - self._locations_loaded_at > self.location_cache_ttl)
+            if self._locations is not None and not expired:
+                return self._locations
+        
+        locations: Dict[str, Dict[Optional[str], int]] = {}
+        conn = self.get_connection()
+        if conn:
+            cursor = None
+            try:
+                cursor = conn.cursor()
+                # One grouped query served by the (state, city) index
+                cursor.execute("""
+                    SELECT state, city, COUNT(*) FROM students_info
+                    WHERE state IS NOT NULL
+                    GROUP BY state, city
+                """)
+                for state, city, count in cursor.fetchall():
+                    locations.setdefault(state, {})[city] = count
+            except self.backend.Error as e:
+                print(f"Erreur lors du chargement des provinces et villes: {e}")
+                return locations
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                conn.close()
+        else:
+            return locations
+        
+        with self._locations_lock:
+            self._locations = locations
+            self._locations_loaded_at = time.monotonic()
+        return locations
+    
+    def _count_location(self, state: Optional[str], city: Optional[str], delta: int):
+        """
+        Report an added (+1) or removed (-1) student in the cached state/city counts
+        """
+        if state is None:
+            return
+        with self._locations_lock:
+            if self._locations is None:
+                return
+            cities = self._locations.setdefault(state, {})
+            cities[city] = cities.get(city, 0) + delta
+            if cities[city] <= 0:
+                del cities[city]
+                if not cities:
+                    del self._locations[state]
+    
+    def invalidate_location_cache(self):
+        """
+        Forget the cached states and cities; the next lookup reloads them
+        """
+        with self._locations_lock:
+            self._locations = None
+    
+    @instrumented_operation
+    def get_states(self) -> List[str]:
+        """
+        Get all unique states from the database (served from the state/city cache)
+        
+        Returns:
+            List of state names
+        """
+        return sorted(self._get_locations(), key=self.normalize_search_text)
+    
+    @instrumented_operation
     def get_cities_by_state(self, state: str) -> List[str]:
         """
-        Get all cities for a specific state
+        Get all cities for a specific state (served from the state/city cache)
         
         Args:
             state: The state name
@@ -301,22 +1335,83 @@ class DatabaseManager:
         Returns:
             List of city names for the given state
         """
+        cities = self._get_locations().get(state, {})
+        return sorted((city for city in cities if city is not None), key=self.normalize_search_text)
+    
+    @instrumented_operation
+    def get_location_counts(self) -> Dict[str, Dict[Optional[str], int]]:
+        """
+        Get the number of students per state and city (served from the state/city cache)
+        
+        Returns:
+            state -> {city -> number of students}; students without a state are not counted
+        """
+        return {state: dict(cities) for state, cities in self._get_locations().items()}
+    
+    @staticmethod
+    def email_domain(email: Optional[str]) -> Optional[str]:
+        """
+        Domain of an email address, as grouped by EMAIL_DOMAIN_EXPRESSION ("a@Mail.com" -> "mail.com")
+        """
+        return None if email is None else email[email.find("@") + 1:].lower()
+    
+    @staticmethod
+    def enrolment_month(created: Any) -> Optional[str]:
+        """
+        Month of an enrolment timestamp, as grouped by ENROLMENT_MONTH_EXPRESSION ("2024-09")
+        """
+        return None if created is None else str(created)[:7]
+    
+    @instrumented_operation
+    def get_email_domain_counts(self) -> Dict[Optional[str], int]:
+        """
+        Get the number of students per email domain
+        
+        Returns:
+            domain -> number of students (None for students without an email)
+        """
+        if self.student_cache is not None:
+            domains = self.student_cache.get_email_domains()
+            if domains is not None:
+                return domains
+        return self._grouped_counts(self.EMAIL_DOMAIN_EXPRESSION, "des domaines d'email")
+    
+    @instrumented_operation
+    def get_enrolment_counts(self) -> Dict[Optional[str], int]:
+        """
+        Get the number of current students per month of enrolment
+        
+        Returns:
+            'YYYY-MM' -> number of students (None for students added before the dates were recorded)
+        """
+        if self.student_cache is not None:
+            enrolments = self.student_cache.get_enrolments()
+            if enrolments is not None:
+                return enrolments
+        return self._grouped_counts(self.ENROLMENT_MONTH_EXPRESSION, "des inscriptions par mois")
+    
+    def _grouped_counts(self, expression: str, label: str) -> Dict[Optional[str], int]:
+        """
+        Run SELECT expression, COUNT(*) ... GROUP BY expression on the server
+        """
+        counts: Dict[Optional[str], int] = {}
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
                 cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT city FROM students_info WHERE state = %s AND city IS NOT NULL ORDER BY city", (state,))
-                cities = [row[0] for row in cursor.fetchall()]
-                return cities
-            except Error as e:
-                print(f"Erreur lors de la récupération des villes: {e}")
-                return []
+                cursor.execute(f"SELECT {expression} AS grouping_key, COUNT(*) FROM students_info "
+                               f"GROUP BY grouping_key")
+                counts = dict(cursor.fetchall())
+            except self.backend.Error as e:
+                print(f"Erreur lors du calcul {label}: {e}")
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
-        return []
+                conn.close()
+        return counts
     
+    @instrumented_operation
     def clear_all_students(self) -> bool:
         """
         Delete all students from the database
@@ -326,21 +1421,62 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM students_info")
                 conn.commit()
+                self.invalidate_location_cache()
+                self._students_changed(cleared=True)
+                self._prune_change_log(conn)
                 print(f"{cursor.rowcount} étudiants supprimés.")
                 return True
-            except Error as e:
+            except self.backend.Error as e:
                 print(f"Erreur lors de la suppression des étudiants: {e}")
                 return False
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
+                conn.close()
         return False
     
+    @instrumented_operation
+    def find_existing_emails(self, emails: Sequence[str], batch_size: int = 500) -> Optional[Set[str]]:
+        """
+        Find which of some emails the database already holds (duplicate check before an import)
+        
+        Each batch is one IN (...) lookup on the unique email index, which
+        compares emails the way it does on insert: see backend.unique_key.
+        
+        Args:
+            emails: Emails to look up
+            batch_size: Emails per query
+            
+        Returns:
+            backend.unique_key of the stored emails found, or None on failure
+        """
+        conn = self.get_connection()
+        if conn:
+            cursor = None
+            try:
+                cursor = conn.cursor()
+                found = set()
+                for start in range(0, len(emails), batch_size):
+                    batch = emails[start:start + batch_size]
+                    cursor.execute("SELECT emailAddress FROM students_info WHERE emailAddress IN "
+                                   f"({', '.join(['%s'] * len(batch))})", tuple(batch))
+                    found.update(self.backend.unique_key(email) for email, in cursor.fetchall())
+                return found
+            except self.backend.Error as e:
+                print(f"Erreur lors de la recherche des emails existants: {e}")
+                return None
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                conn.close()
+        return None
+    
+    @instrumented_operation
     def get_student_count(self) -> int:
         """
         Get the total number of students in the database
@@ -350,23 +1486,24 @@ class DatabaseManager:
         """
         conn = self.get_connection()
         if conn:
+            cursor = None
             try:
-                cursor = conn.cursor()
-                cursor.execute("SELECT COUNT(*) FROM students_info")
+                cursor = self._execute(conn, "SELECT COUNT(*) FROM students_info")
                 count = cursor.fetchone()[0]
                 return count
-            except Error as e:
+            except self.backend.Error as e:
                 print(f"Erreur lors du comptage des étudiants: {e}")
                 return 0
             finally:
-                if conn.is_connected():
+                if cursor is not None:
                     cursor.close()
-                    conn.close()
+                conn.close()
         return 0
 
 # Test de la connexion si le fichier est exécuté directement
 if __name__ == "__main__":
-    db = DatabaseManager()
+    from storage_backends import backend_from_environment
+    db = DatabaseManager(backend=backend_from_environment())
     
     # Test d'ajout
     success = db.add_student("Jean", "Dupont", "Paris", "Île-de-France", "jean.dupont@email.com")
@@ -378,4 +1515,5 @@ if __name__ == "__main__":
     print(f"Nombre d'étudiants: {len(students)}")
     
     for student in students:
-        print(f"ID: {student[0]}, Nom: {student[1]} {student[2]}, Ville: {student[3]}, État: {student[4]}, Email: {student[5]}") 
\ No newline at end of file
+        print(f"ID: {student.studentId}, Nom: {student.firstName} {student.lastName}, Ville: {student.city}, "
+              f"État: {student.state}, Email: {student.emailAddress}") 
\ No newline at end of file
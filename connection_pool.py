@@ -0,0 +1,317 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection could be checked out before the pool timeout
+    """
+
+
+class StatementCursor:
+    """
+    Cursor owning one prepared statement of a pooled connection.
+
+    It lives as long as its connection and serves every execution of the
+    same query text, so the server parses and plans the statement once per
+    connection instead of once per call. close() only reads what is left of
+    the result: the statement is closed when it leaves the cache or when its
+    connection is closed.
+    """
+
+    def __init__(self, cursor: Any, query: str):
+        self._cursor = cursor
+        self.query = query
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def execute(self, query: str, params=()):
+        # Always pass the first string: mysql-connector re-prepares when given another str object
+        return self._cursor.execute(self.query, params)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        # An unread row would block the next statement of the connection
+        try:
+            if self._cursor.description is not None:
+                self._cursor.fetchall()
+        except Exception:
+            pass  # broken connection: its next use reports it
+
+    def discard(self):
+        """
+        Close the underlying cursor, freeing the server-side statement
+        """
+        try:
+            self._cursor.close()
+        except Exception:
+            pass
+
+
+class PooledConnection:
+    """
+    Thin proxy around a raw connection checked out from a ConnectionPool.
+
+    Every attribute is delegated to the underlying connection, except close()
+    which hands the connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw_connection: Any):
+        self._pool = pool
+        self._raw = raw_connection
+
+    def __getattr__(self, name: str):
+        if self._raw is None:
+            raise AttributeError(f"La connexion '{name}' a déjà été rendue au pool")
+        return getattr(self._raw, name)
+
+    def statement(self, query: str):
+        """
+        Cursor with `query` prepared on this connection, kept for the next executions
+
+        Execute only `query` on it and fetch its rows; closing it is optional.
+        """
+        if self._raw is None:
+            raise AttributeError("La connexion a déjà été rendue au pool")
+        return self._pool.statement(self._raw, query)
+
+    def is_connected(self) -> bool:
+        """
+        A checked-out connection was validated by the pool, no need to ping again
+        """
+        return self._raw is not None
+
+    def close(self):
+        """
+        Return the connection to the pool (safe to call more than once)
+        """
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw)
+
+    def discard(self):
+        """
+        Close the underlying connection for good and free its pool slot
+        """
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw, broken=True)
+
+
+class ConnectionPool:
+    """
+    Thread-safe, lazily filled connection pool.
+
+    Connections are created on demand up to pool_size. When every connection
+    is checked out, callers wait up to `timeout` seconds for one to be released.
+    Idle connections older than `health_check_interval` seconds are pinged
+    before being handed out and silently replaced when they turn out to be stale.
+    """
+
+    def __init__(self, connection_factory: Callable[[], Any], pool_size: int = 5,
+                 timeout: float = 10.0, health_check_interval: float = 30.0,
+                 ping: Optional[Callable[[Any], None]] = None,
+                 prepare: Optional[Callable[[Any], Any]] = None, statement_cache_size: int = 64):
+        """
+        Args:
+            connection_factory: Callable returning a new raw connection
+            pool_size: Maximum number of open connections
+            timeout: Seconds to wait for a free connection before giving up
+            health_check_interval: Idle time (seconds) after which a connection is pinged
+            ping: Callable raising an exception when a connection is no longer usable
+            prepare: Callable opening a prepared-statement cursor on a raw connection
+                (None: statement() hands out plain cursors)
+            statement_cache_size: Prepared statements kept per connection (least recently used evicted)
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size doit être supérieur ou égal à 1")
+        self.connection_factory = connection_factory
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.ping = ping
+        self.prepare = prepare
+        self.statement_cache_size = statement_cache_size
+
+        self._idle = deque()  # (raw_connection, released_at), most recent on the right
+        self._open = 0
+        self._closed = False
+        # raw_connection -> {query: StatementCursor}, in least recently used order
+        self._statements: Dict[Any, Dict[str, StatementCursor]] = {}
+        self._condition = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "health_checks": 0,
+            "reconnects": 0,
+            "discarded": 0,
+            "prepared": 0,
+            "statement_hits": 0,
+        }
+
+    def get_connection(self) -> PooledConnection:
+        """
+        Check out a connection, creating or waiting for one if needed
+
+        Returns:
+            PooledConnection proxy; call close() on it to give it back
+        """
+        deadline = None
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Le pool de connexions est fermé")
+                if self._idle:
+                    raw, released_at = self._idle.pop()
+                    break
+                if self._open < self.pool_size:
+                    # Reserve the slot now, connect outside the lock
+                    self._open += 1
+                    raw, released_at = None, None
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + self.timeout
+                    self._stats["waits"] += 1
+                    wait_started = time.monotonic()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["wait_time"] += time.monotonic() - wait_started
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        f"Aucune connexion disponible après {self.timeout} s "
+                        f"({self.pool_size} connexions utilisées)")
+                self._condition.wait(remaining)
+            if deadline is not None:
+                self._stats["wait_time"] += time.monotonic() - wait_started
+            self._stats["checkouts"] += 1
+
+        try:
+            if raw is None:
+                raw = self._create()
+            elif time.monotonic() - released_at >= self.health_check_interval:
+                raw = self._check_health(raw)
+        except BaseException:
+            self._free_slot()
+            raise
+        return PooledConnection(self, raw)
+
+    def release(self, raw_connection: Any, broken: bool = False):
+        """
+        Give a raw connection back to the pool
+
+        Args:
+            raw_connection: The connection previously checked out
+            broken: True to close the connection instead of reusing it
+        """
+        if broken or self._closed:
+            self._close_quietly(raw_connection)
+            with self._condition:
+                if broken:
+                    self._stats["discarded"] += 1
+                self._open -= 1
+                self._condition.notify()
+            return
+        with self._condition:
+            self._idle.append((raw_connection, time.monotonic()))
+            self._condition.notify()
+
+    def statement(self, raw_connection: Any, query: str):
+        """
+        Get the prepared statement of `query` on a checked-out raw connection
+
+        Only the thread holding the connection touches its statements, so
+        no lock is needed beyond the one guarding the counters.
+
+        Args:
+            raw_connection: The connection checked out by the caller
+            query: SQL text of the statement
+
+        Returns:
+            StatementCursor (or a plain cursor when statements are not cached)
+        """
+        if self.prepare is None or self.statement_cache_size <= 0:
+            return raw_connection.cursor()
+        statements = self._statements.setdefault(raw_connection, {})
+        cursor = statements.pop(query, None)
+        if cursor is None:
+            if len(statements) >= self.statement_cache_size:
+                statements.pop(next(iter(statements))).discard()
+            cursor = StatementCursor(self.prepare(raw_connection), query)
+            counter = "prepared"
+        else:
+            counter = "statement_hits"
+        statements[query] = cursor
+        with self._condition:
+            self._stats[counter] += 1
+        return cursor
+
+    def close(self):
+        """
+        Close every idle connection; checked-out ones are closed on release
+        """
+        with self._condition:
+            self._closed = True
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._open -= len(idle)
+            self._condition.notify_all()
+        for raw in idle:
+            self._close_quietly(raw)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of the pool counters
+
+        Returns:
+            Dictionary with size, in_use, idle, created, checkouts, waits,
+            wait_time, timeouts, health_checks, reconnects, discarded,
+            prepared (statements prepared) and statement_hits (statements reused)
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats["size"] = self.pool_size
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        return stats
+
+    def _create(self):
+        raw = self.connection_factory()
+        with self._condition:
+            self._stats["created"] += 1
+        return raw
+
+    def _check_health(self, raw):
+        with self._condition:
+            self._stats["health_checks"] += 1
+        try:
+            if self.ping is not None:
+                self.ping(raw)
+            return raw
+        except Exception:
+            # Stale connection (server restart, wait_timeout...): replace it
+            self._close_quietly(raw)
+            with self._condition:
+                self._stats["reconnects"] += 1
+            return self._create()
+
+    def _free_slot(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def _close_quietly(self, raw):
+        # Closing the connection frees its server-side statements
+        self._statements.pop(raw, None)
+        try:
+            raw.close()
+        except Exception:
+            pass
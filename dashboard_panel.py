@@ -0,0 +1,87 @@
+from html import escape
+from typing import Any, Dict
+from PySide6.QtWidgets import QDockWidget, QTextBrowser
+
+
+class DashboardPanel(QDockWidget):
+    """
+    Dock showing the enrolment report of StudentReports.
+
+    The panel only renders a report it is given (show_report); computing it
+    is left to the owner, which runs StudentReports.summary off the GUI thread.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__("Tableau de bord", parent)
+        self.setObjectName("dashboard_panel")
+        self.browser = QTextBrowser(self)
+        self.browser.setOpenLinks(False)
+        self.browser.setHtml("<p>Chargement des statistiques...</p>")
+        self.setWidget(self.browser)
+        self._report = None
+
+    def show_report(self, report: Dict[str, Any]):
+        """
+        Render a report returned by StudentReports.summary
+
+        Args:
+            report: Report dictionary
+        """
+        if report is self._report:
+            return  # StudentReports returns the same object while nothing changed
+        self._report = report
+        # Keep the reader's position across refreshes
+        scroll = self.browser.verticalScrollBar().value()
+        self.browser.setHtml(self.render(report))
+        self.browser.verticalScrollBar().setValue(scroll)
+
+    def show_error(self, message: str):
+        """
+        Show why the report could not be computed
+        """
+        self._report = None
+        self.browser.setHtml(f"<p>Statistiques indisponibles: {escape(message)}</p>")
+
+    @staticmethod
+    def render(report: Dict[str, Any]) -> str:
+        """
+        HTML version of a report
+        """
+        total = report["total"]
+
+        def share(count: int) -> str:
+            return f"{100 * count / total:.1f} %" if total else "-"
+
+        def table(headers, rows) -> str:
+            head = "".join(f"<th align='left'>{escape(header)}</th>" for header in headers)
+            body = "".join("<tr>" + "".join(f"<td>{escape(str(cell))}</td>" for cell in row) + "</tr>"
+                           for row in rows)
+            return f"<table cellspacing='0' cellpadding='3' width='100%'><tr>{head}</tr>{body}</table>"
+
+        cities = [(city or "(sans ville)", state, count, share(count)) for state, city, count in report["cities"]]
+        if report["other_cities"]:
+            cities.append(("Autres villes", "", report["other_cities"], share(report["other_cities"])))
+        domains = [(domain, count, share(count)) for domain, count in report["domains"]]
+        if report["other_domains"]:
+            domains.append(("Autres", report["other_domains"], share(report["other_domains"])))
+        months = report["months"][-12:]
+
+        parts = [
+            f"<h3>{total} étudiants</h3>",
+            "<h4>Par province</h4>",
+            table(("Province", "Étudiants", "Part"),
+                  [(state, count, share(count)) for state, count in report["states"]]),
+            "<h4>Villes principales</h4>",
+            table(("Ville", "Province", "Étudiants", "Part"), cities),
+            "<h4>Domaines d'email</h4>",
+            table(("Domaine", "Étudiants", "Part"), domains),
+            "<h4>Inscriptions par mois</h4>",
+        ]
+        if months:
+            parts.append(table(("Mois", "Inscriptions", "Total"), reversed(months)))
+        else:
+            parts.append("<p>Aucune date d'inscription enregistrée.</p>")
+        if report["unknown_dates"]:
+            parts.append(f"<p>{report['unknown_dates']} étudiants inscrits avant l'enregistrement des dates.</p>")
+        parts.append(f"<p><small>Mis à jour le {escape(report['generated_at'].replace('T', ' à '))}</small></p>")
+        return "".join(parts)
@@ -0,0 +1,158 @@
+import threading
+from itertools import count
+from typing import Any, Callable, Dict, Optional, Tuple
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class _TaskSignals(QObject):
+    """
+    Signals of a DatabaseTask; created in the GUI thread so that emissions
+    from the pool threads are queued back to the event loop
+    """
+    finished = Signal(str, int, object)
+    failed = Signal(str, int, str)
+
+
+class DatabaseTask(QRunnable):
+    """
+    Run one DatabaseManager call on a QThreadPool thread
+    """
+
+    def __init__(self, channel: str, generation: int, function: Callable, args: tuple, kwargs: dict,
+                 signals: _TaskSignals, cancelled: threading.Event):
+        super().__init__()
+        self.cancelled = cancelled
+        self.channel = channel
+        self.generation = generation
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = signals
+
+    def run(self):
+        if self.cancelled.is_set():
+            # Superseded while still queued: skip the query altogether
+            return
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.channel, self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.channel, self.generation, result)
+
+
+class DatabaseWorker(QObject):
+    """
+    Run database calls off the GUI thread and deliver results through signals.
+
+    Each call belongs to a channel ("search", "cities"...). Submitting a new
+    call on a channel supersedes the previous one: if it is still queued it
+    is skipped without touching the database, and if it is already running
+    its result is dropped when it arrives. Calls submitted without a
+    channel are never superseded (writes, for example).
+    """
+
+    busy_changed = Signal(bool)
+
+    def __init__(self, parent=None, max_threads: int = 4):
+        """
+        Args:
+            parent: Parent QObject
+            max_threads: Maximum number of concurrent database calls
+                (keep it at or below the connection pool size)
+        """
+        super().__init__(parent)
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._signals = _TaskSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._generations: Dict[str, int] = {}
+        self._cancellations: Dict[str, Tuple[int, threading.Event]] = {}
+        self._callbacks: Dict[Tuple[str, int], Tuple[Optional[Callable], Optional[Callable]]] = {}
+        self._anonymous = count(1)
+        self._busy = False
+
+    def submit(self, channel: Optional[str], function: Callable, *args,
+               on_result: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[str], None]] = None, **kwargs) -> int:
+        """
+        Schedule `function(*args, **kwargs)` on the thread pool
+
+        Args:
+            channel: Name of the channel superseded by this call, or None
+            function: Callable to run (usually a DatabaseManager method)
+            on_result: Called in the GUI thread with the return value
+            on_error: Called in the GUI thread with the error message
+
+        Returns:
+            Generation number of the call on its channel
+        """
+        if channel is None:
+            channel = f"#{next(self._anonymous)}"
+        else:
+            self.cancel(channel)
+        generation = self._generations.get(channel, 0) + 1
+        self._generations[channel] = generation
+
+        cancelled = threading.Event()
+        task = DatabaseTask(channel, generation, function, args, kwargs, self._signals, cancelled)
+        self._cancellations[channel] = (generation, cancelled)
+        self._callbacks[(channel, generation)] = (on_result, on_error)
+        self.thread_pool.start(task)
+        self._update_busy()
+        return generation
+
+    def cancel(self, channel: str):
+        """
+        Drop the pending call of a channel; a running call finishes but its result is ignored
+
+        Args:
+            channel: Channel name
+        """
+        pending = self._cancellations.pop(channel, None)
+        if pending is None:
+            return
+        generation, cancelled = pending
+        cancelled.set()
+        self._callbacks.pop((channel, generation), None)
+        self._update_busy()
+
+    def is_busy(self) -> bool:
+        """
+        True while at least one call still has to deliver its result
+        """
+        return bool(self._callbacks)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """
+        Block until every running call has returned (used on shutdown)
+        """
+        return self.thread_pool.waitForDone(msecs)
+
+    def _complete(self, channel: str, generation: int) -> Tuple[Optional[Callable], Optional[Callable]]:
+        pending = self._cancellations.get(channel)
+        if pending is not None and pending[0] == generation:
+            del self._cancellations[channel]
+        if channel.startswith("#"):
+            self._generations.pop(channel, None)
+        callbacks = self._callbacks.pop((channel, generation), (None, None))
+        self._update_busy()
+        return callbacks
+
+    def _update_busy(self):
+        if self.is_busy() != self._busy:
+            self._busy = self.is_busy()
+            self.busy_changed.emit(self._busy)
+
+    def _on_finished(self, channel: str, generation: int, result: Any):
+        on_result, _ = self._complete(channel, generation)
+        if on_result is not None:
+            on_result(result)
+
+    def _on_failed(self, channel: str, generation: int, message: str):
+        _, on_error = self._complete(channel, generation)
+        if on_error is not None:
+            on_error(message)
+        else:
+            print(f"Erreur lors d'un appel à la base de données: {message}")
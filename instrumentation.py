@@ -0,0 +1,505 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class CallRecord:
+    """
+    Measurements of one DatabaseManager call
+    """
+    __slots__ = ("operation", "started", "wall", "acquire", "query", "queries", "rows", "bytes", "slow_queries",
+                 "failed")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.started = time.time()
+        self.wall = 0.0  # seconds, whole call
+        self.acquire = 0.0  # seconds waiting for pooled connections
+        self.query = 0.0  # seconds in execute/fetch
+        self.queries = 0
+        self.rows = 0  # rows fetched
+        self.bytes = 0  # approximate payload of the fetched rows
+        self.slow_queries = 0
+        self.failed = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "wall_ms": round(self.wall * 1000, 3),
+            "acquire_ms": round(self.acquire * 1000, 3),
+            "query_ms": round(self.query * 1000, 3),
+            "queries": self.queries,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "slow_queries": self.slow_queries,
+            "failed": self.failed,
+        }
+
+
+class SlowQuery:
+    """
+    A statement slower than the slow query threshold, with its execution plan
+    """
+    __slots__ = ("operation", "query", "params", "duration", "rows", "plan")
+
+    def __init__(self, operation: str, query: str, params: Any, duration: float, rows: int, plan: List[tuple]):
+        self.operation = operation
+        self.query = " ".join(query.split())
+        self.params = params
+        self.duration = duration
+        self.rows = rows
+        self.plan = plan
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "duration_ms": round(self.duration * 1000, 3),
+            "rows": self.rows,
+            "query": self.query,
+            "params": repr(self.params),
+            "plan": [[str(value) for value in line] for line in self.plan],
+        }
+
+
+def _row_bytes(row) -> int:
+    # Cheap estimate: characters of text columns, 8 bytes for anything else
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in row if value is not None)
+
+
+class InstrumentedCursor:
+    """
+    Cursor proxy timing execute/fetch calls and counting the rows fetched
+    """
+
+    def __init__(self, cursor, connection: "InstrumentedConnection"):
+        self._cursor = cursor
+        self._connection = connection
+        self._query = None
+        self._params = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _timed(self, function, *args):
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self._elapsed += time.perf_counter() - started
+
+    def execute(self, query, params=None):
+        self._finish()
+        self._query, self._params = query, params
+        if params is None:
+            return self._timed(self._cursor.execute, query)
+        return self._timed(self._cursor.execute, query, params)
+
+    def executemany(self, query, seq_params):
+        self._finish()
+        self._query, self._params = query, None
+        return self._timed(self._cursor.executemany, query, seq_params)
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None:
+            self._count([row])
+        return row
+
+    def fetchmany(self, size: int = 1):
+        rows = self._timed(self._cursor.fetchmany, size)
+        self._count(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._count(rows)
+        return rows
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def _count(self, rows):
+        self._rows += len(rows)
+        self._connection.record.rows += len(rows)
+        self._connection.record.bytes += sum(map(_row_bytes, rows))
+
+    def _finish(self):
+        """
+        Account for the previous statement once its results are consumed
+        """
+        if self._query is None:
+            return
+        query, params, elapsed, rows = self._query, self._params, self._elapsed, self._rows
+        self._query, self._params, self._elapsed, self._rows = None, None, 0.0, 0
+        record = self._connection.record
+        record.query += elapsed
+        record.queries += 1
+        instrumentation = self._connection.instrumentation
+        if elapsed >= instrumentation.slow_query_threshold:
+            record.slow_queries += 1
+            plan = self._connection.explain(query, params)
+            instrumentation.report_slow_query(SlowQuery(record.operation, query, params, elapsed, rows, plan))
+
+
+class InstrumentedConnection:
+    """
+    Pooled connection proxy attributing its queries to the current CallRecord
+    """
+
+    def __init__(self, connection, record: CallRecord, instrumentation: "QueryInstrumentation",
+                 explain_prefix: Optional[str]):
+        self._connection = connection
+        self.record = record
+        self.instrumentation = instrumentation
+        self.explain_prefix = explain_prefix
+
+    def __getattr__(self, name: str):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self)
+
+    def statement(self, query: str):
+        return InstrumentedCursor(self._connection.statement(query), self)
+
+    def explain(self, query: str, params) -> List[tuple]:
+        """
+        Execution plan of a statement, on this connection (empty when unavailable)
+        """
+        if self.explain_prefix is None or not query.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return []
+        cursor = None
+        try:
+            cursor = self._connection.cursor()
+            if params is None:
+                cursor.execute(f"{self.explain_prefix} {query}")
+            else:
+                cursor.execute(f"{self.explain_prefix} {query}", params)
+            return cursor.fetchall()
+        except Exception as e:
+            return [(f"Plan indisponible: {e}",)]
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+
+class OperationStats:
+    """
+    Cumulative counters and a rolling window of call durations for one operation
+    """
+
+    def __init__(self, window: int):
+        self.durations = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.wall = 0.0
+        self.acquire = 0.0
+        self.query = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.slow_queries = 0
+
+    def add(self, record: CallRecord):
+        self.durations.append(record.wall)
+        self.calls += 1
+        self.failures += record.failed
+        self.wall += record.wall
+        self.acquire += record.acquire
+        self.query += record.query
+        self.rows += record.rows
+        self.bytes += record.bytes
+        self.slow_queries += record.slow_queries
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Duration (seconds) below which `fraction` of the recent calls completed
+        """
+        if not self.durations:
+            return 0.0
+        durations = sorted(self.durations)
+        return durations[min(len(durations) - 1, int(fraction * len(durations)))]
+
+
+class QueryInstrumentation:
+    """
+    Per-operation timings of DatabaseManager calls.
+
+    Each call decorated with @instrumented_operation produces a CallRecord
+    (wall time, connection wait, execute/fetch time, rows and bytes fetched).
+    Records feed rolling p50/p95/p99 per operation and the exporters;
+    statements slower than `slow_query_threshold` are reported with their
+    plan (EXPLAIN) to the "students.db.slow" logger and the exporters.
+    """
+
+    PERCENTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, slow_query_threshold: float = 0.2, window: int = 1000,
+                 exporters: Sequence["Exporter"] = ()):
+        """
+        Args:
+            slow_query_threshold: Seconds (execute + fetch) above which a statement is logged with its plan
+            window: Number of recent calls per operation used for the percentiles
+            exporters: Exporter instances receiving the records
+        """
+        self.slow_query_threshold = slow_query_threshold
+        self.window = window
+        self.exporters = list(exporters)
+        self.slow_logger = logging.getLogger("students.db.slow")
+        self._operations: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def current(self) -> Optional[CallRecord]:
+        """
+        Record of the innermost call running in this thread
+        """
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    def start(self, operation: str) -> CallRecord:
+        record = CallRecord(operation)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(record)
+        return record
+
+    def finish(self, record: CallRecord, wall: float, failed: bool = False):
+        stack = getattr(self._local, "stack", [])
+        if record in stack:
+            stack.remove(record)
+        record.wall = wall
+        record.failed = failed
+        with self._lock:
+            stats = self._operations.get(record.operation)
+            if stats is None:
+                stats = self._operations[record.operation] = OperationStats(self.window)
+            stats.add(record)
+        self._export("export_call", record)
+
+    def wrap_connection(self, connection, acquire: float, explain_prefix: Optional[str] = None):
+        """
+        Attribute a freshly checked-out connection to the current call
+
+        Args:
+            connection: Pooled connection
+            acquire: Seconds spent waiting for it
+            explain_prefix: Statement prefix returning a plan ("EXPLAIN"), None to skip plans
+
+        Returns:
+            The connection, wrapped when a call is being measured
+        """
+        record = self.current()
+        if record is None:
+            return connection
+        record.acquire += acquire
+        return InstrumentedConnection(connection, record, self, explain_prefix)
+
+    def report_slow_query(self, slow: SlowQuery):
+        plan = "".join("\n    " + " | ".join(str(value) for value in line) for line in slow.plan)
+        self.slow_logger.warning("Requête lente (%s, %.1f ms, %d lignes): %s%s",
+                                 slow.operation, slow.duration * 1000, slow.rows, slow.query, plan)
+        self._export("export_slow_query", slow)
+
+    def _export(self, method: str, *args):
+        # A broken exporter (full disk...) must never fail the database call it measures
+        for exporter in self.exporters:
+            try:
+                getattr(exporter, method)(*args, self)
+            except Exception:
+                logging.getLogger("students.db").exception("Erreur de l'exportateur %s", type(exporter).__name__)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the statistics of every operation
+
+        Returns:
+            operation -> {calls, failures, p50_ms, p95_ms, p99_ms, acquire_ms, query_ms, rows, bytes, slow_queries}
+            (acquire_ms/query_ms are cumulative totals)
+        """
+        with self._lock:
+            snapshot = {}
+            for operation, stats in sorted(self._operations.items()):
+                entry = {"calls": stats.calls, "failures": stats.failures}
+                for fraction in self.PERCENTILES:
+                    entry[f"p{round(fraction * 100)}_ms"] = round(stats.percentile(fraction) * 1000, 3)
+                entry.update({
+                    "wall_ms": round(stats.wall * 1000, 3),
+                    "acquire_ms": round(stats.acquire * 1000, 3),
+                    "query_ms": round(stats.query * 1000, 3),
+                    "rows": stats.rows,
+                    "bytes": stats.bytes,
+                    "slow_queries": stats.slow_queries,
+                })
+                snapshot[operation] = entry
+            return snapshot
+
+    def flush(self):
+        """
+        Ask every exporter to write out what it buffered
+        """
+        self._export("flush")
+
+
+def instrumented_operation(method: Callable) -> Callable:
+    """
+    Measure a DatabaseManager method with its `instrumentation` (no-op when None)
+
+    Generator methods are measured from the first row requested until the
+    generator is exhausted or closed.
+    """
+    operation = method.__name__
+
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def generator_wrapper(self, *args, **kwargs):
+            if self.instrumentation is None:
+                return (yield from method(self, *args, **kwargs))
+            record = self.instrumentation.start(operation)
+            started, failed = time.perf_counter(), True
+            try:
+                result = yield from method(self, *args, **kwargs)
+                failed = False
+                return result
+            except GeneratorExit:
+                failed = False  # closed by its consumer: not a database failure
+                raise
+            finally:
+                self.instrumentation.finish(record, time.perf_counter() - started, failed)
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.instrumentation is None:
+            return method(self, *args, **kwargs)
+        record = self.instrumentation.start(operation)
+        started, failed = time.perf_counter(), True
+        try:
+            result = method(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self.instrumentation.finish(record, time.perf_counter() - started, failed)
+    return wrapper
+
+
+class Exporter:
+    """
+    Receives the measurements of a QueryInstrumentation
+    """
+
+    def export_call(self, record: CallRecord, instrumentation: QueryInstrumentation):
+        pass
+
+    def export_slow_query(self, slow: SlowQuery, instrumentation: QueryInstrumentation):
+        pass
+
+    def flush(self, instrumentation: QueryInstrumentation):
+        pass
+
+
+class LogExporter(Exporter):
+    """
+    One structured (JSON) log line per call and per slow query
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        """
+        Args:
+            logger: Destination logger ("students.db" by default)
+            level: Level of the lines (QueryInstrumentation already logs slow queries as warnings)
+        """
+        self.logger = logger or logging.getLogger("students.db")
+        self.level = level
+
+    def export_call(self, record, instrumentation):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps({"event": "db_call", **record.as_dict()}, ensure_ascii=False))
+
+    def export_slow_query(self, slow, instrumentation):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps({"event": "slow_query", **slow.as_dict()}, ensure_ascii=False))
+
+
+class PrometheusTextFileExporter(Exporter):
+    """
+    Prometheus text format file for the node_exporter textfile collector
+
+    The file is rewritten atomically at most every `interval` seconds, and on flush().
+    """
+
+    def __init__(self, path: str, interval: float = 15.0, prefix: str = "students_db"):
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self._written_at = 0.0
+        self._lock = threading.Lock()
+
+    def export_call(self, record, instrumentation):
+        if time.monotonic() - self._written_at >= self.interval:
+            self.flush(instrumentation)
+
+    def flush(self, instrumentation):
+        with self._lock:
+            self._written_at = time.monotonic()
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as output:
+                output.write(self.render(instrumentation.snapshot()))
+            os.replace(temporary, self.path)
+
+    def render(self, snapshot: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Format a QueryInstrumentation snapshot as Prometheus metrics
+        """
+        prefix = self.prefix
+        lines = [f"# TYPE {prefix}_call_duration_seconds summary"]
+        for operation, entry in snapshot.items():
+            for fraction in QueryInstrumentation.PERCENTILES:
+                value = entry[f"p{round(fraction * 100)}_ms"] / 1000
+                lines.append(f'{prefix}_call_duration_seconds{{operation="{operation}",quantile="{fraction}"}} {value}')
+            lines.append(f'{prefix}_call_duration_seconds_sum{{operation="{operation}"}} {entry["wall_ms"] / 1000}')
+            lines.append(f'{prefix}_call_duration_seconds_count{{operation="{operation}"}} {entry["calls"]}')
+        counters = (
+            ("call_failures_total", "failures"),
+            ("connection_wait_seconds_total", "acquire_ms"),
+            ("query_seconds_total", "query_ms"),
+            ("rows_fetched_total", "rows"),
+            ("bytes_fetched_total", "bytes"),
+            ("slow_queries_total", "slow_queries"),
+        )
+        for name, key in counters:
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for operation, entry in snapshot.items():
+                value = entry[key] / 1000 if key.endswith("_ms") else entry[key]
+                lines.append(f'{prefix}_{name}{{operation="{operation}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def instrumentation_from_environment() -> QueryInstrumentation:
+    """
+    Build the application's instrumentation from environment variables
+
+    STUDENTS_DB_SLOW_MS: slow query threshold in milliseconds (200 by default)
+    STUDENTS_DB_METRICS_FILE: Prometheus text file to maintain (none by default)
+    """
+    exporters: List[Exporter] = [LogExporter()]
+    metrics_file = os.environ.get("STUDENTS_DB_METRICS_FILE")
+    if metrics_file:
+        exporters.append(PrometheusTextFileExporter(metrics_file))
+    slow_ms = float(os.environ.get("STUDENTS_DB_SLOW_MS", "200"))
+    return QueryInstrumentation(slow_query_threshold=slow_ms / 1000, exporters=exporters)
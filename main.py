@@ -1,17 +1,57 @@
+import logging
+import os
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QTableWidgetItem, QHeaderView
+import threading
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+from PySide6.QtWidgets import (QApplication, QFileDialog, QInputDialog, QLabel, QMainWindow, QMessageBox,
+                               QHeaderView, QProgressDialog)
 from main_ui import Ui_Form
-from connect_database import DatabaseManager
+from connect_database import DatabaseManager, StudentConflictError, StudentWriteError
+from student_record import Student
+from storage_backends import backend_from_environment
+from instrumentation import instrumentation_from_environment
+from db_worker import DatabaseWorker
+from student_table_model import StudentTableModel
+from student_reports import StudentReports
+from dashboard_panel import DashboardPanel
+from write_behind import CONFLICT, DELETED, write_queue_from_environment
+import student_export
+from student_validation import check_student
+
+class ExportProgress(QObject):
+    """Relais de la progression d'un export: émis depuis le thread de travail, reçu dans l'interface"""
+    progressed = Signal(int, object)
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Libellés des champs dans les messages de conflit
+    FIELD_LABELS = {"firstName": "Prénom", "lastName": "Nom", "state": "Province", "city": "Ville",
+                    "emailAddress": "Email"}
+    
+    def __init__(self, db_manager=None, write_queue=None):
         super().__init__()
         # Création d'une instance de l'interface utilisateur
         self.ui = Ui_Form()
         self.ui.setupUi(self)
         
         # Initialisation de la base de données
-        self.db_manager = DatabaseManager()
+        # STUDENTS_DB_BACKEND=sqlite: base locale sans serveur MySQL
+        # (un DatabaseManager peut aussi être fourni, par exemple par le benchmark)
+        # Requêtes lentes journalisées avec leur plan (STUDENTS_DB_SLOW_MS, STUDENTS_DB_METRICS_FILE)
+        # Copie locale des étudiants, rafraîchie par le journal des modifications
+        self.db_manager = db_manager or DatabaseManager(backend=backend_from_environment(),
+                                                        instrumentation=instrumentation_from_environment(),
+                                                        cache_max_rows=200_000)
+        
+        # Les requêtes s'exécutent hors du thread graphique pour ne jamais bloquer la fenêtre
+        self.db_worker = DatabaseWorker(self)
+        # Écriture différée (STUDENTS_WRITE_BEHIND=journal.sqlite3): ajouts et modifications sont
+        # journalisés localement, affichés tout de suite, puis envoyés en lots par un thread de fond
+        self.write_queue = write_queue or write_queue_from_environment(self.db_manager, self)
+        self.search_term = ""
+        self.search_keys = {}  # studentId -> clé de recherche normalisée (réduction locale)
+        self.pending_city = None
+        self.export_cancelled = None  # threading.Event de l'export en cours
         
         # Configuration initiale
         self.setup_ui()
@@ -20,14 +60,40 @@ class MainWindow(QMainWindow):
         
     def setup_ui(self):
         """Configuration initiale de l'interface utilisateur"""
-        # Configuration du tableau
-        self.ui.tableWidget.setSelectionBehavior(self.ui.tableWidget.SelectionBehavior.SelectRows)
-        self.ui.tableWidget.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Configuration du tableau (modèle paresseux: les lignes sont chargées au défilement)
+        self.student_model = StudentTableModel(self)
+        self.ui.tableView.setModel(self.student_model)
+        self.ui.tableView.setSelectionBehavior(self.ui.tableView.SelectionBehavior.SelectRows)
+        # Sélection multiple (Ctrl/Maj): modification et suppression en lot
+        self.ui.tableView.setSelectionMode(self.ui.tableView.SelectionMode.ExtendedSelection)
+        self.ui.tableView.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Tri par clic sur l'en-tête (fait par le modèle, ou par la base tant que des pages restent à charger)
+        self.ui.tableView.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        self.ui.tableView.setSortingEnabled(True)
+        # Filtre par colonne: clic droit sur l'en-tête
+        self.ui.tableView.horizontalHeader().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         
         # Rendre le ComboBox City éditable pour permettre la saisie libre
         self.ui.comboBox_2.setEditable(True)
         self.ui.comboBox_2.setInsertPolicy(self.ui.comboBox_2.InsertPolicy.NoInsert)
         
+        # Tableau de bord (menu Rapports): effectifs par province, ville, domaine d'email et mois,
+        # calculés hors du thread graphique et recalculés seulement quand des étudiants ont changé
+        self.reports = StudentReports(self.db_manager)
+        self.dashboard = DashboardPanel(self)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.dashboard)
+        # Flottant: la fenêtre principale garde sa disposition fixe
+        self.dashboard.setFloating(True)
+        self.dashboard.hide()
+        reports_menu = self.ui.menubar.addMenu("Rapports")
+        reports_menu.addAction(self.dashboard.toggleViewAction())
+        self.dashboard_timer = QTimer(self)
+        self.dashboard_timer.setInterval(5000)
+        
+        # Nombre d'écritures en attente d'envoi (mode écriture différée)
+        self.pending_label = QLabel()
+        self.ui.statusbar.addPermanentWidget(self.pending_label)
+        
         # Charger les provinces dans le ComboBox
         self.load_states()
         
@@ -39,16 +105,65 @@ class MainWindow(QMainWindow):
         self.ui.search_btn.clicked.connect(self.search_students)
         self.ui.clear_btn.clicked.connect(self.clear_fields)
         self.ui.delete_btn.clicked.connect(self.delete_student)
+        self.ui.export_btn.clicked.connect(self.export_students)
         
         # Signal pour la sélection dans le tableau
-        self.ui.tableWidget.itemSelectionChanged.connect(self.on_table_selection_changed)
+        self.ui.tableView.selectionModel().selectionChanged.connect(self.on_table_selection_changed)
         
         # Signal pour le changement de province dans le ComboBox
         self.ui.comboBox.currentTextChanged.connect(self.on_state_changed)
+        
+        # Chargement asynchrone des pages du tableau et indicateur de chargement
+        self.student_model.page_requested.connect(self.load_page)
+        self.ui.tableView.horizontalHeader().customContextMenuRequested.connect(self.edit_column_filter)
+        self.db_worker.busy_changed.connect(self.on_busy_changed)
+        
+        # Recherche en direct: la requête part 250 ms après la dernière frappe
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.run_live_search)
+        self.ui.lineEdit_7.textChanged.connect(self.on_search_text_changed)
+        
+        # Tableau de bord: rafraîchi tant qu'il est affiché (modifications des autres postes comprises)
+        self.dashboard.visibilityChanged.connect(self.on_dashboard_visibility_changed)
+        self.dashboard_timer.timeout.connect(self.refresh_dashboard)
+        
+        # Résultats de l'écriture différée (émis par son thread, reçus dans le thread graphique)
+        if self.write_queue is not None:
+            self.write_queue.written.connect(self.on_write_done)
+            self.write_queue.rejected.connect(self.on_write_rejected)
+            self.write_queue.state_changed.connect(self.on_write_queue_changed)
+            self.write_queue.start()
+    
+    def on_busy_changed(self, busy):
+        """Afficher l'état de chargement pendant les requêtes"""
+        if busy:
+            self.ui.statusbar.showMessage("Chargement...")
+            QApplication.setOverrideCursor(Qt.CursorShape.BusyCursor)
+        else:
+            self.ui.statusbar.clearMessage()
+            QApplication.restoreOverrideCursor()
+    
+    def on_dashboard_visibility_changed(self, visible):
+        """Démarrer ou arrêter le rafraîchissement du tableau de bord"""
+        if visible:
+            self.refresh_dashboard()
+            self.dashboard_timer.start()
+        else:
+            self.dashboard_timer.stop()
+    
+    def refresh_dashboard(self):
+        """Recalculer les statistiques du tableau de bord en arrière-plan"""
+        self.db_worker.submit("reports", self.reports.summary,
+                              on_result=self.dashboard.show_report, on_error=self.dashboard.show_error)
     
     def load_states(self):
         """Charger les provinces dans le ComboBox"""
-        states = self.db_manager.get_states()
+        self.db_worker.submit("states", self.db_manager.get_states, on_result=self.show_states)
+    
+    def show_states(self, states):
+        """Afficher les provinces reçues de la base"""
         self.ui.comboBox.clear()
         self.ui.comboBox.addItems(states)
         
@@ -60,7 +175,13 @@ class MainWindow(QMainWindow):
     def on_state_changed(self, state):
         """Mettre à jour les villes quand la province change"""
         if state:
-            cities = self.db_manager.get_cities_by_state(state)
+            # Une nouvelle province remplace la requête précédente encore en cours
+            self.db_worker.submit("cities", self.db_manager.get_cities_by_state, state,
+                                  on_result=lambda cities: self.show_cities(state, cities))
+    
+    def show_cities(self, state, cities):
+        """Afficher les villes reçues pour une province"""
+        if state:
             self.ui.comboBox_2.clear()
             self.ui.comboBox_2.addItems(cities)
             
@@ -79,24 +200,81 @@ class MainWindow(QMainWindow):
                 
                 default_cities = province_cities.get(state, ["Calgary", "Toronto", "Vancouver"])
                 self.ui.comboBox_2.addItems(default_cities)
+            
+            # Ville choisie par select_student avant l'arrivée de la liste
+            if self.pending_city is not None:
+                self.set_city(self.pending_city)
+                self.pending_city = None
     
     def load_students(self):
         """Charger tous les étudiants dans le tableau"""
-        students = self.db_manager.get_all_students()
-        self.populate_table(students)
+        self.search_term = ""
+        self.search_keys.clear()
+        self.student_model.start_paged()
+    
+    def load_page(self, token):
+        """Lire la page suivante (pagination par clé sur studentId) demandée par le tableau"""
+        # Chaque page n'est demandée que lorsque le tableau défile jusqu'à elle;
+        # une nouvelle recherche remplace la page encore en cours de chargement.
+        # Le tri et les filtres de colonnes du tableau sont faits par la base (ORDER BY/WHERE)
+        order_by, descending = self.student_model.sort_field()
+        self.db_worker.submit(
+            "students", self.db_manager.get_students_page,
+            token, self.student_model.batch_size, self.search_term,
+            order_by=order_by, descending=descending, filters=self.student_model.filter_fields(),
+            on_result=self.on_page_loaded,
+            on_error=lambda message: self.student_model.page_failed()
+        )
+    
+    def edit_column_filter(self, position):
+        """Saisir le filtre de la colonne sous le curseur (vide pour le retirer)"""
+        column = self.ui.tableView.horizontalHeader().logicalIndexAt(position)
+        if column < 0:
+            return
+        title = StudentTableModel.HEADERS[column]
+        text, accepted = QInputDialog.getText(
+            self, "Filtrer la colonne", f"Afficher les lignes dont « {title} » contient:",
+            text=self.student_model.column_filter(column)
+        )
+        if accepted:
+            self.student_model.set_filter(column, text)
+    
+    def on_page_loaded(self, page):
+        """Ajouter une page reçue au tableau"""
+        students, next_token = page
+        first_page = self.student_model.rowCount() == 0
+        self.student_model.append_page(students, next_token)
+        if self.write_queue is not None:
+            self.show_pending_writes(students, first_page)
+        
+        if first_page and not students and self.search_term:
+            QMessageBox.information(self, "Recherche", "Aucun étudiant trouvé avec ce terme de recherche.")
     
     def populate_table(self, students):
         """Remplir le tableau avec les données des étudiants"""
-        self.ui.tableWidget.setRowCount(len(students))
-        
-        for row, student in enumerate(students):
-            # student = (studentId, firstName, lastName, state, city, emailAddress)
-            self.ui.tableWidget.setItem(row, 0, QTableWidgetItem(str(student[0])))  # Student ID
-            self.ui.tableWidget.setItem(row, 1, QTableWidgetItem(student[1]))       # First Name
-            self.ui.tableWidget.setItem(row, 2, QTableWidgetItem(student[2]))       # Last Name
-            self.ui.tableWidget.setItem(row, 3, QTableWidgetItem(student[4]))       # City
-            self.ui.tableWidget.setItem(row, 4, QTableWidgetItem(student[3]))       # State
-            self.ui.tableWidget.setItem(row, 5, QTableWidgetItem(student[5]))       # Email
+        # Le modèle ne crée rien par cellule: il sert les lignes Student à la demande
+        self.student_model.set_students(students)
+    
+    def show_new_student(self, student):
+        """Afficher un étudiant ajouté s'il fait partie du résultat affiché"""
+        # Tant que des pages restent à charger, la pagination par clé l'apportera d'elle-même
+        if not self.student_model.is_complete():
+            return
+        if self.search_term and not DatabaseManager.matches_search(student, self.search_term):
+            return
+        self.student_model.insert_student(student)
+    
+    def selected_student(self):
+        """Retourner l'étudiant (Student) sélectionné dans le tableau, ou None"""
+        index = self.ui.tableView.currentIndex()
+        if not index.isValid():
+            return None
+        return self.student_model.student_at(index.row())
+    
+    def selected_students(self):
+        """Retourner les étudiants (Student) sélectionnés, dans l'ordre du tableau"""
+        rows = sorted(index.row() for index in self.ui.tableView.selectionModel().selectedRows())
+        return [self.student_model.student_at(row) for row in rows]
     
     def get_form_data(self):
         """Récupérer les données du formulaire"""
@@ -110,46 +288,15 @@ class MainWindow(QMainWindow):
     
     def validate_form_data(self, data):
         """Valider les données du formulaire"""
-        if not all([data['first_name'], data['last_name'], data['email'], data['state'], data['city']]):
-            QMessageBox.warning(self, "Erreur", "Tous les champs sont obligatoires!")
-            return False
-        
-        # Validation améliorée de l'email
-        email = data['email'].strip()
-        
-        # Vérifier que l'email contient @ et au moins un point après @
-        if '@' not in email:
-            QMessageBox.warning(self, "Erreur", "L'email doit contenir '@'")
-            return False
-        
-        # Séparer la partie avant et après @
-        parts = email.split('@')
-        if len(parts) != 2:
-            QMessageBox.warning(self, "Erreur", "L'email ne peut contenir qu'un seul '@'")
+        # Mêmes règles que l'import CSV et l'API (student_validation)
+        error = check_student(data['first_name'], data['last_name'], data['city'], data['state'], data['email'])
+        if error is not None:
+            QMessageBox.warning(self, "Erreur", error.message)
+            # Placer le curseur sur le champ à corriger
+            widgets = {'first_name': self.ui.lineEdit_2, 'last_name': self.ui.lineEdit_3, 'email': self.ui.lineEdit_6,
+                       'state': self.ui.comboBox, 'city': self.ui.comboBox_2}
+            widgets[error.field].setFocus()
             return False
-        
-        local_part, domain_part = parts
-        
-        # Vérifier que les parties ne sont pas vides
-        if not local_part or not domain_part:
-            QMessageBox.warning(self, "Erreur", "L'email doit avoir du texte avant et après '@'")
-            return False
-        
-        # Vérifier que le domaine contient au moins un point
-        if '.' not in domain_part:
-            QMessageBox.warning(self, "Erreur", "Le domaine de l'email doit contenir un point (ex: .com, .fr)")
-            return False
-        
-        # Vérifier qu'il n'y a pas de double point
-        if '..' in email:
-            QMessageBox.warning(self, "Erreur", "L'email ne peut pas contenir de double point")
-            return False
-        
-        # Vérifier que ça ne commence/finit pas par @ ou .
-        if email.startswith('@') or email.startswith('.') or email.endswith('@') or email.endswith('.'):
-            QMessageBox.warning(self, "Erreur", "L'email ne peut pas commencer ou finir par '@' ou '.'")
-            return False
-        
         return True
     
     def add_student(self):
@@ -159,73 +306,331 @@ class MainWindow(QMainWindow):
         if not self.validate_form_data(data):
             return
         
-        success = self.db_manager.add_student(
+        if self.write_queue is not None:
+            # Journalisé localement en quelques millisecondes; la ligne reste grisée jusqu'à l'envoi
+            entry = self.write_queue.enqueue_add((data['first_name'], data['last_name'], data['city'],
+                                                  data['state'], data['email']))
+            self.student_model.insert_student(entry.as_student())
+            self.clear_fields()
+            return
+        
+        self.db_worker.submit(
+            None, self.db_manager.add_student,
             data['first_name'],
             data['last_name'],
             data['city'],
             data['state'],
-            data['email']
+            data['email'],
+            on_result=lambda student_id: self.on_student_added(student_id, data)
         )
-        
-        if success:
+    
+    def on_student_added(self, student_id, data):
+        """Résultat de l'ajout d'un étudiant"""
+        if student_id:
             QMessageBox.information(self, "Succès", "Étudiant ajouté avec succès!")
             self.clear_fields()
-            self.load_students()
+            # Ajouter seulement la nouvelle ligne au lieu de recharger tout le tableau
+            student = Student(student_id, data['first_name'], data['last_name'], data['state'], data['city'],
+                              data['email'])
+            self.show_new_student(student)
             self.load_states()  # Recharger les provinces au cas où une nouvelle serait ajoutée
         else:
             QMessageBox.warning(self, "Erreur", "Erreur lors de l'ajout de l'étudiant!")
     
     def update_student(self):
         """Mettre à jour un étudiant existant"""
-        selected_row = self.ui.tableWidget.currentRow()
-        if selected_row == -1:
+        students = self.selected_students()
+        if len(students) > 1:
+            self.update_selected_students(students)
+            return
+        student = self.selected_student()
+        if student is None:
             QMessageBox.warning(self, "Erreur", "Veuillez sélectionner un étudiant à modifier!")
             return
         
-        student_id = int(self.ui.tableWidget.item(selected_row, 0).text())
         data = self.get_form_data()
         
         if not self.validate_form_data(data):
             return
         
-        success = self.db_manager.update_student(
-            student_id,
-            data['first_name'],
-            data['last_name'],
-            data['city'],
-            data['state'],
-            data['email']
+        edited = student._replace(firstName=data['first_name'], lastName=data['last_name'], state=data['state'],
+                                  city=data['city'], emailAddress=data['email'])
+        self.save_student(student, edited)
+    
+    def save_student(self, base, edited):
+        """Enregistrer `edited` à condition que l'étudiant soit toujours dans la version `base`"""
+        # Aucun verrou pendant la saisie: la mise à jour échoue si quelqu'un d'autre est passé avant
+        if self.write_queue is not None:
+            self.queue_student_update(base, edited)
+            return
+        self.db_worker.submit(
+            None, self.write_student, edited, base.version,
+            on_result=lambda result: self.on_student_updated(result, base, edited)
         )
-        
-        if success:
+    
+    def queue_student_update(self, base, edited):
+        """Mettre une modification dans la file d'écriture différée et l'afficher tout de suite"""
+        fields = (edited.firstName, edited.lastName, edited.city, edited.state, edited.emailAddress)
+        if base.studentId < 0:
+            # Étudiant pas encore ajouté: on corrige l'ajout en attente
+            entry = self.write_queue.amend(-base.studentId, fields)
+            if entry is None:
+                QMessageBox.warning(self, "Erreur", "Cet étudiant est en cours d'enregistrement: "
+                                                    "réessayez dans un instant.")
+                return
+        else:
+            entry = self.write_queue.enqueue_update(base, fields)
+            self.student_model.set_pending(base.studentId, True)
+        self.student_model.update_student(entry.as_student())
+        self.search_keys.pop(base.studentId, None)
+        self.clear_fields()
+    
+    def show_pending_writes(self, students, first_page):
+        """Montrer les écritures du journal pas encore envoyées (par exemple après un redémarrage)"""
+        loaded = {student.studentId for student in students}
+        for entry in self.write_queue.pending():
+            if entry.kind == "add":
+                if first_page and (not self.search_term
+                                   or DatabaseManager.matches_search(entry.as_student(), self.search_term)):
+                    self.student_model.insert_student(entry.as_student())
+            elif entry.student_id in loaded:
+                self.student_model.update_student(entry.as_student())
+                self.student_model.set_pending(entry.student_id, True)
+    
+    def on_write_done(self, entry, student):
+        """Une écriture différée a atteint la base"""
+        if entry.kind == "add":
+            self.student_model.remove_student(-entry.write_id)
+            if student is not None:
+                self.show_new_student(student)
+            self.load_states()  # Recharger les provinces au cas où une nouvelle serait ajoutée
+            return
+        self.search_keys.pop(entry.student_id, None)
+        later = [pending for pending in self.write_queue.pending()
+                 if pending.kind == "update" and pending.student_id == entry.student_id]
+        if later:
+            # Une autre modification suit: la ligne garde ses valeurs en attente
+            self.student_model.update_student(later[-1].as_student())
+            return
+        self.student_model.set_pending(entry.student_id, False)
+        if student is not None:
+            self.student_model.update_student(student)
+        self.load_states()
+    
+    def on_write_rejected(self, entry, reason, message, current):
+        """Une écriture différée a été refusée par la base"""
+        if entry.kind == "add":
+            self.student_model.remove_student(-entry.write_id)
+            first_name, last_name = entry.fields[:2]
+            QMessageBox.warning(self, "Enregistrement refusé",
+                                f"L'étudiant {first_name} {last_name} n'a pas été ajouté: {message}.")
+            return
+        self.student_model.set_pending(entry.student_id, False)
+        if reason in (CONFLICT, DELETED):
+            # Même traitement qu'une modification directe: fusion, rechargement ou ligne retirée
+            self.resolve_conflict(entry.base, entry.as_student(), current)
+            return
+        self.student_model.update_student(entry.base)
+        QMessageBox.warning(self, "Enregistrement refusé",
+                            f"La modification de l'étudiant ID {entry.student_id} a été annulée: {message}.")
+    
+    def on_write_queue_changed(self, pending, error):
+        """Afficher le nombre d'écritures en attente dans la barre d'état"""
+        if not pending:
+            self.pending_label.clear()
+            self.pending_label.setToolTip("")
+            return
+        text = f"{pending} écriture(s) en attente"
+        if error:
+            text += " - base injoignable, nouvel essai automatique"
+        self.pending_label.setText(text)
+        self.pending_label.setToolTip(error)
+    
+    def write_student(self, student, version):
+        """Mise à jour exécutée dans le thread de travail: (étudiant, None) ou (None, conflit ou étudiant absent)"""
+        try:
+            return self.db_manager.update_student(student.studentId, student.firstName, student.lastName,
+                                                  student.city, student.state, student.emailAddress,
+                                                  expected_version=version), None
+        except StudentWriteError as error:
+            return None, error
+    
+    def on_student_updated(self, result, base, edited):
+        """Résultat de la mise à jour d'un étudiant"""
+        student, error = result
+        if error is not None:
+            # Pas de version courante si l'étudiant a été supprimé entre-temps
+            current = error.current if isinstance(error, StudentConflictError) else None
+            self.resolve_conflict(base, edited, current)
+        elif student:
             QMessageBox.information(self, "Succès", "Étudiant mis à jour avec succès!")
             self.clear_fields()
-            self.load_students()
+            # Mettre à jour seulement la ligne modifiée
+            self.student_model.update_student(student)
         else:
             QMessageBox.warning(self, "Erreur", "Erreur lors de la mise à jour de l'étudiant!")
     
+    def update_selected_students(self, students):
+        """Appliquer les champs remplis du formulaire à tous les étudiants sélectionnés"""
+        data = self.get_form_data()
+        if data['email']:
+            QMessageBox.warning(self, "Erreur", "L'email est propre à chaque étudiant: "
+                                                "il ne peut pas être modifié en lot!")
+            return
+        fields = {}
+        if data['first_name']:
+            fields['firstName'] = data['first_name']
+        if data['last_name']:
+            fields['lastName'] = data['last_name']
+        if data['city']:
+            # Déplacer vers une ville: la province suit
+            fields['state'] = data['state']
+            fields['city'] = data['city']
+        if not fields:
+            QMessageBox.warning(self, "Erreur", "Remplissez les champs à appliquer aux étudiants sélectionnés!")
+            return
+        
+        changes = ", ".join(f"{self.FIELD_LABELS[field]} = {value}" for field, value in fields.items())
+        reply = QMessageBox.question(
+            self,
+            "Confirmation",
+            f"Appliquer {changes} aux {len(students)} étudiants sélectionnés?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        students, pending = self.apply_to_pending_adds(students, fields)
+        if not students:
+            self.on_students_updated({'updated': [], 'conflicts': [], 'missing': [], 'error': None}, pending)
+            return
+        # Une seule transaction; les étudiants modifiés entre-temps par quelqu'un d'autre sont laissés tels quels
+        versions = {student.studentId: student.version for student in students}
+        self.db_worker.submit(None, self.db_manager.update_students_fields, list(versions), fields, versions,
+                              on_result=lambda report: self.on_students_updated(report, pending))
+    
+    def apply_to_pending_adds(self, students, fields=None):
+        """
+        Modifier (ou supprimer si `fields` est None) les étudiants dont l'ajout est encore dans la file
+        d'écriture différée: ils n'existent pas encore dans la base.
+        Retourne les autres étudiants et (nombre d'ajouts en attente traités, nombre en cours d'envoi).
+        """
+        if self.write_queue is None:
+            return students, (0, 0)
+        saved, done, busy = [], 0, 0
+        for student in students:
+            if student.studentId >= 0:
+                saved.append(student)
+                continue
+            if fields is None:
+                if self.write_queue.cancel(-student.studentId):
+                    self.student_model.remove_student(student.studentId)
+                    done += 1
+                else:
+                    busy += 1
+                continue
+            edited = student._replace(**fields)
+            entry = self.write_queue.amend(-student.studentId, (edited.firstName, edited.lastName, edited.city,
+                                                                edited.state, edited.emailAddress))
+            if entry is None:
+                busy += 1
+            else:
+                self.student_model.update_student(entry.as_student())
+                self.search_keys.pop(student.studentId, None)
+                done += 1
+        return saved, (done, busy)
+    
+    def on_students_updated(self, report, pending=(0, 0)):
+        """Résultat d'une modification en lot (`pending`: voir apply_to_pending_adds)"""
+        if report['error']:
+            message = f"Aucun étudiant n'a été modifié: {report['error']}"
+            if pending[0]:
+                message += f"\n(Les {pending[0]} ajouts en attente sélectionnés ont été modifiés.)"
+            QMessageBox.warning(self, "Erreur", message)
+            return
+        # Une seule mise à jour du tableau pour toutes les lignes touchées
+        self.student_model.update_students(report['updated'] + report['conflicts'])
+        self.student_model.remove_students(report['missing'])
+        for student in report['updated']:
+            self.search_keys.pop(student.studentId, None)
+        message = f"{len(report['updated']) + pending[0]} étudiants mis à jour."
+        if report['conflicts']:
+            message += (f"\n{len(report['conflicts'])} étudiants modifiés entre-temps par un autre utilisateur "
+                        "n'ont pas été touchés (leurs lignes ont été rechargées).")
+        if report['missing']:
+            message += (f"\n{len(report['missing'])} étudiants supprimés entre-temps par un autre utilisateur "
+                        "ont été retirés du tableau.")
+        if pending[1]:
+            message += f"\n{pending[1]} étudiants en cours d'enregistrement n'ont pas été touchés: réessayez."
+        QMessageBox.information(self, "Succès", message)
+        self.clear_fields()
+        self.load_states()
+    
+    def resolve_conflict(self, base, edited, current):
+        """Proposer de fusionner ses modifications avec celles de l'autre utilisateur, ou de recharger la ligne"""
+        if current is None:
+            QMessageBox.warning(self, "Conflit", "Cet étudiant a été supprimé par un autre utilisateur.")
+            self.student_model.remove_student(base.studentId)
+            return
+        
+        merged, conflicts = DatabaseManager.merge_student(base, edited, current)
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("Conflit")
+        box.setText("Cet étudiant a été modifié par un autre utilisateur pendant votre saisie.")
+        if conflicts:
+            labels = ", ".join(self.FIELD_LABELS[field] for field in conflicts)
+            box.setInformativeText(f"Champs modifiés des deux côtés: {labels}. "
+                                   "La fusion garde vos valeurs pour ces champs.")
+        else:
+            box.setInformativeText("Vos modifications portent sur d'autres champs: elles peuvent être fusionnées.")
+        details = []
+        for field, label in self.FIELD_LABELS.items():
+            before, theirs, mine = getattr(base, field), getattr(current, field), getattr(edited, field)
+            if theirs != before or mine != before:
+                details.append(f"{label}: {before or ''} -> autre utilisateur: {theirs or ''}, vous: {mine or ''}")
+        box.setDetailedText("\n".join(details))
+        merge_button = box.addButton("Fusionner", QMessageBox.ButtonRole.AcceptRole)
+        reload_button = box.addButton("Recharger", QMessageBox.ButtonRole.ResetRole)
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+        
+        # Dans tous les cas le tableau montre la ligne à jour
+        self.student_model.update_student(current)
+        if box.clickedButton() is merge_button:
+            self.save_student(current, merged)
+        elif box.clickedButton() is reload_button:
+            self.show_student(current)
+    
     def select_student(self):
         """Sélectionner et charger les données d'un étudiant"""
-        selected_row = self.ui.tableWidget.currentRow()
-        if selected_row == -1:
+        student = self.selected_student()
+        if student is None:
             QMessageBox.warning(self, "Erreur", "Veuillez sélectionner un étudiant!")
             return
-        
+        self.show_student(student)
+    
+    def show_student(self, student):
+        """Charger un étudiant dans le formulaire"""
         # Charger les données dans le formulaire
-        self.ui.lineEdit_2.setText(self.ui.tableWidget.item(selected_row, 1).text())  # First Name
-        self.ui.lineEdit_3.setText(self.ui.tableWidget.item(selected_row, 2).text())  # Last Name
-        self.ui.lineEdit_6.setText(self.ui.tableWidget.item(selected_row, 5).text())  # Email
+        self.ui.lineEdit_2.setText(student.firstName or "")
+        self.ui.lineEdit_3.setText(student.lastName or "")
+        self.ui.lineEdit_6.setText(student.emailAddress or "")
         
-        # Définir la province et la ville (attention: dans MySQL state=index 3, city=index 4)
-        state = self.ui.tableWidget.item(selected_row, 4).text()
-        city = self.ui.tableWidget.item(selected_row, 3).text()
+        # Définir la province et la ville
+        state = student.state or ""
+        city = student.city or ""
         
         # Trouver et sélectionner la province
         state_index = self.ui.comboBox.findText(state)
-        if state_index != -1:
+        if state_index != -1 and state_index != self.ui.comboBox.currentIndex():
+            # Les villes de la province arrivent plus tard: réappliquer la ville à ce moment
+            self.pending_city = city
             self.ui.comboBox.setCurrentIndex(state_index)
         
-        # Définir la ville (dans le ComboBox éditable)
+        self.set_city(city)
+    
+    def set_city(self, city):
+        """Définir la ville (dans le ComboBox éditable)"""
         city_index = self.ui.comboBox_2.findText(city)
         if city_index != -1:
             self.ui.comboBox_2.setCurrentIndex(city_index)
@@ -235,16 +640,56 @@ class MainWindow(QMainWindow):
     
     def search_students(self):
         """Rechercher des étudiants"""
+        self.search_timer.stop()
         search_term = self.ui.lineEdit_7.text().strip()  # Utiliser lineEdit_7 pour la recherche
         if not search_term:
             self.load_students()  # Charger tous les étudiants si pas de terme de recherche
             return
         
-        students = self.db_manager.search_students(search_term)
-        self.populate_table(students)
-        
-        if not students:
-            QMessageBox.information(self, "Recherche", "Aucun étudiant trouvé avec ce terme de recherche.")
+        self.search_term = search_term
+        self.search_keys.clear()
+        self.student_model.start_paged()
+    
+    def on_search_text_changed(self, text):
+        """Relancer la recherche pendant la frappe"""
+        search_term = text.strip()
+        if self.can_narrow_search(search_term):
+            # Le terme prolonge le précédent et tout le résultat est chargé:
+            # filtrer localement au lieu d'interroger de nouveau la base
+            self.search_timer.stop()
+            self.narrow_search(search_term)
+        else:
+            self.search_timer.start()
+    
+    def run_live_search(self):
+        """Lancer la recherche différée si le terme a changé depuis la dernière requête"""
+        if self.ui.lineEdit_7.text().strip() != self.search_term:
+            self.search_students()
+    
+    def can_narrow_search(self, search_term):
+        """Vérifier que le résultat affiché contient forcément tous les résultats du nouveau terme"""
+        return (
+            bool(self.search_term)
+            and search_term != self.search_term
+            and search_term.startswith(self.search_term)
+            # Un terme sans mot (ex: "@") est cherché par sous-chaîne, pas par préfixe de mot
+            and bool(DatabaseManager.search_words(self.search_term))
+            and self.student_model.is_complete()
+        )
+    
+    def narrow_search(self, search_term):
+        """Réduire le résultat affiché au nouveau terme, sans requête"""
+        self.db_worker.cancel("students")
+        self.search_term = search_term
+        words = [f" {word}" for word in DatabaseManager.search_words(search_term)]
+        
+        def matches(student):
+            key = self.search_keys.get(student.studentId)
+            if key is None:
+                key = self.search_keys[student.studentId] = DatabaseManager.search_key(student)
+            return all(word in key for word in words)
+        
+        self.student_model.filter_rows(matches)
     
     def clear_fields(self):
         """Vider tous les champs du formulaire"""
@@ -261,13 +706,17 @@ class MainWindow(QMainWindow):
     
     def delete_student(self):
         """Supprimer un étudiant"""
-        selected_row = self.ui.tableWidget.currentRow()
-        if selected_row == -1:
+        students = self.selected_students()
+        if len(students) > 1:
+            self.delete_selected_students(students)
+            return
+        student = self.selected_student()
+        if student is None:
             QMessageBox.warning(self, "Erreur", "Veuillez sélectionner un étudiant à supprimer!")
             return
         
-        student_id = int(self.ui.tableWidget.item(selected_row, 0).text())
-        student_name = f"{self.ui.tableWidget.item(selected_row, 1).text()} {self.ui.tableWidget.item(selected_row, 2).text()}"
+        student_id = student.studentId
+        student_name = f"{student.firstName} {student.lastName or ''}".strip()
         
         # Demander confirmation
         reply = QMessageBox.question(
@@ -278,13 +727,144 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            success = self.db_manager.delete_student(student_id)
-            if success:
-                QMessageBox.information(self, "Succès", "Étudiant supprimé avec succès!")
-                self.load_students()
+            self.remove_student(student)
+    
+    def delete_selected_students(self, students):
+        """Supprimer tous les étudiants sélectionnés en une transaction"""
+        reply = QMessageBox.question(
+            self,
+            "Confirmation",
+            f"Êtes-vous sûr de vouloir supprimer les {len(students)} étudiants sélectionnés?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        students, pending = self.apply_to_pending_adds(students)
+        if not students:
+            self.on_students_deleted({'deleted': [], 'conflicts': [], 'missing': [], 'error': None}, pending)
+            return
+        versions = {student.studentId: student.version for student in students}
+        self.db_worker.submit(None, self.db_manager.delete_students, list(versions), versions,
+                              on_result=lambda report: self.on_students_deleted(report, pending))
+    
+    def on_students_deleted(self, report, pending=(0, 0)):
+        """Résultat d'une suppression en lot (`pending`: voir apply_to_pending_adds)"""
+        if report['error']:
+            message = f"Aucun étudiant n'a été supprimé: {report['error']}"
+            if pending[0]:
+                message += f"\n(Les {pending[0]} ajouts en attente sélectionnés ont été annulés.)"
+            QMessageBox.warning(self, "Erreur", message)
+            return
+        self.student_model.remove_students(report['deleted'] + report['missing'])
+        self.student_model.update_students(report['conflicts'])
+        message = f"{len(report['deleted']) + pending[0]} étudiants supprimés."
+        if report['conflicts']:
+            message += (f"\n{len(report['conflicts'])} étudiants modifiés entre-temps par un autre utilisateur "
+                        "ont été conservés (leurs lignes ont été rechargées).")
+        if report['missing']:
+            message += (f"\n{len(report['missing'])} étudiants avaient déjà été supprimés par un autre "
+                        "utilisateur.")
+        if pending[1]:
+            message += f"\n{pending[1]} étudiants en cours d'enregistrement n'ont pas été supprimés: réessayez."
+        QMessageBox.information(self, "Succès", message)
+        self.clear_fields()
+        self.load_states()
+    
+    def remove_student(self, student):
+        """Supprimer un étudiant s'il est toujours dans la version affichée"""
+        if student.studentId < 0 and self.write_queue is not None:
+            # Ajout encore en attente: il suffit de le retirer du journal
+            if self.write_queue.cancel(-student.studentId):
+                self.student_model.remove_student(student.studentId)
                 self.clear_fields()
             else:
-                QMessageBox.warning(self, "Erreur", "Erreur lors de la suppression de l'étudiant!")
+                QMessageBox.warning(self, "Erreur", "Cet étudiant est en cours d'enregistrement: "
+                                                    "réessayez dans un instant.")
+            return
+        self.db_worker.submit(None, self.erase_student, student.studentId, student.version,
+                              on_result=lambda result: self.on_student_deleted(student.studentId, result))
+    
+    def erase_student(self, student_id, version):
+        """Suppression exécutée dans le thread de travail: (réussite, None) ou (False, conflit)"""
+        try:
+            return self.db_manager.delete_student(student_id, expected_version=version), None
+        except StudentConflictError as conflict:
+            return False, conflict
+    
+    def on_student_deleted(self, student_id, result):
+        """Résultat de la suppression d'un étudiant"""
+        success, conflict = result
+        if conflict is not None:
+            current = conflict.current
+            self.student_model.update_student(current)
+            reply = QMessageBox.question(
+                self,
+                "Conflit",
+                f"L'étudiant {current.firstName} {current.lastName or ''} a été modifié par un autre utilisateur "
+                "depuis son affichage. Le supprimer quand même?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                self.remove_student(current)
+        elif success:
+            QMessageBox.information(self, "Succès", "Étudiant supprimé avec succès!")
+            # Retirer seulement la ligne supprimée
+            self.student_model.remove_student(student_id)
+            self.clear_fields()
+        else:
+            QMessageBox.warning(self, "Erreur", "Erreur lors de la suppression de l'étudiant!")
+    
+    def export_students(self):
+        """Exporter les étudiants affichés (tous, ou le résultat de la recherche) dans un fichier"""
+        if self.export_cancelled is not None:
+            QMessageBox.information(self, "Export", "Un export est déjà en cours.")
+            return
+        filters = {"CSV (*.csv)": "csv", "Excel (*.xlsx)": "xlsx", "Parquet (*.parquet)": "parquet"}
+        path, selected_filter = QFileDialog.getSaveFileName(self, "Exporter les étudiants", "etudiants.csv",
+                                                            ";;".join(filters))
+        if not path:
+            return
+        file_format = filters.get(selected_filter, "csv")
+        if os.path.splitext(path)[1].lower() != f".{file_format}":
+            path += f".{file_format}"
+        
+        # Les lignes sont lues et écrites par paquets dans le thread de travail;
+        # la fenêtre ne reçoit que la progression
+        self.export_cancelled = threading.Event()
+        dialog = QProgressDialog("Export en cours...", "Annuler", 0, 0, self)
+        dialog.setWindowTitle("Export")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(500)
+        dialog.canceled.connect(self.export_cancelled.set)
+        progress = ExportProgress(self)
+        progress.progressed.connect(lambda written, total: self.show_export_progress(dialog, written, total))
+        
+        self.db_worker.submit(
+            None, student_export.export_students, self.db_manager, path, file_format, self.search_term,
+            progress=progress.progressed.emit, is_cancelled=self.export_cancelled.is_set,
+            on_result=lambda written: self.on_export_finished(dialog, path, written, None),
+            on_error=lambda message: self.on_export_finished(dialog, path, None, message)
+        )
+    
+    def show_export_progress(self, dialog, written, total):
+        """Mettre à jour la fenêtre de progression de l'export"""
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(written, total))
+        dialog.setLabelText(f"{written} étudiants exportés...")
+    
+    def on_export_finished(self, dialog, path, written, error):
+        """Fin de l'export (réussi, annulé ou en erreur)"""
+        cancelled = self.export_cancelled.is_set()
+        self.export_cancelled = None
+        dialog.reset()
+        dialog.deleteLater()
+        if error is None:
+            QMessageBox.information(self, "Export", f"{written} étudiants exportés dans {path}")
+        elif cancelled:
+            QMessageBox.information(self, "Export", "Export annulé.")
+        else:
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de l'export: {error}")
     
     def on_table_selection_changed(self):
         """Gérer les changements de sélection dans le tableau"""
@@ -292,7 +872,19 @@ class MainWindow(QMainWindow):
         # quand une ligne est sélectionnée
         pass
 
+    def closeEvent(self, event):
+        """Fermer les connexions du pool à la fermeture de la fenêtre"""
+        if self.export_cancelled is not None:
+            self.export_cancelled.set()
+        self.db_worker.wait_for_done()
+        if self.write_queue is not None:
+            # Le lot en cours se termine; le reste attend dans le journal le prochain démarrage
+            self.write_queue.stop()
+        self.db_manager.close()
+        super().closeEvent(event)
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(name)s %(levelname)s %(message)s")
     # Création de l'application Qt
     app = QApplication(sys.argv)
     # Création de la fenêtre principale
@@ -18,7 +18,7 @@ from PySide6.QtGui import (QBrush, QColor, QConicalGradient, QCursor,
 from PySide6.QtWidgets import (QApplication, QComboBox, QFrame, QHeaderView,
     QLabel, QLineEdit, QMainWindow, QMenuBar,
     QPushButton, QSizePolicy, QSplitter, QStatusBar,
-    QTableWidget, QTableWidgetItem, QWidget)
+    QTableView, QWidget)
 
 class Ui_Form(object):
     def setupUi(self, Form):
@@ -75,8 +75,8 @@ class Ui_Form(object):
 "  background-color: #fff;\n"
 "}\n"
 " \n"
-"/* Style for border of QTableWidget */\n"
-"QTableWidget {\n"
+"/* Style for border of QTableView */\n"
+"QTableView {\n"
 "  border-radius: 5px;\n"
 "  border: 1px solid #0f0f0f;\n"
 "}\n"
@@ -90,7 +90,7 @@ class Ui_Form(object):
 "}\n"
 " \n"
 "/* Styles for table items */\n"
-"QTableWidget::item {\n"
+"QTableView::item {\n"
 "  border-bottom: 1px solid #0fc6ff;\n"
 "  color: #000;\n"
 "  padding-left: 5px;\n"
@@ -176,34 +176,14 @@ class Ui_Form(object):
         self.result_frame.setGeometry(QRect(20, 330, 731, 181))
         self.result_frame.setFrameShape(QFrame.Shape.StyledPanel)
         self.result_frame.setFrameShadow(QFrame.Shadow.Raised)
-        self.tableWidget = QTableWidget(self.result_frame)
-        if (self.tableWidget.columnCount() < 6):
-            self.tableWidget.setColumnCount(6)
-        __qtablewidgetitem = QTableWidgetItem()
-        __qtablewidgetitem.setTextAlignment(Qt.AlignLeading|Qt.AlignVCenter);
-        self.tableWidget.setHorizontalHeaderItem(0, __qtablewidgetitem)
-        __qtablewidgetitem1 = QTableWidgetItem()
-        __qtablewidgetitem1.setTextAlignment(Qt.AlignLeading|Qt.AlignVCenter);
-        self.tableWidget.setHorizontalHeaderItem(1, __qtablewidgetitem1)
-        __qtablewidgetitem2 = QTableWidgetItem()
-        __qtablewidgetitem2.setTextAlignment(Qt.AlignLeading|Qt.AlignVCenter);
-        self.tableWidget.setHorizontalHeaderItem(2, __qtablewidgetitem2)
-        __qtablewidgetitem3 = QTableWidgetItem()
-        __qtablewidgetitem3.setTextAlignment(Qt.AlignLeading|Qt.AlignVCenter);
-        self.tableWidget.setHorizontalHeaderItem(3, __qtablewidgetitem3)
-        __qtablewidgetitem4 = QTableWidgetItem()
-        __qtablewidgetitem4.setTextAlignment(Qt.AlignLeading|Qt.AlignVCenter);
-        self.tableWidget.setHorizontalHeaderItem(4, __qtablewidgetitem4)
-        __qtablewidgetitem5 = QTableWidgetItem()
-        __qtablewidgetitem5.setTextAlignment(Qt.AlignLeading|Qt.AlignVCenter);
-        self.tableWidget.setHorizontalHeaderItem(5, __qtablewidgetitem5)
-        self.tableWidget.setObjectName(u"tableWidget")
-        self.tableWidget.setGeometry(QRect(30, 40, 691, 111))
-        self.tableWidget.setFocusPolicy(Qt.FocusPolicy.NoFocus)
-        self.tableWidget.setShowGrid(False)
-        self.tableWidget.horizontalHeader().setMinimumSectionSize(50)
-        self.tableWidget.horizontalHeader().setDefaultSectionSize(120)
-        self.tableWidget.verticalHeader().setVisible(False)
+        self.tableView = QTableView(self.result_frame)
+        self.tableView.setObjectName(u"tableView")
+        self.tableView.setGeometry(QRect(30, 40, 691, 111))
+        self.tableView.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.tableView.setShowGrid(False)
+        self.tableView.horizontalHeader().setMinimumSectionSize(50)
+        self.tableView.horizontalHeader().setDefaultSectionSize(120)
+        self.tableView.verticalHeader().setVisible(False)
         self.function_frame = QFrame(self.centralwidget)
         self.function_frame.setObjectName(u"function_frame")
         self.function_frame.setGeometry(QRect(20, 250, 731, 51))
@@ -211,46 +191,53 @@ class Ui_Form(object):
         self.function_frame.setFrameShadow(QFrame.Shadow.Raised)
         self.add_btn = QPushButton(self.function_frame)
         self.add_btn.setObjectName(u"add_btn")
-        self.add_btn.setGeometry(QRect(25, 10, 90, 30))
+        self.add_btn.setGeometry(QRect(15, 10, 90, 30))
         icon = QIcon()
         icon.addFile(u"icons/add.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.add_btn.setIcon(icon)
         self.add_btn.setIconSize(QSize(20, 20))
         self.update_btn = QPushButton(self.function_frame)
         self.update_btn.setObjectName(u"update_btn")
-        self.update_btn.setGeometry(QRect(140, 10, 90, 30))
+        self.update_btn.setGeometry(QRect(115, 10, 90, 30))
         icon1 = QIcon()
         icon1.addFile(u"icons/update.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.update_btn.setIcon(icon1)
         self.update_btn.setIconSize(QSize(20, 20))
         self.select_btn = QPushButton(self.function_frame)
         self.select_btn.setObjectName(u"select_btn")
-        self.select_btn.setGeometry(QRect(255, 10, 90, 30))
+        self.select_btn.setGeometry(QRect(215, 10, 90, 30))
         icon2 = QIcon()
         icon2.addFile(u"icons/select.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.select_btn.setIcon(icon2)
         self.select_btn.setIconSize(QSize(20, 20))
         self.search_btn = QPushButton(self.function_frame)
         self.search_btn.setObjectName(u"search_btn")
-        self.search_btn.setGeometry(QRect(370, 10, 90, 30))
+        self.search_btn.setGeometry(QRect(315, 10, 90, 30))
         icon3 = QIcon()
         icon3.addFile(u"icons/search.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.search_btn.setIcon(icon3)
         self.search_btn.setIconSize(QSize(20, 20))
         self.clear_btn = QPushButton(self.function_frame)
         self.clear_btn.setObjectName(u"clear_btn")
-        self.clear_btn.setGeometry(QRect(485, 10, 90, 30))
+        self.clear_btn.setGeometry(QRect(415, 10, 90, 30))
         icon4 = QIcon()
         icon4.addFile(u"icons/clear.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.clear_btn.setIcon(icon4)
         self.clear_btn.setIconSize(QSize(20, 20))
         self.delete_btn = QPushButton(self.function_frame)
         self.delete_btn.setObjectName(u"delete_btn")
-        self.delete_btn.setGeometry(QRect(600, 10, 90, 30))
+        self.delete_btn.setGeometry(QRect(515, 10, 90, 30))
         icon5 = QIcon()
         icon5.addFile(u"icons/delete.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
         self.delete_btn.setIcon(icon5)
         self.delete_btn.setIconSize(QSize(20, 20))
+        self.export_btn = QPushButton(self.function_frame)
+        self.export_btn.setObjectName(u"export_btn")
+        self.export_btn.setGeometry(QRect(615, 10, 90, 30))
+        icon6 = QIcon()
+        icon6.addFile(u"icons/export.svg", QSize(), QIcon.Mode.Normal, QIcon.State.Off)
+        self.export_btn.setIcon(icon6)
+        self.export_btn.setIconSize(QSize(20, 20))
         self.frame_4 = QFrame(self.centralwidget)
         self.frame_4.setObjectName(u"frame_4")
         self.frame_4.setGeometry(QRect(20, 20, 731, 71))
@@ -286,24 +273,13 @@ class Ui_Form(object):
         self.label_4.setText(QCoreApplication.translate("Form", u"State", None))
         self.label_5.setText(QCoreApplication.translate("Form", u"City", None))
         self.label_6.setText(QCoreApplication.translate("Form", u"Email Adress", None))
-        ___qtablewidgetitem = self.tableWidget.horizontalHeaderItem(0)
-        ___qtablewidgetitem.setText(QCoreApplication.translate("Form", u"Student ID", None));
-        ___qtablewidgetitem1 = self.tableWidget.horizontalHeaderItem(1)
-        ___qtablewidgetitem1.setText(QCoreApplication.translate("Form", u"First Name", None));
-        ___qtablewidgetitem2 = self.tableWidget.horizontalHeaderItem(2)
-        ___qtablewidgetitem2.setText(QCoreApplication.translate("Form", u"Last Name", None));
-        ___qtablewidgetitem3 = self.tableWidget.horizontalHeaderItem(3)
-        ___qtablewidgetitem3.setText(QCoreApplication.translate("Form", u"City", None));
-        ___qtablewidgetitem4 = self.tableWidget.horizontalHeaderItem(4)
-        ___qtablewidgetitem4.setText(QCoreApplication.translate("Form", u"State", None));
-        ___qtablewidgetitem5 = self.tableWidget.horizontalHeaderItem(5)
-        ___qtablewidgetitem5.setText(QCoreApplication.translate("Form", u"Email Adress", None));
         self.add_btn.setText(QCoreApplication.translate("Form", u"Add", None))
         self.update_btn.setText(QCoreApplication.translate("Form", u"Update", None))
         self.select_btn.setText(QCoreApplication.translate("Form", u"Select", None))
         self.search_btn.setText(QCoreApplication.translate("Form", u"Search", None))
         self.clear_btn.setText(QCoreApplication.translate("Form", u"Clear", None))
         self.delete_btn.setText(QCoreApplication.translate("Form", u"Delete", None))
+        self.export_btn.setText(QCoreApplication.translate("Form", u"Export", None))
         self.title_label.setText(QCoreApplication.translate("Form", u"Students Information System", None))
     # retranslateUi
 
@@ -0,0 +1,350 @@
+"""
+Versioned, non-destructive schema migrations for the students database.
+
+The schema_version table records the last applied migration. At startup
+DatabaseManager reads it with a single query and only does more work when
+the code knows migrations the database has not seen yet. Each step checks
+what already exists, so it can run against databases created by older
+versions of the application (which built the table with all its indexes).
+
+MIGRATIONS targets MySQL and SQLITE_MIGRATIONS the embedded SQLite backend.
+"""
+import sqlite3
+from typing import Callable, List, Tuple
+
+TABLE = "students_info"
+# MySQL error raised when schema_version does not exist yet
+ER_NO_SUCH_TABLE = 1146
+# Named lock so that clients started at the same time do not migrate twice
+MIGRATION_LOCK = "db_students_schema_migration"
+
+
+def _index_exists(cursor, index_name: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (TABLE, index_name))
+    return cursor.fetchone() is not None
+
+
+def _add_index(index_name: str, definition: str, lock: str = "NONE") -> Callable:
+    """
+    Build a step adding an index online (ALGORITHM=INPLACE) unless it already exists
+    """
+    def step(cursor):
+        if not _index_exists(cursor, index_name):
+            cursor.execute(f"ALTER TABLE {TABLE} ADD {definition}, ALGORITHM=INPLACE, LOCK={lock}")
+    return step
+
+
+def _create_students_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            studentId INT NOT NULL AUTO_INCREMENT,
+            firstName VARCHAR(45) NOT NULL,
+            lastName VARCHAR(45),
+            state VARCHAR(45),
+            city VARCHAR(45),
+            emailAddress VARCHAR(45),
+            PRIMARY KEY (studentId),
+            UNIQUE INDEX studentId_UNIQUE (studentId ASC) VISIBLE
+        )
+    """)
+
+
+def _column_exists(cursor, column_name: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    """, (TABLE, column_name))
+    return cursor.fetchone() is not None
+
+
+def _add_column(column_name: str, definition: str) -> Callable:
+    """
+    Build a step adding a column without copying the table (ALGORITHM=INSTANT) unless it already exists
+    """
+    def step(cursor):
+        if not _column_exists(cursor, column_name):
+            cursor.execute(f"ALTER TABLE {TABLE} ADD COLUMN {column_name} {definition}, ALGORITHM=INSTANT")
+    return step
+
+
+def _set_column_default(column_name: str, definition: str, default: str) -> Callable:
+    """
+    Build a step changing the default of a column (metadata only: existing rows keep their value)
+    """
+    def step(cursor):
+        cursor.execute(f"ALTER TABLE {TABLE} MODIFY COLUMN {column_name} {definition} DEFAULT {default}")
+    return step
+
+
+def _trigger_exists(cursor, trigger_name: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM information_schema.triggers
+        WHERE trigger_schema = DATABASE() AND trigger_name = %s
+        LIMIT 1
+    """, (trigger_name,))
+    return cursor.fetchone() is not None
+
+
+def _add_trigger(trigger_name: str, event: str, row: str) -> Callable:
+    """
+    Build a step logging `event` (INSERT/UPDATE/DELETE) on students_info into student_changes
+    """
+    def step(cursor):
+        if not _trigger_exists(cursor, trigger_name):
+            cursor.execute(f"""
+                CREATE TRIGGER {trigger_name} AFTER {event} ON {TABLE} FOR EACH ROW
+                INSERT INTO student_changes (studentId) VALUES ({row}.studentId)
+            """)
+    return step
+
+
+def _create_change_log(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_changes (
+            changeId BIGINT NOT NULL AUTO_INCREMENT,
+            studentId INT NOT NULL,
+            PRIMARY KEY (changeId)
+        )
+    """)
+
+
+def _disable_fulltext_stopwords(cursor):
+    # Without this, words such as "de", "la" or "com" would not be indexed
+    cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+
+
+# (version, description, steps); never edit a released migration, append a new one.
+# MIGRATIONS (MySQL) and SQLITE_MIGRATIONS must keep the same version numbers.
+MIGRATIONS: List[Tuple[int, str, List[Callable]]] = [
+    (1, "Table students_info", [_create_students_table]),
+    (2, "Email unique", [
+        # Fails if the table already holds duplicate emails: clean them up and restart
+        _add_index("emailAddress_UNIQUE", "UNIQUE INDEX emailAddress_UNIQUE (emailAddress ASC)"),
+    ]),
+    (3, "Index (province, ville)", [
+        _add_index("state_city_idx", "INDEX state_city_idx (state ASC, city ASC)"),
+    ]),
+    (4, "Index sur les noms", [
+        _add_index("name_idx", "INDEX name_idx (lastName ASC, firstName ASC)"),
+    ]),
+    (5, "Index FULLTEXT de recherche", [
+        _disable_fulltext_stopwords,
+        # InnoDB adds one FULLTEXT index per online ALTER; writes wait while the first one is built
+        _add_index("students_fulltext",
+                   "FULLTEXT INDEX students_fulltext (firstName, lastName, city, state, emailAddress)",
+                   lock="SHARED"),
+        _add_index("firstName_fulltext", "FULLTEXT INDEX firstName_fulltext (firstName)", lock="SHARED"),
+        _add_index("lastName_fulltext", "FULLTEXT INDEX lastName_fulltext (lastName)", lock="SHARED"),
+        _add_index("city_fulltext", "FULLTEXT INDEX city_fulltext (city)", lock="SHARED"),
+        _add_index("state_fulltext", "FULLTEXT INDEX state_fulltext (state)", lock="SHARED"),
+        _add_index("emailAddress_fulltext", "FULLTEXT INDEX emailAddress_fulltext (emailAddress)",
+                   lock="SHARED"),
+    ]),
+    (6, "Journal des modifications (student_changes)", [
+        # Clients keeping a local copy of the table only re-read the students listed here
+        _create_change_log,
+        _add_trigger("students_info_logged_insert", "INSERT", "NEW"),
+        _add_trigger("students_info_logged_update", "UPDATE", "NEW"),
+        _add_trigger("students_info_logged_delete", "DELETE", "OLD"),
+    ]),
+    (7, "Version des lignes (verrouillage optimiste)", [
+        # Incremented by every update: an update only applies to the version the user edited
+        _add_column("version", "INT UNSIGNED NOT NULL DEFAULT 1"),
+    ]),
+    (8, "Date d'inscription (createdAt)", [
+        # Students already in the table keep NULL (unknown date) instead of the migration date
+        _add_column("createdAt", "DATETIME NULL"),
+        _set_column_default("createdAt", "DATETIME NULL", "CURRENT_TIMESTAMP"),
+        _add_index("createdAt_idx", "INDEX createdAt_idx (createdAt ASC)"),
+    ]),
+]
+
+
+def _sqlite_statements(*statements: str) -> Callable:
+    def step(cursor):
+        for statement in statements:
+            cursor.execute(statement)
+    return step
+
+
+def _sqlite_add_column(column_name: str, definition: str) -> Callable:
+    def step(cursor):
+        cursor.execute(f"SELECT 1 FROM pragma_table_info('{TABLE}') WHERE name = %s", (column_name,))
+        if cursor.fetchone() is None:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD COLUMN {column_name} {definition}")
+    return step
+
+
+_SQLITE_FTS_COLUMNS = "firstName, lastName, city, state, emailAddress"
+
+SQLITE_MIGRATIONS: List[Tuple[int, str, List[Callable]]] = [
+    (1, "Table students_info", [_sqlite_statements(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            studentId INTEGER PRIMARY KEY AUTOINCREMENT,
+            firstName VARCHAR(45) NOT NULL,
+            lastName VARCHAR(45),
+            state VARCHAR(45),
+            city VARCHAR(45),
+            emailAddress VARCHAR(45)
+        )
+    """)]),
+    (2, "Email unique", [_sqlite_statements(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS emailAddress_UNIQUE ON {TABLE} (emailAddress)")]),
+    (3, "Index (province, ville)", [_sqlite_statements(
+        f"CREATE INDEX IF NOT EXISTS state_city_idx ON {TABLE} (state, city)")]),
+    (4, "Index sur les noms", [_sqlite_statements(
+        f"CREATE INDEX IF NOT EXISTS name_idx ON {TABLE} (lastName, firstName)")]),
+    (5, "Index FULLTEXT de recherche", [_sqlite_statements(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            {_SQLITE_FTS_COLUMNS},
+            content = '{TABLE}', content_rowid = 'studentId',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """, f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON {TABLE} BEGIN
+            INSERT INTO students_fts (rowid, {_SQLITE_FTS_COLUMNS})
+            VALUES (new.studentId, new.firstName, new.lastName, new.city, new.state, new.emailAddress);
+        END
+    """, f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON {TABLE} BEGIN
+            INSERT INTO students_fts (students_fts, rowid, {_SQLITE_FTS_COLUMNS})
+            VALUES ('delete', old.studentId, old.firstName, old.lastName, old.city, old.state, old.emailAddress);
+        END
+    """, f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE ON {TABLE} BEGIN
+            INSERT INTO students_fts (students_fts, rowid, {_SQLITE_FTS_COLUMNS})
+            VALUES ('delete', old.studentId, old.firstName, old.lastName, old.city, old.state, old.emailAddress);
+            INSERT INTO students_fts (rowid, {_SQLITE_FTS_COLUMNS})
+            VALUES (new.studentId, new.firstName, new.lastName, new.city, new.state, new.emailAddress);
+        END
+    """, "INSERT INTO students_fts (students_fts) VALUES ('rebuild')")]),
+    (6, "Journal des modifications (student_changes)", [_sqlite_statements("""
+        CREATE TABLE IF NOT EXISTS student_changes (
+            changeId INTEGER PRIMARY KEY AUTOINCREMENT,
+            studentId INTEGER NOT NULL
+        )
+    """, *(f"""
+        CREATE TRIGGER IF NOT EXISTS students_info_logged_{event.lower()} AFTER {event} ON {TABLE} BEGIN
+            INSERT INTO student_changes (studentId) VALUES ({row}.studentId);
+        END
+    """ for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old"))))]),
+    (7, "Version des lignes (verrouillage optimiste)", [
+        _sqlite_add_column("version", "INTEGER NOT NULL DEFAULT 1"),
+    ]),
+    (8, "Date d'inscription (createdAt)", [
+        # SQLite cannot add a column defaulting to CURRENT_TIMESTAMP: the INSERTs set it
+        _sqlite_add_column("createdAt", "TEXT"),
+        _sqlite_statements(f"CREATE INDEX IF NOT EXISTS createdAt_idx ON {TABLE} (createdAt)"),
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+assert SQLITE_MIGRATIONS[-1][0] == LATEST_VERSION
+
+
+def get_schema_version(cursor) -> int:
+    """
+    Read the version of the database schema (0 for a database never migrated)
+    """
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        return 0
+    except Exception as e:
+        if getattr(e, "errno", None) != ER_NO_SUCH_TABLE:
+            raise
+        return 0
+    return cursor.fetchone()[0] or 0
+
+
+def _create_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT NOT NULL,
+            description VARCHAR(100) NOT NULL,
+            appliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (version)
+        )
+    """)
+
+
+def _apply(cursor, migration_list, version: int) -> int:
+    for migration_version, description, steps in migration_list:
+        if migration_version <= version:
+            continue
+        for step in steps:
+            step(cursor)
+        cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                       (migration_version, description))
+        version = migration_version
+        print(f"Migration {migration_version} appliquée: {description}")
+    return version
+
+
+def migrate(conn) -> int:
+    """
+    Bring the schema up to LATEST_VERSION
+
+    Args:
+        conn: Open connection (autocommit) to the students database
+
+    Returns:
+        The schema version after migration
+    """
+    cursor = conn.cursor()
+    try:
+        version = get_schema_version(cursor)
+        if version >= LATEST_VERSION:
+            return version
+
+        cursor.execute("SELECT GET_LOCK(%s, 60)", (MIGRATION_LOCK,))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("Impossible d'obtenir le verrou de migration du schéma")
+        try:
+            _create_version_table(cursor)
+            # Another client may have migrated while we waited for the lock
+            version = _apply(cursor, MIGRATIONS, get_schema_version(cursor))
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+        return version
+    finally:
+        cursor.close()
+
+
+def migrate_sqlite(conn) -> int:
+    """
+    Bring an SQLite database up to LATEST_VERSION
+
+    SQLite DDL is transactional: the whole upgrade runs in one write
+    transaction (BEGIN IMMEDIATE), which also keeps other connections out.
+
+    Args:
+        conn: Open SQLite connection from SQLiteBackend
+
+    Returns:
+        The schema version after migration
+    """
+    cursor = conn.cursor()
+    try:
+        version = get_schema_version(cursor)
+        if version >= LATEST_VERSION:
+            return version
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _create_version_table(cursor)
+            version = _apply(cursor, SQLITE_MIGRATIONS, get_schema_version(cursor))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return version
+    finally:
+        cursor.close()
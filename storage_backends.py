@@ -0,0 +1,297 @@
+"""
+Storage backends used by DatabaseManager.
+
+A backend opens connections that all expose the small mysql-connector style
+API DatabaseManager relies on (cursor(), commit(), rollback(),
+start_transaction(), %s placeholders...) and supplies the few dialect
+specific pieces: migrations, full-text search and upsert syntax.
+
+- MySQLBackend: the shared MySQL server (mysql-connector).
+- SQLiteBackend: embedded database file, no network (local mode, tests).
+"""
+import os
+import sqlite3
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+import migrations
+from student_record import select_list
+
+
+def fold_text(text: str) -> str:
+    """
+    Fold case and accents the way the server collation compares them ("Québec" -> "quebec")
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class StorageBackend:
+    """
+    Interface of a storage backend
+    """
+    name = "abstract"
+    # Exception classes raised by the backend's connections
+    Error: Any = Exception
+    IntegrityError: Any = Exception
+    # Prefix turning a statement into its execution plan (slow query log), None if unsupported
+    explain_prefix: Optional[str] = None
+    # Appended to a SELECT to keep the rows it reads unchanged until the end of the write transaction
+    lock_rows_clause = ""
+    # Appended to a text column in ORDER BY and keyset comparisons to ignore case (and accents when possible)
+    sort_collation = ""
+    # Callable opening a server-side prepared statement cursor on a connection, None if the
+    # driver caches statements itself (the pool then keeps one per query text, see ConnectionPool.statement)
+    prepared_cursor: Optional[Callable[[Any], Any]] = None
+
+    def connect(self):
+        """
+        Open a new raw connection (autocommit mode)
+        """
+        raise NotImplementedError
+
+    def ping(self, conn):
+        """
+        Raise an exception if `conn` is no longer usable
+        """
+        raise NotImplementedError
+
+    def migrate(self, conn) -> int:
+        """
+        Apply the pending schema migrations and return the schema version
+        """
+        raise NotImplementedError
+
+    def fulltext_condition(self, words: List[str], columns: Tuple[str, ...]) -> Tuple[str, tuple]:
+        """
+        WHERE condition requiring every word to prefix a word of `columns`
+        """
+        raise NotImplementedError
+
+    def ranked_search_query(self, words: List[str], columns: Tuple[str, ...],
+                            selected: Tuple[str, ...]) -> Tuple[str, tuple]:
+        """
+        SELECT of the `selected` columns of the students matching fulltext_condition,
+        best match first (then by studentId)
+        """
+        raise NotImplementedError
+
+    def upsert_on_email_clause(self) -> str:
+        """
+        Clause appended to an INSERT so that a duplicate email updates the existing student
+        """
+        raise NotImplementedError
+
+    def start_write_transaction(self, conn):
+        """
+        Begin a transaction that reads rows (with lock_rows_clause) and then writes them
+        """
+        conn.start_transaction()
+
+    def unique_key(self, value: str) -> str:
+        """
+        Key under which the unique indexes compare text values (duplicate checks before a write)
+        """
+        return value  # binary comparison
+
+
+class MySQLBackend(StorageBackend):
+    """
+    MySQL server accessed through mysql-connector
+    """
+    name = "mysql"
+    explain_prefix = "EXPLAIN"
+    lock_rows_clause = " FOR UPDATE"
+
+    def __init__(self, host: str = "localhost", user: str = "root", password: str = "root",
+                 database: str = "db_students"):
+        import mysql.connector
+        self._mysql = mysql.connector
+        self.Error = mysql.connector.Error
+        self.IntegrityError = mysql.connector.IntegrityError
+        self.host = host
+        self.user = user
+        self.password = password
+        self.database = database
+
+    def connect(self):
+        # autocommit: a pooled connection must not keep a read snapshot open between checkouts
+        return self._mysql.connect(
+            host=self.host,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            autocommit=True,
+            use_pure=not self._mysql.HAVE_CEXT  # C extension when installed
+        )
+
+    def ping(self, conn):
+        conn.ping(reconnect=False)
+
+    def prepared_cursor(self, conn):
+        # Binary protocol: parameters and rows are sent unconverted, without quoting
+        return conn.cursor(prepared=True)
+
+    def migrate(self, conn) -> int:
+        return migrations.migrate(conn)
+
+    def _boolean_query(self, words: List[str]) -> str:
+        # '+marie* +trem*': every word required, as a prefix
+        return " ".join(f"+{word}*" for word in words)
+
+    def fulltext_condition(self, words, columns):
+        return f"MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)", (self._boolean_query(words),)
+
+    def ranked_search_query(self, words, columns, selected):
+        condition, params = self.fulltext_condition(words, columns)
+        return (f"SELECT {select_list(selected)} FROM students_info "
+                f"WHERE {condition} ORDER BY {condition} DESC, studentId", params * 2)
+
+    def unique_key(self, value):
+        # The default collation (utf8mb4_0900_ai_ci) ignores case and accents
+        return fold_text(value)
+
+    def upsert_on_email_clause(self) -> str:
+        return """
+            ON DUPLICATE KEY UPDATE firstName = VALUES(firstName), lastName = VALUES(lastName),
+                                    city = VALUES(city), state = VALUES(state), version = version + 1
+        """
+
+
+class _SQLiteCursor(sqlite3.Cursor):
+    """
+    sqlite3 cursor accepting the %s placeholders used by DatabaseManager
+    """
+
+    def execute(self, query, params=()):
+        return super().execute(self.connection.translate(query), params)
+
+    def executemany(self, query, seq_of_params):
+        return super().executemany(self.connection.translate(query), seq_of_params)
+
+
+class _SQLiteConnection(sqlite3.Connection):
+    """
+    sqlite3 connection exposing the mysql-connector methods DatabaseManager calls
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._translated = {}
+
+    def translate(self, query: str) -> str:
+        # Queries are few and constant: translate each one once
+        translated = self._translated.get(query)
+        if translated is None:
+            translated = self._translated[query] = query.replace("%s", "?")
+        return translated
+
+    def cursor(self, buffered: Optional[bool] = None, prepared: Optional[bool] = None):
+        # sqlite3 steps rows lazily and prepares every statement (cached_statements)
+        return super().cursor(_SQLiteCursor)
+
+    def start_transaction(self):
+        self.execute("BEGIN")
+
+    def is_connected(self) -> bool:
+        return True
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded SQLite database file (WAL mode), for local offices and tests
+    """
+    name = "sqlite"
+    explain_prefix = "EXPLAIN QUERY PLAN"
+    # Registered on every connection (NOCASE only folds ASCII letters): same order as the
+    # MySQL collation and the table model's collation keys, "Émond" between "Dubé" and "Fortin"
+    sort_collation = " COLLATE FOLDED"
+    Error = sqlite3.Error
+    IntegrityError = sqlite3.IntegrityError
+
+    def __init__(self, path: str = "db_students.sqlite3", busy_timeout: float = 5.0,
+                 cache_size_kib: int = 65536, statement_cache_size: int = 256):
+        """
+        Args:
+            path: Database file (":memory:" is not shared between pooled connections)
+            busy_timeout: Seconds a writer waits for the write lock held by another connection
+            cache_size_kib: Page cache size per connection, in KiB
+            statement_cache_size: Number of prepared statements kept per connection by sqlite3
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cache_size_kib = cache_size_kib
+        self.statement_cache_size = statement_cache_size
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout,
+            isolation_level=None,  # autocommit, like the MySQL connections
+            check_same_thread=False,  # pooled connections move between worker threads
+            cached_statements=self.statement_cache_size,
+            factory=_SQLiteConnection
+        )
+        conn.execute("PRAGMA journal_mode = WAL")  # readers never block the writer
+        conn.execute("PRAGMA synchronous = NORMAL")  # durable in WAL mode, far fewer fsyncs
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kib}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.create_collation("FOLDED", _compare_folded)
+        return conn
+
+    def ping(self, conn):
+        conn.execute("SELECT 1")
+
+    def migrate(self, conn) -> int:
+        return migrations.migrate_sqlite(conn)
+
+    def fulltext_condition(self, words, columns):
+        return ("studentId IN (SELECT rowid FROM students_fts WHERE students_fts MATCH %s)",
+                (self._match_query(words, columns),))
+
+    def ranked_search_query(self, words, columns, selected):
+        # One FTS5 scan gives both the matches and their bm25 rank (lower is better);
+        # a rank subquery per row would rerun the MATCH for every student found
+        return (f"SELECT {select_list(selected, 'students_info')} FROM students_fts "
+                "JOIN students_info ON students_info.studentId = students_fts.rowid "
+                "WHERE students_fts MATCH %s ORDER BY students_fts.rank, students_info.studentId",
+                (self._match_query(words, columns),))
+
+    def _match_query(self, words: List[str], columns: Tuple[str, ...]) -> str:
+        # '{city} : ("mont"* "que"*)': every word required, as a prefix, in the given columns
+        phrases = " ".join(f'"{word}"*' for word in words)
+        return f"{{{' '.join(columns)}}} : ({phrases})"
+
+    def upsert_on_email_clause(self) -> str:
+        return """
+            ON CONFLICT (emailAddress) DO UPDATE SET firstName = excluded.firstName,
+                lastName = excluded.lastName, city = excluded.city, state = excluded.state,
+                version = version + 1
+        """
+
+    def start_write_transaction(self, conn):
+        # Take the write lock now: no other connection can commit between our reads and writes
+        conn.execute("BEGIN IMMEDIATE")
+
+
+# SQLite calls the collation for every comparison of a sort: fold each distinct value once
+_folded = lru_cache(maxsize=65536)(fold_text)
+
+
+def _compare_folded(left: str, right: str) -> int:
+    left, right = _folded(left), _folded(right)
+    return (left > right) - (left < right)
+
+
+def backend_from_environment() -> StorageBackend:
+    """
+    Build the backend selected by the STUDENTS_DB_BACKEND environment variable
+
+    STUDENTS_DB_BACKEND=sqlite uses the file named by STUDENTS_DB_PATH
+    (db_students.sqlite3 by default); anything else uses the MySQL server.
+    """
+    if os.environ.get("STUDENTS_DB_BACKEND", "mysql").lower() == "sqlite":
+        return SQLiteBackend(os.environ.get("STUDENTS_DB_PATH", "db_students.sqlite3"))
+    return MySQLBackend()
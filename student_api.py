@@ -0,0 +1,419 @@
+"""
+REST/JSON service exposing DatabaseManager to other tools (registrar portal,
+batch jobs) so they share one connection pool instead of each opening its own.
+
+The service is asynchronous (aiohttp). DatabaseManager calls are blocking, so
+they run in a thread pool the size of the connection pool. GET responses carry
+an ETag naming the position of the change log (plus the student's version for
+/students/{id}); it is checked before the data is read, so a client sending it
+back in If-None-Match gets an empty 304 for the cost of one small query when
+no student changed. JSON bodies of 1 KiB or more are compressed when the
+client accepts it (gzip/deflate).
+
+Students carry a "version", incremented by each update. A PUT or DELETE
+giving the version it was based on fails with 409 and the current student
+when someone else changed it in between (optimistic concurrency).
+
+`fields` (e.g. fields=studentId,firstName,lastName for a picker) limits the
+keys of the returned students; only these columns are read from the database.
+
+    GET    /students?after=&limit=&q=&field=   page of students ordered by ID (keyset)
+    GET    /students/search?q=&field=&limit=&fields=   search, best match first
+    GET    /students/{id}?fields=
+    POST   /students                           JSON body: firstName, lastName, city, state, emailAddress
+    PUT    /students/{id}                      same body, plus "version" to only apply to that version
+    DELETE /students/{id}?version=
+    GET    /states
+    GET    /states/{state}/cities
+    GET    /reports/enrolments                 counts by province, city, email domain and month
+    GET    /stats                              pool, cache and per-operation timings
+
+aiohttp is required (pip install aiohttp). Without a MySQL server, --sqlite
+serves a local SQLite file, which --seed fills with synthetic students:
+
+    python student_api.py --port 8080
+    python student_api.py --sqlite /tmp/etudiants.sqlite3 --seed 100000
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from connect_database import StudentConflictError, StudentNotFoundError
+from student_export import COLUMNS
+from student_record import Student
+from student_reports import StudentReports
+from student_validation import FIELDS, check_student
+
+# Keys of a student JSON object, in the order of the student tuple
+JSON_FIELDS = COLUMNS + ("version",)
+# Request fields, in the argument order of DatabaseManager.add_student
+INPUT_FIELDS = ("firstName", "lastName", "city", "state", "emailAddress")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_SEARCH_LIMIT = 50
+# Smaller bodies are sent as is: compressing them saves less than it costs
+COMPRESS_MIN_BYTES = 1024
+
+if web is not None:
+    DB = web.AppKey("db", object)
+    EXECUTOR = web.AppKey("executor", ThreadPoolExecutor)
+    REPORTS = web.AppKey("reports", StudentReports)
+
+
+def student_to_json(student: Tuple, fields: Tuple[str, ...] = JSON_FIELDS) -> Dict[str, Any]:
+    """
+    Convert a student row to its JSON object (keys: `fields`, the columns the row holds)
+    """
+    return dict(zip(fields, student))
+
+
+def _error(status: int, message: str, **details) -> "web.Response":
+    body = json.dumps(dict(error=message, **details), ensure_ascii=False).encode()
+    return web.Response(status=status, body=body, content_type="application/json", charset="utf-8")
+
+
+def _etag_headers(etag: Optional[str]) -> Dict[str, str]:
+    if etag is None:
+        return {}
+    # Weak: the same data may be sent compressed or not
+    return {"ETag": f'W/"{etag}"', "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+
+def _json_response(payload: Any, status: int = 200,
+                   headers: Optional[Dict[str, str]] = None, etag: Optional[str] = None) -> "web.Response":
+    """
+    Build a JSON response, compressed when it is large enough, with `etag` if given
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    headers = dict(headers or {}, **_etag_headers(etag))
+    response = web.Response(status=status, body=body, content_type="application/json", charset="utf-8",
+                            headers=headers)
+    if len(body) >= COMPRESS_MIN_BYTES:
+        response.enable_compression()
+    return response
+
+
+def _client_etags(request: "web.Request") -> Tuple[str, ...]:
+    return tuple(candidate.value for candidate in request.if_none_match or ())
+
+
+async def _change_position(request: "web.Request") -> Optional[str]:
+    """
+    Position of the change log as of now, or None if it cannot be read
+    """
+    position = await _call(request, request.app[DB].get_change_position)
+    return None if position is None else "%d.%d" % position
+
+
+async def _change_etag(request: "web.Request") -> Tuple[Optional[str], Optional["web.Response"]]:
+    """
+    ETag of the data as of now (change log position), read before the data itself
+
+    Returns:
+        (etag or None if the log cannot be read, 304 response if the client already has it or None)
+    """
+    etag = await _change_position(request)
+    if etag is not None and any(value in (etag, "*") for value in _client_etags(request)):
+        return etag, web.Response(status=304, headers=_etag_headers(etag))
+    return etag, None
+
+
+async def _call(request: "web.Request", function: Callable, *args):
+    """
+    Run a blocking DatabaseManager method in the service's thread pool
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app[EXECUTOR], functools.partial(function, *args))
+
+
+def _int_parameter(request: "web.Request", name: str, default: Optional[int],
+                   maximum: Optional[int] = None) -> Optional[int]:
+    """
+    Read an integer query parameter
+
+    Raises:
+        ValueError: If the value is not a positive integer
+    """
+    value = request.query.get(name)
+    if value is None or value == "":
+        return default
+    if not value.isdigit():
+        raise ValueError(f"Le paramètre '{name}' doit être un entier positif")
+    value = int(value)
+    return min(value, maximum) if maximum is not None else value
+
+
+def _fields(request: "web.Request") -> Tuple[str, ...]:
+    """
+    Read the `fields` query parameter (comma-separated keys of JSON_FIELDS, all of them by default)
+
+    Raises:
+        ValueError: If a field is unknown
+    """
+    value = request.query.get("fields", "")
+    if not value:
+        return JSON_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in JSON_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Champs inconnus: {', '.join(unknown) or value}")
+    return fields
+
+
+def _search_field(request: "web.Request") -> str:
+    field = request.query.get("field", "all")
+    if field != "all" and field not in request.app[DB].SEARCH_FIELDS:
+        raise ValueError(f"Champ de recherche inconnu: '{field}'")
+    return field
+
+
+async def _student_input(request: "web.Request"
+                         ) -> Tuple[Optional[Tuple[str, ...]], Optional[int], Optional["web.Response"]]:
+    """
+    Read and validate the student in a request body
+
+    Returns:
+        (fields in add_student order, version or None, None), or (None, None, error response)
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        return None, None, _error(400, "Le corps de la requête doit être un objet JSON")
+    if not isinstance(payload, dict):
+        return None, None, _error(400, "Le corps de la requête doit être un objet JSON")
+    version = payload.get("version")
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        return None, None, _error(400, "Le champ 'version' doit être un entier")
+    values = tuple(str(payload.get(field) or "").strip() for field in INPUT_FIELDS)
+    error = check_student(*values)
+    if error is not None:
+        return None, None, _error(422, error.message, code=error.code,
+                                  field=INPUT_FIELDS[FIELDS.index(error.field)])
+    return values, version, None
+
+
+async def list_students(request: "web.Request") -> "web.Response":
+    try:
+        after_id = _int_parameter(request, "after", None)
+        limit = _int_parameter(request, "limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+        search_field = _search_field(request)
+    except ValueError as e:
+        return _error(400, str(e))
+    etag, not_modified = await _change_etag(request)
+    if not_modified is not None:
+        return not_modified
+    search_term = request.query.get("q", "")
+    db = request.app[DB]
+    students, next_token = await _call(request, db.get_students_page, after_id, limit, search_term, search_field)
+    headers = {}
+    if next_token is not None:
+        query = dict(request.query, after=str(next_token))
+        headers["Link"] = f'<{request.path}?{urlencode(query)}>; rel="next"'
+    return _json_response({"students": [student_to_json(student) for student in students],
+                                    "next": next_token}, headers=headers, etag=etag)
+
+
+async def search_students(request: "web.Request") -> "web.Response":
+    try:
+        limit = _int_parameter(request, "limit", DEFAULT_SEARCH_LIMIT, MAX_PAGE_SIZE) or DEFAULT_SEARCH_LIMIT
+        search_field = _search_field(request)
+        fields = _fields(request)
+    except ValueError as e:
+        return _error(400, str(e))
+    etag, not_modified = await _change_etag(request)
+    if not_modified is not None:
+        return not_modified
+    db = request.app[DB]
+    students = await _call(request, db.search_students, request.query.get("q", ""), search_field, limit, fields)
+    return _json_response({"students": [student_to_json(student, fields) for student in students]},
+                          etag=etag)
+
+
+async def get_student(request: "web.Request") -> "web.Response":
+    student_id = int(request.match_info["student_id"])
+    try:
+        fields = _fields(request)
+    except ValueError as e:
+        return _error(400, str(e))
+    # ETag "<log position>-<version>": an unchanged position answers before the read,
+    # an unchanged version after it (other students changed, not this one)
+    position = await _change_position(request)
+    client_etags = _client_etags(request)
+    if position is not None:
+        for value in client_etags:
+            if value.rpartition("-")[0] == position:
+                return web.Response(status=304, headers=_etag_headers(value))
+    columns = fields if "version" in fields else fields + ("version",)
+    student = await _call(request, request.app[DB].get_student_by_id, student_id, columns)
+    if student is None:
+        return _error(404, f"Aucun étudiant trouvé avec l'ID {student_id}")
+    version = student[columns.index("version")]
+    etag = None if position is None else f"{position}-{version}"
+    if etag is not None and any(value == "*" or value.rpartition("-")[1:] == ("-", str(version))
+                                for value in client_etags):
+        return web.Response(status=304, headers=_etag_headers(etag))
+    return _json_response(student_to_json(student[:len(fields)], fields), etag=etag)
+
+
+def _conflict(error: StudentConflictError) -> "web.Response":
+    return _error(409, str(error), current=student_to_json(error.current))
+
+
+async def create_student(request: "web.Request") -> "web.Response":
+    values, _, error = await _student_input(request)
+    if error is not None:
+        return error
+    db = request.app[DB]
+    student_id = await _call(request, db.add_student, *values)
+    if student_id is None:
+        return _error(409, "L'étudiant n'a pas été ajouté (email déjà présent ou base indisponible)")
+    first_name, last_name, city, state, email = values
+    return _json_response(student_to_json(Student(student_id, first_name, last_name, state, city, email)),
+                          status=201, headers={"Location": f"/students/{student_id}"})
+
+
+async def update_student(request: "web.Request") -> "web.Response":
+    student_id = int(request.match_info["student_id"])
+    values, version, error = await _student_input(request)
+    if error is not None:
+        return error
+    try:
+        student = await _call(request, request.app[DB].update_student, student_id, *values, version)
+    except StudentNotFoundError as e:
+        return _error(404, str(e))
+    except StudentConflictError as e:
+        return _conflict(e)
+    if student is None:
+        return _error(409, "L'étudiant n'a pas été modifié (email déjà présent ou base indisponible)")
+    return _json_response(student_to_json(student))
+
+
+async def delete_student(request: "web.Request") -> "web.Response":
+    student_id = int(request.match_info["student_id"])
+    try:
+        version = _int_parameter(request, "version", None)
+    except ValueError as e:
+        return _error(400, str(e))
+    try:
+        deleted = await _call(request, request.app[DB].delete_student, student_id, version)
+    except StudentConflictError as e:
+        return _conflict(e)
+    if not deleted:
+        return _error(404, f"Aucun étudiant trouvé avec l'ID {student_id}")
+    return web.Response(status=204)
+
+
+async def list_states(request: "web.Request") -> "web.Response":
+    etag, not_modified = await _change_etag(request)
+    if not_modified is not None:
+        return not_modified
+    return _json_response(await _call(request, request.app[DB].get_states), etag=etag)
+
+
+async def list_cities(request: "web.Request") -> "web.Response":
+    etag, not_modified = await _change_etag(request)
+    if not_modified is not None:
+        return not_modified
+    cities = await _call(request, request.app[DB].get_cities_by_state, request.match_info["state"])
+    return _json_response(cities, etag=etag)
+
+
+async def get_enrolment_report(request: "web.Request") -> "web.Response":
+    etag, not_modified = await _change_etag(request)
+    if not_modified is not None:
+        return not_modified
+    # The report kept by StudentReports may predate the position read above
+    report = await _call(request, request.app[REPORTS].summary, True)
+    return _json_response(report, etag=etag)
+
+
+async def get_stats(request: "web.Request") -> "web.Response":
+    db = request.app[DB]
+    return _json_response({"pool": db.get_pool_stats(), "cache": db.get_cache_stats(),
+                                    "operations": db.get_query_stats()})
+
+
+def create_app(db, workers: Optional[int] = None) -> "web.Application":
+    """
+    Build the aiohttp application serving a DatabaseManager
+
+    Args:
+        db: DatabaseManager (closed with the application)
+        workers: Threads running the database calls (default: the size of the connection pool)
+
+    Returns:
+        aiohttp Application, to pass to web.run_app or an AppRunner
+    """
+    if web is None:
+        raise RuntimeError("Le service REST nécessite aiohttp (pip install aiohttp)")
+    app = web.Application()
+    app[DB] = db
+    # More threads than pooled connections would only wait for a connection
+    app[EXECUTOR] = ThreadPoolExecutor(max_workers=workers or db.pool.pool_size, thread_name_prefix="students-api")
+    app[REPORTS] = StudentReports(db)
+    app.router.add_get("/students", list_students)
+    app.router.add_get("/students/search", search_students)
+    app.router.add_get(r"/students/{student_id:\d+}", get_student)
+    app.router.add_post("/students", create_student)
+    app.router.add_put(r"/students/{student_id:\d+}", update_student)
+    app.router.add_delete(r"/students/{student_id:\d+}", delete_student)
+    app.router.add_get("/states", list_states)
+    app.router.add_get("/states/{state}/cities", list_cities)
+    app.router.add_get("/reports/enrolments", get_enrolment_report)
+    app.router.add_get("/stats", get_stats)
+
+    async def close_database(app):
+        app[EXECUTOR].shutdown(wait=True)
+        app[DB].close()
+
+    app.on_cleanup.append(close_database)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service REST/JSON de la base des étudiants")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sqlite", metavar="FICHIER",
+                        help="Base SQLite locale au lieu du serveur MySQL (STUDENTS_DB_BACKEND sinon)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Remplir la base SQLite avec N étudiants synthétiques si elle est vide")
+    parser.add_argument("--pool-size", type=int, default=10, help="Connexions à la base (et threads)")
+    parser.add_argument("--cache-rows", type=int, default=200_000,
+                        help="Étudiants gardés en mémoire pour les lectures (0: pas de cache)")
+    args = parser.parse_args()
+
+    if web is None:
+        print("Le service REST nécessite aiohttp (pip install aiohttp)")
+        sys.exit(1)
+
+    from connect_database import DatabaseManager
+    from instrumentation import instrumentation_from_environment
+    from storage_backends import SQLiteBackend, backend_from_environment
+
+    logging.basicConfig(level=logging.WARNING)
+    backend = SQLiteBackend(args.sqlite) if args.sqlite else backend_from_environment()
+    db = DatabaseManager(backend=backend, pool_size=args.pool_size,
+                         instrumentation=instrumentation_from_environment(),
+                         cache_max_rows=args.cache_rows or None)
+    if args.seed and args.sqlite and db.get_student_count() == 0:
+        from synthetic_data import generate_students
+        db.add_students_bulk(generate_students(0, args.seed))
+    print(f"Service des étudiants ({backend.name}) sur http://{args.host}:{args.port} (pid {os.getpid()})")
+    web.run_app(create_app(db), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
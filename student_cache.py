@@ -0,0 +1,310 @@
+import sys
+import threading
+import time
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from student_record import Student
+
+
+class StudentCache:
+    """
+    Local read-through copy of students_info, refreshed from the change log.
+
+    The table is loaded once. After that, each refresh asks the student_changes
+    log (filled by triggers, see migration 6) which students changed since the
+    last sync and only re-reads those rows, so it costs one small query when
+    nothing changed. Refreshes happen on read, at most every
+    `refresh_interval` seconds, or right away after invalidate() (local writes).
+
+    Rows are the Student records returned by DatabaseManager, kept in studentId
+    order, with the repeated strings (names, provinces, cities) interned.
+    Above `max_rows` students the cache turns itself off and every read goes
+    to the database again, so its memory stays bounded.
+
+    The whole table is streamed without holding the cache lock and swapped in
+    at the end: while it loads, other readers are served from the previous
+    copy (or go to the database when there is none yet), and a load that
+    fails keeps the previous copy.
+    """
+
+    # Change ids are allocated before commit, so a long transaction may commit
+    # an id lower than the last one seen: when there is something new, a refresh
+    # also re-reads this many ids back
+    CHANGE_OVERLAP = 1000
+    # Result of a load that stopped at max_rows
+    TOO_LARGE = object()
+
+    def __init__(self, db, max_rows: int = 200_000, refresh_interval: float = 2.0,
+                 full_reload_interval: float = 600.0):
+        """
+        Args:
+            db: DatabaseManager the rows come from
+            max_rows: Largest table kept in memory
+            refresh_interval: Seconds during which reads are served without asking the database
+            full_reload_interval: Seconds after which the whole table is reloaded anyway
+                (safety net for changes the log could have missed)
+        """
+        self.db = db
+        self.max_rows = max_rows
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self._lock = threading.RLock()
+        self._rows: Dict[int, Student] = {}
+        self._sorted_ids: Optional[List[int]] = None
+        # state -> {city -> number of students}
+        self._locations: Dict[str, Dict[Optional[str], int]] = {}
+        # email domain -> number of students, enrolment month -> number of students (reports)
+        self._domains: Dict[Optional[str], int] = {}
+        self._enrolments: Dict[Optional[str], int] = {}
+        self._loaded = False
+        self._too_large = False
+        self._loading = False
+        # Incremented by clear(): a load started before a clear is not installed
+        self._generation = 0
+        self._last_change_id = 0
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._stale = True
+        self._stats = {"hits": 0, "misses": 0, "full_loads": 0, "refreshes": 0, "rows_refreshed": 0}
+
+    def invalidate(self):
+        """
+        Make the next read check the change log first (call after a local write)
+        """
+        with self._lock:
+            self._stale = True
+
+    def clear(self):
+        """
+        Drop the cached rows; the next read reloads the whole table
+        """
+        with self._lock:
+            self._rows = {}
+            self._sorted_ids = None
+            self._locations = {}
+            self._domains = {}
+            self._enrolments = {}
+            self._loaded = False
+            self._too_large = False
+            self._stale = True
+            self._generation += 1
+
+    def get_all(self) -> Optional[List[Student]]:
+        """
+        Every student ordered by ID, or None if the cache cannot serve it
+        """
+        self._load_if_due()
+        with self._lock:
+            if not self._sync():
+                return None
+            return list(self._rows.values())
+
+    def get(self, student_id: int) -> Tuple[bool, Optional[Student]]:
+        """
+        Look up one student
+
+        Returns:
+            (served, student): served is False when the cache cannot answer
+        """
+        self._load_if_due()
+        with self._lock:
+            if not self._sync():
+                return False, None
+            return True, self._rows.get(student_id)
+
+    def get_page(self, after_id: Optional[int], limit: int) -> Optional[List[Student]]:
+        """
+        Up to `limit` students with an ID greater than `after_id`, or None if the cache cannot serve it
+        """
+        self._load_if_due()
+        with self._lock:
+            if not self._sync():
+                return None
+            if self._sorted_ids is None:
+                self._sorted_ids = list(self._rows)
+            start = 0 if after_id is None else bisect_right(self._sorted_ids, after_id)
+            return [self._rows[student_id] for student_id in self._sorted_ids[start:start + limit]]
+
+    def get_locations(self) -> Optional[Dict[str, Dict[Optional[str], int]]]:
+        """
+        state -> {city -> number of students}, or None if the cache cannot serve it
+        """
+        self._load_if_due()
+        with self._lock:
+            if not self._sync():
+                return None
+            return {state: dict(cities) for state, cities in self._locations.items()}
+
+    def get_email_domains(self) -> Optional[Dict[Optional[str], int]]:
+        """
+        email domain -> number of students, or None if the cache cannot serve it
+        """
+        self._load_if_due()
+        with self._lock:
+            if not self._sync():
+                return None
+            return dict(self._domains)
+
+    def get_enrolments(self) -> Optional[Dict[Optional[str], int]]:
+        """
+        enrolment month ('YYYY-MM', None if unknown) -> number of students, or None if the cache cannot serve it
+        """
+        self._load_if_due()
+        with self._lock:
+            if not self._sync():
+                return None
+            return dict(self._enrolments)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters (hits, misses, full_loads, refreshes, rows_refreshed, rows, enabled)
+        """
+        with self._lock:
+            return dict(self._stats, rows=len(self._rows), enabled=not self._too_large,
+                        last_change_id=self._last_change_id)
+
+    def _sync(self) -> bool:
+        """
+        Bring the copy up to date from the change log if a refresh is due; False when reads must go to the database
+        """
+        if self._loaded and (self._stale or time.monotonic() - self._checked_at >= self.refresh_interval):
+            self._refresh(time.monotonic())
+        if not self._loaded:
+            self._stats["misses"] += 1
+            return False
+        self._stats["hits"] += 1
+        return True
+
+    def _load_if_due(self):
+        """
+        Reload the whole table if it is missing or old, unless another thread is already at it
+        """
+        with self._lock:
+            now = time.monotonic()
+            due = not self._loaded or now - self._loaded_at >= self.full_reload_interval
+            if self._loading or not due or (self._too_large and now - self._loaded_at < self.full_reload_interval):
+                return
+            self._loading = True
+            self._loaded_at = now
+            generation = self._generation
+        loaded = None
+        try:
+            loaded = self._read_table()
+        finally:
+            with self._lock:
+                self._loading = False
+                if generation == self._generation:
+                    self._install(loaded)
+
+    def _read_table(self):
+        """
+        Stream students_info (without holding the lock)
+
+        Returns:
+            (last_change_id, rows, counts), TOO_LARGE, or None if the table could not be read completely
+        """
+        # Read the log position first: changes made during the load are replayed by the next refresh
+        last_change_id = self.db.get_last_change_id()
+        if last_change_id is None:
+            return None
+        rows = {}
+        try:
+            for student in self.db.iter_students(batch_size=5000, raise_errors=True):
+                if len(rows) >= self.max_rows:
+                    return self.TOO_LARGE
+                rows[student[0]] = self._compact(student)
+        except (self.db.backend.Error, ConnectionError) as e:
+            # A truncated roster must never be served as the whole table
+            print(f"Erreur lors du chargement du cache des étudiants: {e}")
+            return None
+        counts = ({}, {}, {})
+        for student in rows.values():
+            self._count(student, 1, counts)
+        return last_change_id, rows, counts
+
+    def _install(self, loaded):
+        """
+        Swap in a table read by _read_table (under the lock)
+        """
+        if loaded is None:
+            return  # keep the previous copy, if any; reads without one go to the database
+        if loaded is self.TOO_LARGE:
+            self.clear()
+            self._too_large = True
+            return
+        self._last_change_id, self._rows, (self._locations, self._domains, self._enrolments) = loaded
+        self._sorted_ids = None
+        self._loaded = True
+        self._too_large = False
+        # Local writes made during the load are picked up by a refresh on the next read
+        self._stale = True
+        self._stats["full_loads"] += 1
+
+    def _refresh(self, now: float):
+        changes = self.db.get_changes(self._last_change_id, self.CHANGE_OVERLAP)
+        if changes is None:
+            # Log pruned past our position, too many changes, or database error: the next read reloads
+            self.clear()
+            return
+        last_change_id, changed_ids, students = changes
+        self._checked_at = now
+        self._stale = False
+        self._stats["refreshes"] += 1
+        if not changed_ids:
+            return
+        self._last_change_id = last_change_id
+
+        found = {student[0]: self._compact(student) for student in students}
+        last_id = next(reversed(self._rows), 0) if self._rows else 0
+        out_of_order = False
+        for student_id in changed_ids:
+            previous = self._rows.get(student_id)
+            current = found.get(student_id)
+            if previous == current:
+                continue  # re-read through the overlap window
+            if previous is not None:
+                self._count(previous, -1)
+            if current is None:
+                del self._rows[student_id]
+            else:
+                out_of_order |= previous is None and student_id < last_id
+                self._rows[student_id] = current
+                self._count(current, 1)
+            self._sorted_ids = None
+            self._stats["rows_refreshed"] += 1
+        if out_of_order:
+            self._rows = dict(sorted(self._rows.items()))
+        if len(self._rows) > self.max_rows:
+            self.clear()
+            self._too_large = True
+            self._loaded_at = now
+
+    def _count(self, student: Student, delta: int, counts: Optional[Tuple[dict, dict, dict]] = None):
+        """
+        Add `delta` to the counts of the student's location, email domain and enrolment month
+        (in `counts` = (locations, domains, enrolments) when given, else in the cache's own)
+        """
+        locations, domains, enrolments = counts or (self._locations, self._domains, self._enrolments)
+        self._add(domains, self.db.email_domain(student[5]), delta)
+        self._add(enrolments, self.db.enrolment_month(student[self.db.CREATED_POSITION]), delta)
+        if student[3] is None:
+            return  # same as the grouped query of DatabaseManager: no province, not listed
+        cities = locations.setdefault(student[3], {})
+        self._add(cities, student[4], delta)
+        if not cities:
+            del locations[student[3]]
+
+    @staticmethod
+    def _add(counts: Dict[Any, int], key: Any, delta: int):
+        count = counts.get(key, 0) + delta
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+    @staticmethod
+    def _compact(student: Student) -> Student:
+        # Names, provinces and cities repeat a lot: share one string object per value
+        return Student._make((student[0],) + tuple(sys.intern(value) if isinstance(value, str) else value
+                                                   for value in student[1:5]) + tuple(student[5:]))
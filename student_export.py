@@ -0,0 +1,233 @@
+"""
+Streaming export of the student roster to CSV, Excel (XLSX) or Parquet.
+
+Rows come from DatabaseManager.iter_students (unbuffered server-side cursor)
+and are written chunk by chunk, so memory use does not depend on the number
+of students. The file is written next to its destination and only renamed
+into place once complete: a cancelled or failed export leaves nothing behind.
+
+XLSX needs openpyxl and Parquet needs pyarrow; CSV has no dependency.
+
+    python student_export.py etudiants.csv
+    python student_export.py quebec.xlsx --search Québec --field state
+"""
+import argparse
+import csv
+import os
+import sys
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+COLUMNS = ("studentId", "firstName", "lastName", "state", "city", "emailAddress")
+FORMATS = ("csv", "xlsx", "parquet")
+
+
+class ExportCancelled(Exception):
+    """
+    Raised when an export is cancelled before completion
+    """
+
+
+def format_from_path(path: str) -> str:
+    """
+    Get the export format matching a file extension
+
+    Args:
+        path: Destination file
+
+    Returns:
+        One of FORMATS
+
+    Raises:
+        ValueError: If the extension is not supported
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in FORMATS:
+        raise ValueError(f"Format d'export non pris en charge: '.{extension}' (formats: {', '.join(FORMATS)})")
+    return extension
+
+
+class _CsvWriter:
+    def __init__(self, path: str):
+        # utf-8-sig: Excel opens the accents correctly
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows: List[Tuple]):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path: str):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("L'export Excel nécessite openpyxl (pip install openpyxl)") from None
+        self._path = path
+        # write_only: rows are streamed to a temporary file instead of kept as cells
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Students")
+        self._sheet.append(COLUMNS)
+
+    def write(self, rows: List[Tuple]):
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._path)
+
+
+class _ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("L'export Parquet nécessite pyarrow (pip install pyarrow)") from None
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([("studentId", pyarrow.int64())] +
+                                      [(column, pyarrow.string()) for column in COLUMNS[1:]])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, rows: List[Tuple]):
+        # One row group per chunk
+        columns = [list(values) for values in zip(*rows)]
+        self._writer.write_table(self._pyarrow.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "xlsx": _XlsxWriter, "parquet": _ParquetWriter}
+
+
+def _chunks(rows: Iterable[Tuple], chunk_size: int) -> Iterator[List[Tuple]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_students(rows: Iterable[Tuple], path: str, file_format: Optional[str] = None, chunk_size: int = 5000,
+                   progress: Optional[Callable[[int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Write student tuples to a file, chunk by chunk
+
+    Args:
+        rows: Iterable of student tuples (studentId, firstName, lastName, state, city, emailAddress)
+        path: Destination file
+        file_format: 'csv', 'xlsx' or 'parquet' (default: from the extension of `path`)
+        chunk_size: Number of rows written at a time
+        progress: Called with the number of rows written after each chunk
+        is_cancelled: Polled between chunks; returning True stops the export
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ExportCancelled: If `is_cancelled` returned True (no file is left behind)
+    """
+    file_format = file_format or format_from_path(path)
+    if file_format not in _WRITERS:
+        raise ValueError(f"Format d'export non pris en charge: {file_format}")
+    partial_path = f"{path}.part"
+    writer = _WRITERS[file_format](partial_path)
+    written = 0
+    completed = False
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            if is_cancelled is not None and is_cancelled():
+                raise ExportCancelled(f"Export annulé après {written} lignes")
+            writer.write(chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written)
+        completed = True
+    finally:
+        try:
+            writer.close()
+        finally:
+            if completed:
+                os.replace(partial_path, path)
+            elif os.path.exists(partial_path):
+                os.remove(partial_path)
+    return written
+
+
+def export_students(db, path: str, file_format: Optional[str] = None, search_term: str = "",
+                    search_field: str = "all", chunk_size: int = 5000,
+                    progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                    is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Export the students (or a search result) from the database to a file
+
+    Args:
+        db: DatabaseManager
+        path: Destination file
+        file_format: 'csv', 'xlsx' or 'parquet' (default: from the extension of `path`)
+        search_term: Optional term restricting the students (same rules as search_students)
+        search_field: The field to search in ('all' or one of SEARCH_FIELDS)
+        chunk_size: Rows fetched from the server and written at a time
+        progress: Called with (rows written, total rows or None when unknown) after each chunk
+        is_cancelled: Polled between chunks; returning True stops the export
+
+    Returns:
+        Number of rows written
+
+    Raises:
+        ExportCancelled: If the export was cancelled
+    """
+    file_format = file_format or format_from_path(path)
+    # Counting is only cheap for the whole table
+    total = None if search_term.strip() else db.get_student_count()
+    # Only the exported columns are read: the row version and enrolment date are internal
+    rows = db.iter_students(search_term, search_field, batch_size=chunk_size, raise_errors=True, columns=COLUMNS)
+    try:
+        return write_students(rows, path, file_format, chunk_size,
+                              progress=None if progress is None else lambda written: progress(written, total),
+                              is_cancelled=is_cancelled)
+    finally:
+        # Releases the streaming connection right away when the export stops early
+        rows.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporter les étudiants en CSV, XLSX ou Parquet")
+    parser.add_argument("path", help="Fichier de destination (.csv, .xlsx ou .parquet)")
+    parser.add_argument("--format", choices=FORMATS, help="Format (par défaut: d'après l'extension)")
+    parser.add_argument("--search", default="", help="N'exporter que le résultat de cette recherche")
+    parser.add_argument("--field", default="all", help="Champ de la recherche (all, firstName, city...)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    from connect_database import DatabaseManager
+    from storage_backends import backend_from_environment
+
+    def show_progress(written, total):
+        suffix = f"/{total}" if total is not None else ""
+        print(f"\r{written}{suffix} étudiants exportés", end="", flush=True)
+
+    db = DatabaseManager(backend=backend_from_environment())
+    try:
+        written = export_students(db, args.path, args.format, args.search, args.field, args.chunk_size,
+                                  progress=show_progress)
+    except (ValueError, RuntimeError, ConnectionError, db.backend.Error) as e:
+        print(f"\nErreur lors de l'export: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\nExport annulé.")
+        sys.exit(130)
+    finally:
+        db.close()
+    print(f"\n{written} étudiants exportés dans {args.path}")
+
+
+if __name__ == "__main__":
+    main()
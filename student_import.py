@@ -0,0 +1,246 @@
+"""
+Streaming CSV import of students with parallel validation.
+
+The file is read chunk by chunk. Chunks are validated in a process pool with
+the rules of the entry form (student_validation). The main process rejects
+duplicate emails: those of the rows already read, kept in a set, and those
+the database holds, looked up chunk by chunk (IN queries on the unique
+index). Accepted rows are loaded with batched inserts
+(DatabaseManager.add_students_bulk). Rejected rows are written to a reject
+file together with the reason.
+
+Recognised columns (header row, any order, case-insensitive): firstName,
+lastName, city, state, emailAddress; the export's studentId column is ignored.
+The file written by student_export.py can therefore be imported as is.
+
+    python student_import.py inscriptions.csv
+    python student_import.py inscriptions.csv --dry-run --rejects rejets.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from student_validation import ValidationError, check_rows
+
+# Header (lowercase) -> position in the add_student argument order
+COLUMN_ALIASES = {
+    "firstname": 0, "first_name": 0, "first name": 0, "prénom": 0,
+    "lastname": 1, "last_name": 1, "last name": 1, "nom": 1,
+    "city": 2, "ville": 2,
+    "state": 3, "province": 3,
+    "emailaddress": 4, "email": 4, "email_address": 4, "email address": 4, "email adress": 4, "courriel": 4,
+}
+FIELD_NAMES = ("firstName", "lastName", "city", "state", "emailAddress")
+# Rejections found by the import itself, next to the student_validation codes
+DUPLICATE_IN_DATABASE = ValidationError("duplicate_in_database", "email", "Email déjà présent dans la base de données")
+DUPLICATE_IN_FILE = ValidationError("duplicate_in_file", "email", "Email en double dans le fichier")
+DATABASE_ERROR = "database_error"
+
+
+def _column_positions(header: List[str]) -> List[int]:
+    """
+    Map the CSV columns to the student fields
+
+    Returns:
+        For each field (FIELD_NAMES order), the index of its CSV column
+
+    Raises:
+        ValueError: If a field has no column
+    """
+    positions = [-1] * len(FIELD_NAMES)
+    for index, name in enumerate(header):
+        field = COLUMN_ALIASES.get(name.strip().lower())
+        if field is not None and positions[field] == -1:
+            positions[field] = index
+    missing = [FIELD_NAMES[field] for field, index in enumerate(positions) if index == -1]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le fichier CSV: {', '.join(missing)}")
+    return positions
+
+
+def read_chunks(csv_file, chunk_size: int) -> Iterator[List[Tuple[int, Tuple[str, ...]]]]:
+    """
+    Read student rows from an open CSV file, `chunk_size` at a time
+
+    Yields:
+        Lists of (line number, (first_name, last_name, city, state, email)) with stripped values
+    """
+    reader = csv.reader(csv_file)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = _column_positions(header)
+    width = max(positions) + 1
+    chunk = []
+    for record in reader:
+        if not any(value.strip() for value in record):
+            continue  # blank line
+        record += [""] * (width - len(record))
+        chunk.append((reader.line_num, tuple(record[index].strip() for index in positions)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(chunk: List[Tuple[int, Tuple[str, ...]]]) -> List[Tuple[int, ValidationError]]:
+    """
+    Validate a chunk of rows (runs in the worker processes)
+
+    Returns:
+        (index in the chunk, error) for the invalid rows only, so little goes back to the parent process
+    """
+    return check_rows([student for _, student in chunk])
+
+
+def _validated_chunks(chunks: Iterator, workers: int) -> Iterator[Tuple[List, List[Tuple[int, ValidationError]]]]:
+    """
+    Validate chunks in a process pool, keeping their order and a bounded number in flight
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, validate_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(validate_chunk, chunk)))
+            # Reading further ahead would only grow memory
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def import_students(db, path: str, dry_run: bool = False, reject_path: Optional[str] = None,
+                    chunk_size: int = 5000, batch_size: int = 1000, workers: Optional[int] = None,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Import students from a CSV file
+
+    Args:
+        db: DatabaseManager
+        path: CSV file with a header row
+        dry_run: Validate and check duplicates without writing to the database
+        reject_path: CSV file receiving the rejected rows and their reason (default: <path>.rejets.csv)
+        chunk_size: Rows read and validated at a time
+        batch_size: Rows per INSERT batch
+        workers: Validation processes (default: number of CPUs; 0 or 1 validates in this process)
+        progress: Called with the report after each chunk
+
+    Returns:
+        Report dict with read, valid, imported, rejected, elapsed (seconds),
+        rows_per_second, reject_path and dry_run
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if reject_path is None:
+        reject_path = f"{os.path.splitext(path)[0]}.rejets.csv"
+    report = {"read": 0, "valid": 0, "imported": 0, "rejected": 0, "elapsed": 0.0, "rows_per_second": 0,
+              "reject_path": reject_path, "dry_run": dry_run}
+    started = time.perf_counter()
+
+    def update_rate():
+        report["elapsed"] = time.perf_counter() - started
+        report["rows_per_second"] = round(report["read"] / report["elapsed"]) if report["elapsed"] else 0
+
+    # Emails compared as the unique index compares them (case-insensitive on MySQL, exact on SQLite)
+    unique_key = db.backend.unique_key
+    # Line number of each row handed to add_students_bulk, to report the rows it rejects
+    accepted_lines = array("L")
+
+    with open(path, encoding="utf-8-sig", newline="") as csv_file, \
+            open(reject_path, "w", encoding="utf-8-sig", newline="") as reject_file:
+        rejects = csv.writer(reject_file)
+        rejects.writerow(("line",) + FIELD_NAMES + ("code", "reason"))
+        file_emails = set()
+
+        def accepted_rows():
+            for chunk, errors in _validated_chunks(read_chunks(csv_file, chunk_size), workers):
+                errors = dict(errors)
+                # Rows of the previous chunks may already be written: the file's own set is checked first
+                in_database = db.find_existing_emails([student[4] for index, (_, student) in enumerate(chunk)
+                                                       if index not in errors])
+                if in_database is None:
+                    raise ConnectionError("Impossible de vérifier les emails déjà présents dans la base")
+                for index, (line, student) in enumerate(chunk):
+                    error = errors.get(index)
+                    if error is None:
+                        email = unique_key(student[4])
+                        if email in file_emails:
+                            error = DUPLICATE_IN_FILE
+                        elif email in in_database:
+                            error = DUPLICATE_IN_DATABASE
+                        else:
+                            file_emails.add(email)
+                    if error is not None:
+                        rejects.writerow((line,) + student + (error.code, error.message))
+                        report["rejected"] += 1
+                        continue
+                    report["valid"] += 1
+                    accepted_lines.append(line)
+                    yield student
+                report["read"] += len(chunk)
+                update_rate()
+                if progress is not None:
+                    progress(report)
+
+        if dry_run:
+            for _ in accepted_rows():
+                pass
+        else:
+            result = db.add_students_bulk(accepted_rows(), batch_size=batch_size)
+            report["imported"] = result["written"]
+            for index, student, message in result["errors"]:
+                rejects.writerow((accepted_lines[index],) + tuple(student) + (DATABASE_ERROR, message))
+                report["rejected"] += 1
+    update_rate()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importer des étudiants depuis un fichier CSV")
+    parser.add_argument("path", help="Fichier CSV (ligne d'en-tête: firstName, lastName, city, state, emailAddress)")
+    parser.add_argument("--dry-run", action="store_true", help="Valider sans rien écrire dans la base")
+    parser.add_argument("--rejects", help="Fichier des lignes rejetées (par défaut: <fichier>.rejets.csv)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="Processus de validation (par défaut: nb de CPU)")
+    args = parser.parse_args()
+
+    from connect_database import DatabaseManager
+    from storage_backends import backend_from_environment
+
+    def show_progress(report):
+        print(f"\r{report['read']} lignes lues, {report['rejected']} rejetées "
+              f"({report['rows_per_second']} lignes/s)", end="", flush=True)
+
+    db = DatabaseManager(backend=backend_from_environment())
+    try:
+        report = import_students(db, args.path, args.dry_run, args.rejects, args.chunk_size, args.batch_size,
+                                 args.workers, progress=show_progress)
+    except (OSError, ValueError, ConnectionError, db.backend.Error) as e:
+        print(f"\nErreur lors de l'import: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+    print()
+    if report["dry_run"]:
+        print(f"Simulation: {report['valid']} lignes valides sur {report['read']} (rien n'a été écrit).")
+    else:
+        print(f"{report['imported']} étudiants importés sur {report['read']} lignes.")
+    print(f"{report['rejected']} lignes rejetées -> {report['reject_path']}")
+    print(f"Durée: {report['elapsed']:.1f} s ({report['rows_per_second']} lignes/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Typed student rows returned by DatabaseManager.
+
+Student names its fields after the students_info columns, so callers read
+`student.city` instead of guessing at `student[4]`. It is a NamedTuple: a
+row costs no more than the plain tuple it replaces (no per-instance dict)
+and code indexing rows by position keeps working. Queries select these
+columns explicitly; a caller needing fewer of them (a picker showing ID and
+name) gets rows of a smaller record type, see row_type.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Student(NamedTuple):
+    """
+    One row of students_info
+    """
+    studentId: int
+    firstName: str
+    lastName: Optional[str]
+    state: Optional[str]
+    city: Optional[str]
+    emailAddress: Optional[str]
+    version: int = 1
+    createdAt: Any = None  # NULL for students added before the enrolment date was recorded
+
+
+# Columns of students_info, in the order of the Student fields
+STUDENT_COLUMNS: Tuple[str, ...] = Student._fields
+
+
+@lru_cache(maxsize=None)
+def row_type(columns: Tuple[str, ...]) -> type:
+    """
+    Record type of the rows holding only `columns`
+
+    Args:
+        columns: Columns of students_info, in the order they are selected
+
+    Returns:
+        Student for all the columns in table order, otherwise a namedtuple with these fields
+
+    Raises:
+        ValueError: If a column is unknown or repeated
+    """
+    if columns == STUDENT_COLUMNS:
+        return Student
+    unknown = [column for column in columns if column not in STUDENT_COLUMNS]
+    if unknown or not columns or len(set(columns)) != len(columns):
+        raise ValueError(f"Colonnes invalides: {', '.join(unknown) or ', '.join(columns) or '(aucune)'}")
+    return namedtuple("StudentColumns", columns)
+
+
+def select_list(columns: Sequence[str], table: Optional[str] = None) -> str:
+    """
+    SELECT list of `columns` (qualified by `table` when given, for joins)
+    """
+    if table is None:
+        return ", ".join(columns)
+    return ", ".join(f"{table}.{column}" for column in columns)
+
+
+def projector(columns: Tuple[str, ...]) -> Callable[[Iterable[tuple]], List[tuple]]:
+    """
+    Function turning full Student rows into rows of `columns` only (e.g. rows served by the cache)
+    """
+    make = row_type(columns)._make
+    if columns == STUDENT_COLUMNS:
+        return lambda students: students
+    if len(columns) == 1:
+        position = STUDENT_COLUMNS.index(columns[0])
+        return lambda students: [make((student[position],)) for student in students]
+    getter = itemgetter(*(STUDENT_COLUMNS.index(column) for column in columns))
+    return lambda students: [make(getter(student)) for student in students]
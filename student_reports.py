@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StudentReports:
+    """
+    Enrolment counts for managers: by province and city, by email domain and by month.
+
+    The counts are grouped by the database (GROUP BY) or, when the
+    DatabaseManager keeps a StudentCache, maintained by the cache itself as
+    the change log brings added, updated and deleted students, so no report
+    reads the whole table. The assembled report is kept until the change log
+    moves: a refresh costs one MAX(changeId) query when nothing was written.
+    """
+
+    def __init__(self, db, refresh_interval: float = 2.0, top: int = 10):
+        """
+        Args:
+            db: DatabaseManager the counts come from
+            refresh_interval: Seconds during which the report is served without asking the database
+            top: Number of cities and email domains listed (the rest is summed up)
+        """
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.top = top
+        self._lock = threading.Lock()
+        self._report: Optional[Dict[str, Any]] = None
+        self._change_id: Optional[int] = None
+        self._checked_at = 0.0
+
+    def summary(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get the enrolment report, rebuilt only if students changed since the last one
+
+        Args:
+            refresh: Check the change log now, even within refresh_interval
+
+        Returns:
+            Dictionary with 'total', 'states' [(state, count)], 'cities' [(state, city, count)],
+            'other_cities', 'domains' [(domain, count)], 'other_domains',
+            'months' [(month, count, cumulative)], 'unknown_dates' and 'generated_at'
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._report is not None and not refresh and now - self._checked_at < self.refresh_interval:
+                return self._report
+            self._checked_at = now
+            change_id = self.db.get_last_change_id()
+            if self._report is None or change_id is None or change_id != self._change_id:
+                # The state/city counts are otherwise kept for location_cache_ttl seconds and
+                # would miss the writes of other clients that the other counts already show
+                self.db.invalidate_location_cache()
+                self._report = self._build()
+                self._change_id = change_id
+            return self._report
+
+    def _build(self) -> Dict[str, Any]:
+        locations = self.db.get_location_counts()
+        domains = self.db.get_email_domain_counts()
+        enrolments = self.db.get_enrolment_counts()
+
+        states = sorted(((state, sum(cities.values())) for state, cities in locations.items()),
+                        key=lambda item: (-item[1], item[0]))
+        cities = sorted(((state, city, count) for state, counts in locations.items()
+                         for city, count in counts.items()),
+                        key=lambda item: (-item[2], item[0], item[1] or ""))
+        top_domains = sorted(((domain, count) for domain, count in domains.items() if domain is not None),
+                             key=lambda item: (-item[1], item[0]))
+
+        months: List[Tuple[str, int, int]] = []
+        cumulative = enrolments.get(None, 0)
+        for month in sorted(month for month in enrolments if month is not None):
+            cumulative += enrolments[month]
+            months.append((month, enrolments[month], cumulative))
+
+        return {
+            "total": sum(domains.values()),
+            "states": states,
+            "cities": cities[:self.top],
+            "other_cities": sum(count for _, _, count in cities[self.top:]),
+            "domains": top_domains[:self.top],
+            "other_domains": sum(count for _, count in top_domains[self.top:]) + domains.get(None, 0),
+            "months": months,
+            "unknown_dates": enrolments.get(None, 0),
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+        }
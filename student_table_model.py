@@ -0,0 +1,568 @@
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+from PySide6.QtGui import QBrush, QColor
+from connect_database import DatabaseManager
+from student_record import STUDENT_COLUMNS, Student
+
+# Names, cities and states repeat a lot: fold each distinct value once
+_fold_accents = lru_cache(maxsize=65536)(DatabaseManager.normalize_search_text)
+
+
+def collation_key(value: Any) -> str:
+    """
+    Sort and filter key of a cell: case and accents folded ("Québec" -> "quebec")
+    """
+    if value is None:
+        return ""
+    value = str(value)
+    # Most values (emails, many names) are ASCII: lower() is all they need
+    return value.lower() if value.isascii() else _fold_accents(value)
+
+
+class StudentTableModel(QAbstractTableModel):
+    """
+    Lazy table model for the student list.
+
+    Rows are the Student records returned by DatabaseManager, kept as is and
+    pulled from the source when the view scrolls near the end
+    (canFetchMore/fetchMore), so showing a large result costs the rows on
+    screen instead of one QTableWidgetItem per cell.
+
+    The source is either an iterable (set_students) or, in paged mode
+    (start_paged), an asynchronous loader: fetchMore emits page_requested
+    with the continuation token and the owner answers with append_page().
+
+    Sorting (sort, called by the view's header) and per-column filters
+    (set_filter) compare precomputed collation keys, cached per column and
+    student, so re-sorting never folds a string twice. While a paged result
+    is only partly loaded they cannot be applied locally: the model restarts
+    the paging instead, and the owner passes sort_field()/filter_fields() to
+    the database (ORDER BY/WHERE pushdown).
+    """
+
+    # Continuation token of the next page to load (None for the first page)
+    page_requested = Signal(object)
+
+    HEADERS = ("Student ID", "First Name", "Last Name", "City", "State", "Email Adress")
+    # Database column of each displayed column (sort and filter pushdown)
+    COLUMN_NAMES = ("studentId", "firstName", "lastName", "city", "state", "emailAddress")
+    # Position of each displayed column in a Student row (indexing beats attribute lookup in data())
+    COLUMN_FIELDS = tuple(STUDENT_COLUMNS.index(name) for name in COLUMN_NAMES)
+    # Above this many separate blocks, remove_students resets the model instead
+    MAX_REMOVED_BLOCKS = 50
+    # Rows not yet written to the database (write-behind): negative ID, shown with this label, greyed out
+    PENDING_LABEL = "En attente"
+    PENDING_BRUSH = QBrush(QColor("#8a8a8a"))
+
+    def __init__(self, parent=None, batch_size: int = 200):
+        """
+        Args:
+            parent: Parent QObject
+            batch_size: Number of rows pulled from the source on each fetchMore
+        """
+        super().__init__(parent)
+        self.batch_size = batch_size
+        # Every loaded row, and the rows shown (the same list unless a filter is applied locally)
+        self._all: List[Student] = []
+        self._rows: List[Student] = self._all
+        self._source = iter(())
+        self._exhausted = True
+        self._paged = False
+        self._loading = False
+        self._next_token = None
+        self._sort_column = 0
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._filters: Dict[int, str] = {}  # column -> text, as typed
+        # Filters the database already applied to the loaded rows (paged mode)
+        self._pushed_filters: Dict[int, str] = {}
+        # column -> {studentId -> collation key}
+        self._keys: Dict[int, Dict[int, Any]] = {}
+        # column -> {studentId -> position in the ascending sort of the loaded rows}
+        self._ranks: Dict[int, Dict[int, int]] = {}
+        # Students whose shown values are not written to the database yet
+        self._pending: Set[int] = set()
+
+    def set_students(self, students: Iterable[Student]):
+        """
+        Replace the model content; rows are read from `students` on demand
+
+        Args:
+            students: Iterable of Student rows (list, generator...)
+        """
+        self.beginResetModel()
+        self._paged = False
+        self._loading = False
+        self._source = iter(students)
+        self._exhausted = False
+        self._pushed_filters = {}
+        self._forget_keys()
+        if self._is_default_view():
+            # Load the first batch right away so callers can tell an empty result
+            self._all = self._rows = self._next_batch()
+        else:
+            # A sorted or filtered view needs every row
+            self._all = list(self._source)
+            self._exhausted = True
+            self._rows = self._view_rows()
+        self.endResetModel()
+
+    def start_paged(self):
+        """
+        Clear the model and request the first page through page_requested
+        """
+        self.beginResetModel()
+        self._all = self._rows = []
+        self._source = iter(())
+        self._paged = True
+        self._exhausted = False
+        self._loading = False
+        self._next_token = None
+        self._pushed_filters = dict(self._filters)
+        self._forget_keys()
+        self.endResetModel()
+        self.fetchMore()
+
+    def append_page(self, students: List[Student], next_token):
+        """
+        Add a page delivered for the last page_requested
+
+        Pages come sorted and filtered by the database (sort_field, filter_fields).
+
+        Args:
+            students: Student rows of the page
+            next_token: Token of the following page, None when it was the last one
+        """
+        if not self._paged:
+            return
+        self._loading = False
+        self._next_token = next_token
+        self._exhausted = next_token is None
+        self._insert_rows(students)
+
+    def page_failed(self):
+        """
+        Stop requesting pages after a loading error
+        """
+        self._loading = False
+        self._exhausted = True
+
+    def is_loading(self) -> bool:
+        """
+        True while a requested page has not been delivered yet
+        """
+        return self._loading
+
+    def is_complete(self) -> bool:
+        """
+        True when every row of the current result is loaded in the model
+        """
+        return self._exhausted and not self._loading
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        """
+        Sort the rows on a column (called by the view when a header is clicked)
+
+        Args:
+            column: Displayed column
+            order: Qt.SortOrder
+        """
+        if (column, order) == (self._sort_column, self._sort_order):
+            return
+        self._sort_column, self._sort_order = column, order
+        if self._needs_pushdown():
+            self.start_paged()
+            return
+        self._load_remaining()
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        ids = [self._rows[index.row()][0] for index in persistent]
+        self._sort_rows(self._rows)
+        if persistent:
+            # Keep the selection on the same students
+            positions = {student[0]: row for row, student in enumerate(self._rows)}
+            self.changePersistentIndexList(
+                persistent, [self.index(positions[student_id], index.column())
+                             for student_id, index in zip(ids, persistent)])
+        self.layoutChanged.emit()
+
+    def set_filter(self, column: int, text: str):
+        """
+        Only show the rows whose `column` contains `text` (case and accents ignored)
+
+        Args:
+            column: Displayed column
+            text: Text to look for; empty removes the filter of the column
+        """
+        text = text.strip()
+        if self._filters.get(column, "") == text:
+            return
+        if text:
+            self._filters[column] = text
+        else:
+            self._filters.pop(column, None)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, column, column)
+        if self._needs_pushdown() or not self._narrows_pushed_filters():
+            self.start_paged()
+            return
+        self._load_remaining()
+        self.beginResetModel()
+        self._rows = self._view_rows()
+        self.endResetModel()
+
+    def column_filter(self, column: int) -> str:
+        """
+        Get the filter text of a column ('' when the column is not filtered)
+        """
+        return self._filters.get(column, "")
+
+    def sort_field(self) -> Tuple[Optional[str], bool]:
+        """
+        Get the sort to push down to the database
+
+        Returns:
+            (column name or None for the studentId order, descending)
+        """
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        if self._sort_column == 0:
+            return None, descending
+        return self.COLUMN_NAMES[self._sort_column], descending
+
+    def filter_fields(self) -> Dict[str, str]:
+        """
+        Get the filters to push down to the database (column name -> text)
+        """
+        return {self.COLUMN_NAMES[column]: text for column, text in self._filters.items()}
+
+    def filter_rows(self, predicate: Callable[[Student], bool]):
+        """
+        Keep only the loaded rows accepted by `predicate`, without touching the source
+
+        Args:
+            predicate: Function returning True for the students to keep
+        """
+        self.beginResetModel()
+        shared = self._rows is self._all
+        self._all = [student for student in self._all if predicate(student)]
+        self._rows = self._all if shared else [student for student in self._rows if predicate(student)]
+        self.endResetModel()
+
+    def find_student(self, student_id: int) -> int:
+        """
+        Get the row showing a student
+
+        Args:
+            student_id: The student's ID
+
+        Returns:
+            Row number, or -1 if the student is not shown by the model
+        """
+        return self._find(self._rows, student_id)
+
+    def insert_student(self, student: Student):
+        """
+        Insert one student at its position in the current sort
+
+        Args:
+            student: Student row
+        """
+        self._ranks.clear()
+        if self._rows is not self._all:
+            self._all.append(student)
+        if self._filters and not self._accepts(student):
+            return
+        key = self._sort_key(self._sort_column)
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        new_key = key(student)
+        row = len(self._rows)
+        while row > 0 and (key(self._rows[row - 1]) < new_key if descending else key(self._rows[row - 1]) > new_key):
+            row -= 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, student)
+        self.endInsertRows()
+
+    def update_student(self, student: Student) -> bool:
+        """
+        Replace the row of a student with its new values
+
+        Args:
+            student: Updated Student
+
+        Returns:
+            True if the student was shown by the model
+        """
+        return self.update_students([student]) == 1
+
+    def remove_student(self, student_id: int) -> bool:
+        """
+        Remove the row of a student
+
+        Args:
+            student_id: The student's ID
+
+        Returns:
+            True if the student was shown by the model
+        """
+        return self.remove_students([student_id]) == 1
+
+    def update_students(self, students: Iterable[Student]) -> int:
+        """
+        Replace the rows of many students, with one dataChanged for the whole span
+
+        The rows stay where they are until the next sort.
+
+        Args:
+            students: Updated Student rows
+
+        Returns:
+            Number of students that were shown by the model
+        """
+        rows = []
+        students = list(students)
+        self._forget_keys(student[0] for student in students)
+        for student in students:
+            if self._rows is not self._all:
+                position = self._find(self._all, student[0])
+                if position != -1:
+                    self._all[position] = student
+            row = self._find(self._rows, student[0])
+            if row != -1:
+                self._rows[row] = student
+                rows.append(row)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), self.columnCount() - 1))
+        return len(rows)
+
+    def remove_students(self, student_ids: Iterable[int]) -> int:
+        """
+        Remove the rows of many students
+
+        A few contiguous blocks are removed one by one (the view keeps its
+        position); scattered rows are dropped in one pass with a single reset.
+
+        Args:
+            student_ids: IDs of the students to remove
+
+        Returns:
+            Number of rows removed
+        """
+        student_ids = set(student_ids)
+        if self._rows is not self._all:
+            self._all = [student for student in self._all if student[0] not in student_ids]
+        rows = [row for row, student in enumerate(self._rows) if student[0] in student_ids]
+        if not rows:
+            return 0
+        blocks = []  # (first, last), contiguous rows
+        for row in rows:
+            if blocks and blocks[-1][1] == row - 1:
+                blocks[-1] = (blocks[-1][0], row)
+            else:
+                blocks.append((row, row))
+        if len(blocks) <= self.MAX_REMOVED_BLOCKS:
+            for first, last in reversed(blocks):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self._rows[first:last + 1]
+                self.endRemoveRows()
+        else:
+            self.beginResetModel()
+            shared = self._rows is self._all
+            self._rows = [student for student in self._rows if student[0] not in student_ids]
+            if shared:
+                self._all = self._rows
+            self.endResetModel()
+        return len(rows)
+
+    def set_pending(self, student_id: int, pending: bool):
+        """
+        Show a student's row as waiting to be written (greyed out) or as written
+
+        Rows with a negative ID (students not added yet) are always shown as pending.
+        """
+        if pending:
+            self._pending.add(student_id)
+        else:
+            self._pending.discard(student_id)
+        row = self.find_student(student_id)
+        if row != -1:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def student_at(self, row: int) -> Optional[Student]:
+        """
+        Get the Student shown at a given row
+
+        Args:
+            row: Row number in the model
+
+        Returns:
+            Student or None if the row does not exist
+        """
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        student = self._rows[index.row()]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return self.PENDING_BRUSH if student[0] < 0 or student[0] in self._pending else None
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == 0 and student[0] < 0:
+            return self.PENDING_LABEL
+        value = student[self.COLUMN_FIELDS[index.column()]]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            if section in self._filters:
+                return f"{self.HEADERS[section]} (filtre)"
+            return self.HEADERS[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        if self._paged:
+            self._loading = True
+            self.page_requested.emit(self._next_token)
+            return
+        self._insert_rows(self._next_batch())
+
+    def _insert_rows(self, students: List[Student]):
+        if not students:
+            return
+        self._ranks.clear()
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(students) - 1)
+        if self._rows is not self._all:
+            self._all.extend(students)
+        self._rows.extend(students)
+        self.endInsertRows()
+
+    def _forget_keys(self, student_ids: Optional[Iterable[int]] = None):
+        """
+        Drop cached sort keys: all of them, or those of some students (whose values changed)
+
+        Ranks are relative to every loaded row, so any change invalidates them.
+        """
+        self._ranks.clear()
+        if student_ids is None:
+            self._keys.clear()
+            return
+        for keys in self._keys.values():
+            for student_id in student_ids:
+                keys.pop(student_id, None)
+
+    def _next_batch(self) -> List[Student]:
+        batch = list(islice(self._source, self.batch_size))
+        if len(batch) < self.batch_size:
+            self._exhausted = True
+        return batch
+
+    def _is_default_view(self) -> bool:
+        return not self._filters and self._sort_column == 0 and self._sort_order == Qt.SortOrder.AscendingOrder
+
+    def _needs_pushdown(self) -> bool:
+        # Pages still to come would not fit in a locally sorted or filtered view
+        return self._paged and not self.is_complete()
+
+    def _narrows_pushed_filters(self) -> bool:
+        # Rows left out by a database filter can only be hidden further, not brought back
+        return all(collation_key(text) in collation_key(self._filters.get(column, ""))
+                   for column, text in self._pushed_filters.items())
+
+    def _load_remaining(self):
+        """
+        Pull what is left of an iterable source before sorting or filtering locally
+        """
+        if not self._paged and not self._exhausted:
+            self._insert_rows(list(self._source))
+            self._exhausted = True
+
+    def _view_rows(self) -> List[Student]:
+        """
+        Rows to show: the loaded rows through the filters, in the current sort
+        """
+        rows = self._all
+        for column, text in self._filters.items():
+            text = collation_key(text)
+            folded = self._folded(column)
+            rows = [student for student in rows if text in folded(student)]
+        self._sort_rows(rows)
+        return rows
+
+    def _accepts(self, student: Student) -> bool:
+        return all(collation_key(text) in self._folded(column)(student)
+                   for column, text in self._filters.items())
+
+    def _sort_rows(self, rows: List[Student]):
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        column = self._sort_column
+        if column == 0:
+            rows.sort(key=itemgetter(0), reverse=descending)
+            return
+        ranks = self._ranks.get(column)
+        if ranks is None:
+            # First sort on this column since the rows changed: compare the folded
+            # values once (a stable sort over the studentId order breaks the ties),
+            # then remember each student's rank so that the following sorts (other
+            # order, filtered subsets) only compare integers
+            folded = self._folded(column)
+            ordered = sorted(self._all, key=itemgetter(0))
+            ordered.sort(key=folded)
+            ranks = self._ranks[column] = {student[0]: rank for rank, student in enumerate(ordered)}
+        rows.sort(key=lambda student: ranks[student[0]], reverse=descending)
+
+    def _folded(self, column: int) -> Callable[[Student], str]:
+        """
+        Function returning the collation key of a student's cell, cached per column and student
+        """
+        if column == 0:
+            return lambda student: str(student[0])
+        keys = self._keys.setdefault(column, {})
+        position = self.COLUMN_FIELDS[column]
+
+        def key(student):
+            cached = keys.get(student[0])
+            if cached is None:
+                cached = keys[student[0]] = collation_key(student[position])
+            return cached
+        return key
+
+    def _sort_key(self, column: int) -> Callable[[Student], Any]:
+        if column == 0:
+            return itemgetter(0)
+        folded = self._folded(column)
+        # Ties keep a stable, reproducible order
+        return lambda student: (folded(student), student[0])
+
+    @staticmethod
+    def _find(rows: List[Student], student_id: int) -> int:
+        # Rows normally come ordered by studentId (keyset pages): binary search first
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            if rows[middle][0] < student_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(rows) and rows[low][0] == student_id:
+            return low
+        for row, student in enumerate(rows):
+            if student[0] == student_id:
+                return row
+        return -1
@@ -0,0 +1,63 @@
+"""
+Générateur d'étudiants synthétiques pour les benchmarks et les bases de test.
+
+La répartition suit à peu près la population canadienne: les provinces et
+les villes sont tirées avec un poids proportionnel à leur population, de
+sorte que les index (province, ville) et les listes déroulantes voient la
+même asymétrie qu'en production (beaucoup de Toronto, peu de Steinbach).
+Les emails sont uniques et le tirage est reproductible pour une graine donnée.
+"""
+import random
+from itertools import accumulate
+from typing import Iterator, Tuple
+
+FIRST_NAMES = ["Marie", "Jean", "Sarah", "Michael", "Emily", "David", "Jessica", "Robert",
+               "Ashley", "Christopher", "Amanda", "Daniel", "Sophie", "Louis", "Chloé", "Gabriel",
+               "Léa", "William", "Olivia", "Thomas", "Émile", "Noah", "Florence", "Nathan"]
+LAST_NAMES = ["Tremblay", "Bouchard", "Smith", "Johnson", "Wilson", "Brown", "Taylor", "Anderson",
+              "Thomas", "Martin", "White", "Garcia", "Gagnon", "Roy", "Côté", "Lavoie",
+              "Gauthier", "Morin", "Lee", "Campbell", "Pelletier", "Bélanger", "MacDonald", "Singh"]
+# Province -> (poids de la province, {ville: poids dans la province}); poids ~ population en milliers
+PROVINCE_CITIES = {
+    "Ontario": (15600, {"Toronto": 2800, "Ottawa": 1020, "Mississauga": 720, "Hamilton": 570,
+                        "London": 420, "Kingston": 130}),
+    "Québec": (8900, {"Montréal": 1760, "Québec": 550, "Laval": 440, "Gatineau": 290,
+                      "Sherbrooke": 170, "Trois-Rivières": 140}),
+    "Colombie-Britannique": (5500, {"Vancouver": 660, "Surrey": 570, "Burnaby": 250,
+                                    "Victoria": 92, "Kelowna": 145}),
+    "Alberta": (4700, {"Calgary": 1300, "Edmonton": 1010, "Red Deer": 100, "Lethbridge": 100}),
+    "Manitoba": (1450, {"Winnipeg": 750, "Brandon": 51, "Steinbach": 17}),
+    "Saskatchewan": (1200, {"Saskatoon": 270, "Regina": 230, "Moose Jaw": 34}),
+    "Nouvelle-Écosse": (1050, {"Halifax": 440, "Sydney": 30, "Truro": 13}),
+    "Nouveau-Brunswick": (830, {"Moncton": 80, "Saint John": 70, "Fredericton": 63}),
+    "Terre-Neuve-et-Labrador": (540, {"St. John's": 110, "Corner Brook": 20}),
+    "Île-du-Prince-Édouard": (175, {"Charlottetown": 39, "Summerside": 15}),
+}
+
+
+def _cumulative(weights):
+    return list(accumulate(weights))
+
+
+_PROVINCES = list(PROVINCE_CITIES)
+_PROVINCE_WEIGHTS = _cumulative(weight for weight, _ in PROVINCE_CITIES.values())
+_CITIES = {state: list(cities) for state, (_, cities) in PROVINCE_CITIES.items()}
+_CITY_WEIGHTS = {state: _cumulative(cities.values()) for state, (_, cities) in PROVINCE_CITIES.items()}
+
+
+def generate_students(start: int, count: int, seed: int = 42) -> Iterator[Tuple[str, str, str, str, str]]:
+    """
+    Générer `count` étudiants synthétiques à partir du numéro `start`, à la demande
+
+    Les lignes ne dépendent que de `seed`, `start` et `count`: deux exécutions
+    qui remplissent la base par les mêmes paliers obtiennent les mêmes données.
+
+    Returns:
+        Itérateur de tuples (prénom, nom, ville, province, email), dans l'ordre
+        des arguments de DatabaseManager.add_student
+    """
+    rng = random.Random(seed + start)
+    for number in range(start, start + count):
+        state = rng.choices(_PROVINCES, cum_weights=_PROVINCE_WEIGHTS)[0]
+        city = rng.choices(_CITIES[state], cum_weights=_CITY_WEIGHTS[state])[0]
+        yield (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), city, state, f"student{number}@example.com")
@@ -0,0 +1,174 @@
+"""
+ConnectionPool against fake connections: no database server involved.
+"""
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    """
+    Prepared cursor returning `rows` after each execute()
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.unread = []
+        self.description = None
+        self.executions = 0
+        self.closed = False
+
+    def execute(self, query, params=()):
+        self.executions += 1
+        self.unread = list(self.rows)
+        self.description = (("column",),) if self.rows else None
+
+    def fetchone(self):
+        return self.unread.pop(0) if self.unread else None
+
+    def fetchall(self):
+        rows, self.unread = self.unread, []
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.killed = False  # closed by the server (restart, wait_timeout...)
+        self.cursors = []
+
+    def cursor(self):
+        return FakeCursor()
+
+    def close(self):
+        self.closed = True
+
+
+def ping(raw):
+    if raw.killed:
+        raise ConnectionError("MySQL server has gone away")
+
+
+def prepared_pool(rows=(), **kwargs):
+    def prepare(raw):
+        cursor = FakeCursor(rows)
+        raw.cursors.append(cursor)
+        return cursor
+    return ConnectionPool(FakeConnection, prepare=prepare, **kwargs)
+
+
+def test_statement_is_reused_by_its_connection():
+    pool = prepared_pool(rows=[(1,), (2,)], pool_size=1)
+    conn = pool.get_connection()
+    first = conn.statement("SELECT 1")
+    first.execute("SELECT 1")
+    conn.close()
+
+    conn = pool.get_connection()  # the same raw connection, back from the pool
+    second = conn.statement("SELECT 1")
+    assert second is first
+    second.execute("SELECT 1")
+    assert len(conn.cursors) == 1 and conn.cursors[0].executions == 2
+    stats = pool.get_stats()
+    assert (stats["prepared"], stats["statement_hits"]) == (1, 1)
+    conn.close()
+
+
+def test_statement_reads_one_row_and_drains_the_rest_on_close():
+    pool = prepared_pool(rows=[(1,), (2,), (3,)])
+    conn = pool.get_connection()
+    statement = conn.statement("SELECT id FROM t")
+    statement.execute("SELECT id FROM t")
+    assert statement.fetchone() == (1,)
+    cursor = conn.cursors[0]
+    assert cursor.unread == [(2,), (3,)]  # fetchone reads a single row
+    statement.close()
+    assert cursor.unread == [] and not cursor.closed  # drained, still prepared
+    statement.execute("SELECT id FROM t")
+    assert list(statement) == [(1,), (2,), (3,)]
+    conn.close()
+
+
+def test_least_recently_used_statement_is_evicted_and_closed():
+    pool = prepared_pool(statement_cache_size=2)
+    conn = pool.get_connection()
+    one = conn.statement("SELECT 1")
+    two = conn.statement("SELECT 2")
+    assert conn.statement("SELECT 1") is one  # now the most recently used
+    conn.statement("SELECT 3")
+    one_cursor, two_cursor, three_cursor = conn.cursors
+    assert two_cursor.closed and not one_cursor.closed and not three_cursor.closed
+    assert conn.statement("SELECT 2") is not two  # prepared again
+    assert one_cursor.closed  # evicted in turn
+    assert pool.get_stats()["prepared"] == 4
+    conn.close()
+
+
+def test_plain_cursors_without_prepare():
+    pool = ConnectionPool(FakeConnection)
+    conn = pool.get_connection()
+    assert isinstance(conn.statement("SELECT 1"), FakeCursor)
+    assert conn.statement("SELECT 1") is not conn.statement("SELECT 1")
+    assert pool.get_stats()["prepared"] == 0
+    conn.close()
+
+
+def test_exhausted_pool_times_out():
+    pool = ConnectionPool(FakeConnection, pool_size=1, timeout=0.05)
+    conn = pool.get_connection()
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection()
+    stats = pool.get_stats()
+    assert (stats["waits"], stats["timeouts"], stats["in_use"]) == (1, 1, 1)
+    assert stats["wait_time"] >= 0.05
+    conn.close()
+    pool.get_connection().close()  # the released connection is usable again
+    assert pool.get_stats()["created"] == 1
+
+
+def test_waiting_caller_gets_the_released_connection():
+    pool = ConnectionPool(FakeConnection, pool_size=1, timeout=5)
+    conn = pool.get_connection()
+    raw = conn._raw
+    released = threading.Timer(0.05, conn.close)
+    released.start()
+    try:
+        waited = pool.get_connection()
+    finally:
+        released.join()
+    assert waited._raw is raw
+    assert pool.get_stats()["waits"] == 1
+    waited.close()
+
+
+def test_connection_killed_while_idle_is_replaced_on_checkout():
+    pool = ConnectionPool(FakeConnection, pool_size=1, health_check_interval=0, ping=ping)
+    conn = pool.get_connection()
+    killed = conn._raw
+    conn.close()
+    killed.killed = True
+    conn = pool.get_connection()
+    assert conn._raw is not killed and killed.closed
+    stats = pool.get_stats()
+    assert (stats["health_checks"], stats["reconnects"], stats["created"], stats["open"]) == (1, 1, 2, 1)
+    conn.close()
+
+
+def test_failed_connect_frees_its_slot():
+    attempts = []
+
+    def connect():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise ConnectionError("Can't connect to MySQL server")
+        return FakeConnection()
+    pool = ConnectionPool(connect, pool_size=1, timeout=0.05)
+    with pytest.raises(ConnectionError):
+        pool.get_connection()
+    pool.get_connection().close()  # no PoolTimeoutError: the slot was given back
+    assert pool.get_stats()["open"] == 1
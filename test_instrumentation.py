@@ -0,0 +1,156 @@
+"""
+QueryInstrumentation: percentiles, slow queries, generators and the Prometheus exporter.
+"""
+import os
+
+import pytest
+
+from connect_database import DatabaseManager
+from instrumentation import (CallRecord, Exporter, OperationStats, PrometheusTextFileExporter, QueryInstrumentation,
+                             instrumented_operation)
+from storage_backends import SQLiteBackend
+
+
+class RecordingExporter(Exporter):
+    def __init__(self):
+        self.calls = []
+        self.slow_queries = []
+
+    def export_call(self, record, instrumentation):
+        self.calls.append(record)
+
+    def export_slow_query(self, slow, instrumentation):
+        self.slow_queries.append(slow)
+
+
+def record(operation, wall, **counters):
+    call = CallRecord(operation)
+    call.wall = wall
+    for name, value in counters.items():
+        setattr(call, name, value)
+    return call
+
+
+def test_percentiles_of_a_known_distribution():
+    stats = OperationStats(window=100)
+    assert stats.percentile(0.5) == 0.0  # no call yet
+    for ms in reversed(range(1, 101)):  # 1..100 ms, in any order
+        stats.add(record("get_states", ms / 1000))
+    assert [stats.percentile(fraction) * 1000 for fraction in (0.5, 0.95, 0.99, 1.0)] == \
+        pytest.approx([51, 96, 100, 100])
+    assert stats.calls == 100 and stats.wall == pytest.approx(5.05)
+
+
+def test_percentiles_only_see_the_window():
+    stats = OperationStats(window=10)
+    for ms in range(1, 101):
+        stats.add(record("get_states", ms / 1000))
+    assert stats.percentile(0.0) * 1000 == pytest.approx(91)  # the last 10 calls
+    assert stats.calls == 100  # counters are cumulative
+
+
+@pytest.mark.parametrize("threshold, slow", [(0.0, True), (60.0, False)])
+def test_slow_queries_are_reported_with_their_plan(tmp_path, caplog, threshold, slow):
+    exporter = RecordingExporter()
+    instrumentation = QueryInstrumentation(slow_query_threshold=threshold, exporters=[exporter])
+    db = DatabaseManager(backend=SQLiteBackend(str(tmp_path / "students.sqlite3")), pool_size=1,
+                         instrumentation=instrumentation)
+    try:
+        db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+        exporter.slow_queries.clear()
+        caplog.clear()
+        assert db.get_student_by_id(1).lastName == "Tremblay"
+    finally:
+        db.close()
+
+    call = next(call for call in exporter.calls if call.operation == "get_student_by_id")
+    assert (call.queries, call.rows, call.failed) == (1, 1, False)
+    assert call.slow_queries == int(slow)
+    if not slow:
+        assert exporter.slow_queries == [] and not caplog.records
+        return
+    (query,) = exporter.slow_queries
+    assert query.operation == "get_student_by_id" and query.rows == 1
+    assert query.query.startswith("SELECT") and query.params == (1,)
+    # EXPLAIN QUERY PLAN: a lookup by primary key, not a scan
+    assert query.plan and "SCAN" not in " ".join(str(value) for line in query.plan for value in line)
+    (log,) = [entry for entry in caplog.records if entry.name == "students.db.slow"]
+    assert "get_student_by_id" in log.getMessage()
+
+
+class Measured:
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+
+    @instrumented_operation
+    def rows(self, count, fail=False):
+        yield from range(count)
+        if fail:
+            raise ValueError("connexion perdue")
+
+
+@pytest.fixture
+def measured():
+    exporter = RecordingExporter()
+    measured = Measured(QueryInstrumentation(exporters=[exporter]))
+    measured.exporter = exporter
+    return measured
+
+
+def test_generator_is_measured_until_exhausted(measured):
+    rows = measured.rows(3)
+    assert measured.exporter.calls == []  # nothing runs before the first row is requested
+    assert next(rows) == 0
+    assert measured.instrumentation.current().operation == "rows"
+    assert list(rows) == [1, 2]
+    (call,) = measured.exporter.calls
+    assert (call.operation, call.failed) == ("rows", False)
+    assert measured.instrumentation.current() is None
+
+
+def test_generator_closed_early_or_failing(measured):
+    rows = measured.rows(3)
+    next(rows)
+    rows.close()
+    with pytest.raises(ValueError):
+        list(measured.rows(2, fail=True))
+    assert [call.failed for call in measured.exporter.calls] == [False, True]
+    assert measured.instrumentation.snapshot()["rows"]["failures"] == 1
+    assert measured.instrumentation.current() is None
+
+
+def test_generator_without_instrumentation():
+    assert list(Measured(None).rows(2)) == [0, 1]
+
+
+def test_prometheus_text_format(tmp_path):
+    instrumentation = QueryInstrumentation()
+    for ms in (10, 20, 30, 40):
+        instrumentation.finish(record("get_states", 0, acquire=0.001, query=0.002, rows=5, bytes=40), ms / 1000)
+    instrumentation.finish(record("get_states", 0), 0.05, failed=True)
+    path = str(tmp_path / "students.prom")
+    exporter = PrometheusTextFileExporter(path, prefix="app")
+    exporter.flush(instrumentation)
+    assert not os.path.exists(path + ".tmp")
+    with open(path, encoding="utf-8") as metrics:
+        lines = metrics.read().splitlines()
+    assert lines == [
+        "# TYPE app_call_duration_seconds summary",
+        'app_call_duration_seconds{operation="get_states",quantile="0.5"} 0.03',
+        'app_call_duration_seconds{operation="get_states",quantile="0.95"} 0.05',
+        'app_call_duration_seconds{operation="get_states",quantile="0.99"} 0.05',
+        'app_call_duration_seconds_sum{operation="get_states"} 0.15',
+        'app_call_duration_seconds_count{operation="get_states"} 5',
+        "# TYPE app_call_failures_total counter",
+        'app_call_failures_total{operation="get_states"} 1',
+        "# TYPE app_connection_wait_seconds_total counter",
+        'app_connection_wait_seconds_total{operation="get_states"} 0.004',
+        "# TYPE app_query_seconds_total counter",
+        'app_query_seconds_total{operation="get_states"} 0.008',
+        "# TYPE app_rows_fetched_total counter",
+        'app_rows_fetched_total{operation="get_states"} 20',
+        "# TYPE app_bytes_fetched_total counter",
+        'app_bytes_fetched_total{operation="get_states"} 160',
+        "# TYPE app_slow_queries_total counter",
+        'app_slow_queries_total{operation="get_states"} 0',
+    ]
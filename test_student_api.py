@@ -0,0 +1,173 @@
+"""
+REST service against a temporary SQLite database, through aiohttp's test client.
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+from aiohttp.test_utils import TestClient, TestServer
+
+import student_api
+from connect_database import DatabaseManager
+from storage_backends import SQLiteBackend
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(tmp_path / "students.sqlite3")), pool_size=2)
+    manager.add_students_bulk([
+        ("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com"),
+        ("Jean", "Roy", "Laval", "Québec", "jean@mail.ca"),
+    ])
+    return manager  # closed with the application
+
+
+def run(db, scenario):
+    """
+    Run `scenario(client)` against a service serving `db`
+    """
+    async def main():
+        async with TestClient(TestServer(student_api.create_app(db))) as client:
+            await scenario(client)
+    asyncio.run(main())
+
+
+def count_calls(db, name):
+    calls = []
+    method = getattr(db, name)
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return method(*args, **kwargs)
+    setattr(db, name, counted)
+    return calls
+
+
+def test_unchanged_page_is_not_read_again(db):
+    reads = count_calls(db, "get_students_page")
+
+    async def scenario(client):
+        response = await client.get("/students")
+        assert response.status == 200
+        etag = response.headers["ETag"]
+        assert [student["firstName"] for student in (await response.json())["students"]] == ["Marie", "Jean"]
+
+        response = await client.get("/students", headers={"If-None-Match": etag})
+        assert response.status == 304 and response.headers["ETag"] == etag
+        assert len(reads) == 1
+
+        db.add_student("Luc", "Côté", "Laval", "Québec", "luc@mail.ca")
+        response = await client.get("/students", headers={"If-None-Match": etag})
+        assert response.status == 200 and response.headers["ETag"] != etag
+        assert len((await response.json())["students"]) == 3
+    run(db, scenario)
+
+
+def test_student_etag_follows_its_version(db):
+    reads = count_calls(db, "get_student_by_id")
+
+    async def scenario(client):
+        response = await client.get("/students/1")
+        etag = response.headers["ETag"]
+        assert (await response.json())["version"] == 1
+
+        response = await client.get("/students/1", headers={"If-None-Match": etag})
+        assert response.status == 304
+        assert len(reads) == 1
+
+        # Another student changed: read again, but this one still has the same version
+        db.update_student(2, "Jean", "Roy", "Longueuil", "Québec", "jean@mail.ca")
+        response = await client.get("/students/1", headers={"If-None-Match": etag})
+        assert response.status == 304 and response.headers["ETag"] != etag
+        assert len(reads) == 2
+
+        db.update_student(1, "Marie", "Gagnon", "Montréal", "Québec", "marie@example.com")
+        response = await client.get("/students/1?fields=studentId,lastName", headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert await response.json() == {"studentId": 1, "lastName": "Gagnon"}
+        assert response.headers["ETag"].endswith('-2"')
+    run(db, scenario)
+
+
+def test_stale_version_is_a_conflict_with_the_current_student(db):
+    async def scenario(client):
+        body = {"firstName": "Marie", "lastName": "Gagnon", "city": "Montréal", "state": "Québec",
+                "emailAddress": "marie@example.com", "version": 1}
+        response = await client.put("/students/1", json=body)
+        assert response.status == 200 and (await response.json())["version"] == 2
+
+        response = await client.put("/students/1", json=dict(body, lastName="Roy"))
+        assert response.status == 409
+        assert (await response.json())["current"]["lastName"] == "Gagnon"
+
+        response = await client.delete("/students/1?version=1")
+        assert response.status == 409
+        assert (await response.json())["current"]["version"] == 2
+    run(db, scenario)
+
+
+def test_missing_student(db):
+    async def scenario(client):
+        body = {"firstName": "Marie", "lastName": "Roy", "city": "Montréal", "state": "Québec",
+                "emailAddress": "marie@example.com"}
+        assert (await client.get("/students/99")).status == 404
+        assert (await client.put("/students/99", json=body)).status == 404
+        assert (await client.delete("/students/99")).status == 404
+    run(db, scenario)
+
+
+@pytest.mark.parametrize("path", [
+    "/students?limit=abc",
+    "/students?after=-1",
+    "/students?field=nope",
+    "/students/search?q=marie&fields=studentId,nope",
+    "/students/search?q=marie&fields=,",
+    "/students/1?fields=password",
+    "/students/1?version=x",
+])
+def test_bad_parameters(db, path):
+    async def scenario(client):
+        method = client.delete if "version" in path else client.get
+        response = await method(path)
+        assert response.status == 400
+        assert "error" in await response.json()
+    run(db, scenario)
+
+
+def test_large_bodies_are_compressed(db):
+    db.add_students_bulk((f"Prénom{i}", "Roy", "Laval", "Québec", f"gros{i}@example.com") for i in range(50))
+
+    async def scenario(client):
+        response = await client.get("/students", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len((await response.json())["students"]) == 52
+
+        response = await client.get("/students/1", headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in response.headers  # below COMPRESS_MIN_BYTES
+        assert (await response.json())["firstName"] == "Marie"
+    run(db, scenario)
+
+
+def test_write_of_another_client_reaches_the_caches(tmp_path):
+    path = str(tmp_path / "students.sqlite3")
+    db = DatabaseManager(backend=SQLiteBackend(path), pool_size=2, cache_max_rows=1000)
+    db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    other = DatabaseManager(backend=SQLiteBackend(path), pool_size=1)
+
+    async def scenario(client):
+        response = await client.get("/students")
+        etag = response.headers["ETag"]
+        assert (await client.get("/states/Québec/cities")).status == 200
+        assert (await client.get("/reports/enrolments")).status == 200
+        other.update_student(1, "Marie", "Tremblay", "Gatineau", "Québec", "marie@example.com")
+        # Read within the refresh interval of the caches (students, cities, report)
+        response = await client.get("/students", headers={"If-None-Match": etag})
+        assert response.status == 200
+        assert (await response.json())["students"][0]["city"] == "Gatineau"
+        assert await (await client.get("/states/Québec/cities")).json() == ["Gatineau"]
+        assert (await (await client.get("/reports/enrolments")).json())["cities"] == [["Québec", "Gatineau", 1]]
+    try:
+        run(db, scenario)
+    finally:
+        other.close()
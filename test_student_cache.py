@@ -0,0 +1,152 @@
+"""
+StudentCache against a temporary SQLite database: loading, change log refreshes and counts.
+"""
+import threading
+
+import pytest
+
+from connect_database import DatabaseManager
+from storage_backends import SQLiteBackend
+from student_cache import StudentCache
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(tmp_path / "students.sqlite3")), pool_size=3)
+    manager.add_students_bulk([
+        ("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com"),
+        ("Jean", "Roy", "Laval", "Québec", "jean@mail.ca"),
+        ("Sophie", "Gagnon", "Toronto", "Ontario", "sophie@example.com"),
+        ("Luc", "Côté", "Montréal", "Québec", "luc@mail.ca"),
+    ])
+    yield manager
+    manager.close()
+
+
+def execute(db, query, params=()):
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        return cursor.lastrowid
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def assert_counts_match_database(db, cache):
+    db.invalidate_location_cache()
+    assert cache.get_locations() == db.get_location_counts()
+    assert cache.get_email_domains() == db._grouped_counts(db.EMAIL_DOMAIN_EXPRESSION, "")
+    assert cache.get_enrolments() == db._grouped_counts(db.ENROLMENT_MONTH_EXPRESSION, "")
+
+
+def fail_after(db, rows):
+    """
+    Make iter_students fail with a database error after yielding `rows` students
+    """
+    iter_students = db.iter_students
+
+    def failing(*args, **kwargs):
+        assert kwargs.get("raise_errors")
+        for count, student in enumerate(iter_students(*args, **kwargs)):
+            if count == rows:
+                raise db.backend.Error("connexion perdue")
+            yield student
+    db.iter_students = failing
+    return lambda: setattr(db, "iter_students", iter_students)
+
+
+def test_serves_the_table(db):
+    cache = StudentCache(db)
+    assert [student.firstName for student in cache.get_all()] == ["Marie", "Jean", "Sophie", "Luc"]
+    assert [student.studentId for student in cache.get_page(2, 10)] == [3, 4]
+    assert cache.get(3) == (True, db.get_student_by_id(3))
+    assert_counts_match_database(db, cache)
+
+
+def test_partial_first_load_is_never_cached(db):
+    restore = fail_after(db, 2)
+    cache = StudentCache(db)
+    assert cache.get_all() is None
+    assert cache.get(1) == (False, None)
+    assert cache.get_stats()["rows"] == 0
+    restore()
+    assert len(cache.get_all()) == 4
+
+
+def test_failed_reload_keeps_the_previous_copy(db):
+    cache = StudentCache(db, full_reload_interval=0)
+    assert len(cache.get_all()) == 4
+    restore = fail_after(db, 2)
+    assert len(cache.get_all()) == 4  # reload failed: previous copy still served
+    assert cache.get_stats()["full_loads"] == 1
+    restore()
+    assert len(cache.get_all()) == 4
+    assert cache.get_stats()["full_loads"] == 2
+
+
+def test_readers_are_not_blocked_by_a_reload(db):
+    cache = StudentCache(db, full_reload_interval=0)
+    assert len(cache.get_all()) == 4
+    streaming, release = threading.Event(), threading.Event()
+    iter_students = db.iter_students
+
+    def slow(*args, **kwargs):
+        streaming.set()
+        release.wait(10)
+        yield from iter_students(*args, **kwargs)
+    db.iter_students = slow
+    loader = threading.Thread(target=cache.get_all)
+    loader.start()
+    assert streaming.wait(10)
+    # Served from the previous copy while the other thread streams the table
+    served = []
+    reader = threading.Thread(target=lambda: served.append(cache.get(1)))
+    reader.start()
+    reader.join(2)
+    release.set()
+    assert served == [(True, db.get_student_by_id(1))]
+    loader.join(10)
+    assert cache.get_stats()["full_loads"] == 2
+
+
+def test_max_rows_turns_the_cache_off(db):
+    cache = StudentCache(db, max_rows=3)
+    assert cache.get_all() is None
+    assert cache.get_stats()["enabled"] is False
+
+    cache = StudentCache(db, max_rows=4, refresh_interval=0)
+    assert len(cache.get_all()) == 4
+    db.add_student("Anne", "Roy", "Laval", "Québec", "anne@example.com")
+    assert cache.get_all() is None  # grew past max_rows on a refresh
+    assert cache.get_stats()["enabled"] is False
+
+
+def test_refresh_applies_changes_and_counts(db):
+    cache = StudentCache(db, refresh_interval=0)
+    assert len(cache.get_all()) == 4
+    db.update_student(1, "Marie", "Tremblay", "Gatineau", "Québec", "marie@mail.ca")
+    db.delete_student(3)
+    new_id = db.add_student("Anne", "Roy", "Calgary", "Alberta", "anne@example.org")
+    assert [student.studentId for student in cache.get_all()] == [1, 2, 4, new_id]
+    assert cache.get(1)[1].city == "Gatineau"
+    assert cache.get(3) == (True, None)
+    assert cache.get_locations() == {"Québec": {"Gatineau": 1, "Laval": 1, "Montréal": 1}, "Alberta": {"Calgary": 1}}
+    assert_counts_match_database(db, cache)
+    assert cache.get_stats()["full_loads"] == 1
+
+
+def test_refresh_rereads_the_overlap_window(db):
+    cache = StudentCache(db, refresh_interval=0)
+    assert len(cache.get_all()) == 4
+    last = db.get_last_change_id()
+    # The log moves far ahead, then an entry numbered before that position becomes visible late
+    execute(db, "INSERT INTO student_changes (changeId, studentId) VALUES (%s, 2)", (last + 100,))
+    assert len(cache.get_all()) == 4
+    execute(db, "UPDATE students_info SET city = 'Québec', version = version + 1 WHERE studentId = 4")
+    execute(db, "UPDATE student_changes SET changeId = %s WHERE changeId = %s", (last + 50, last + 101))
+    db.update_student(2, "Jean", "Roy", "Longueuil", "Québec", "jean@mail.ca")
+    assert cache.get(4)[1].city == "Québec"
+    assert cache.get(2)[1].city == "Longueuil"
+    assert_counts_match_database(db, cache)
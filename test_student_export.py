@@ -0,0 +1,125 @@
+"""
+Exports of a temporary SQLite database to CSV, XLSX and Parquet.
+"""
+import csv
+import os
+
+import pytest
+
+from connect_database import DatabaseManager
+from storage_backends import SQLiteBackend
+from student_export import COLUMNS, ExportCancelled, export_students
+from student_import import import_students
+
+STUDENTS = [
+    ("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com"),
+    ("Jean", "Roy", "Laval", "Québec", "jean@mail.ca"),
+    ("Sophie", "Gagnon", "Toronto", "Ontario", "sophie@example.com"),
+    ("Zoé", "Côté", "Lévis", "Québec", "zoe@mail.ca"),
+    ("Luc", "D'Amours, fils", "Québec", "Québec", 'luc"@mail.ca'),  # quotes and comma in a CSV field
+]
+
+
+def database(path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(path)), pool_size=2)
+    manager.add_students_bulk(STUDENTS)
+    return manager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = database(tmp_path / "students.sqlite3")
+    yield manager
+    manager.close()
+
+
+def expected_rows(db):
+    return [tuple(student[:6]) for student in db.get_all_students()]
+
+
+def test_csv(db, tmp_path):
+    path = str(tmp_path / "etudiants.csv")
+    progress = []
+    assert export_students(db, path, chunk_size=2,
+                           progress=lambda written, total: progress.append((written, total))) == 5
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    with open(path, "rb") as raw:
+        assert raw.read(3) == b"\xef\xbb\xbf"  # BOM: Excel reads the file as UTF-8
+    with open(path, encoding="utf-8-sig", newline="") as csv_file:
+        header, *rows = list(csv.reader(csv_file))
+    assert tuple(header) == COLUMNS
+    assert [(int(row[0]),) + tuple(row[1:]) for row in rows] == expected_rows(db)
+    assert not os.path.exists(path + ".part")
+
+
+def test_csv_round_trip(db, tmp_path):
+    path = str(tmp_path / "etudiants.csv")
+    export_students(db, path)
+    copy = DatabaseManager(backend=SQLiteBackend(str(tmp_path / "copie.sqlite3")), pool_size=2)
+    try:
+        report = import_students(copy, path, workers=0)
+        assert (report["imported"], report["rejected"]) == (5, 0)
+        assert [student[1:6] for student in expected_rows(copy)] == [student[1:6] for student in expected_rows(db)]
+    finally:
+        copy.close()
+
+
+def test_search_export(db, tmp_path):
+    path = str(tmp_path / "ontario.csv")
+    progress = []
+    assert export_students(db, path, search_term="Ontario", search_field="state",
+                           progress=lambda written, total: progress.append((written, total))) == 1
+    assert progress == [(1, None)]  # no total for a search
+
+
+def test_xlsx(db, tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = str(tmp_path / "etudiants.xlsx")
+    assert export_students(db, path, chunk_size=2) == 5
+    sheet = openpyxl.load_workbook(path, read_only=True)["Students"]
+    header, *rows = sheet.iter_rows(values_only=True)
+    assert header == COLUMNS
+    assert rows == expected_rows(db)
+
+
+def test_parquet(db, tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "etudiants.parquet")
+    assert export_students(db, path, chunk_size=2) == 5
+    parquet_file = parquet.ParquetFile(path)
+    assert parquet_file.metadata.num_row_groups == 3  # one per chunk
+    table = parquet_file.read()
+    assert tuple(table.column_names) == COLUMNS
+    assert list(zip(*(table.column(name).to_pylist() for name in COLUMNS))) == expected_rows(db)
+
+
+@pytest.mark.parametrize("extension", ["csv", "xlsx", "parquet"])
+def test_cancelled_export_leaves_nothing(db, tmp_path, extension):
+    if extension != "csv":
+        pytest.importorskip({"xlsx": "openpyxl", "parquet": "pyarrow"}[extension])
+    path = tmp_path / f"etudiants.{extension}"
+    polls = []
+
+    def is_cancelled():
+        polls.append(None)
+        return len(polls) == 2  # after the first chunk is written
+    with pytest.raises(ExportCancelled):
+        export_students(db, str(path), chunk_size=2, is_cancelled=is_cancelled)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("etudiants")]  # nor its .part
+
+
+def test_failed_export_leaves_nothing(db, tmp_path):
+    iter_students = db.iter_students
+
+    def failing(*args, **kwargs):
+        yield from iter_students(*args, **kwargs)
+        raise db.backend.Error("connexion perdue")
+    db.iter_students = failing
+    with pytest.raises(db.backend.Error):
+        export_students(db, str(tmp_path / "etudiants.csv"), chunk_size=2)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("etudiants")]
+
+
+def test_unknown_format(db, tmp_path):
+    with pytest.raises(ValueError, match=".txt"):
+        export_students(db, str(tmp_path / "etudiants.txt"))
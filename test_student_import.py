@@ -0,0 +1,89 @@
+"""
+CSV import into a temporary SQLite database, with its reject file.
+"""
+import csv
+
+import pytest
+
+from connect_database import DatabaseManager
+from storage_backends import SQLiteBackend
+from student_import import import_students
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(tmp_path / "students.sqlite3")), pool_size=2)
+    manager.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    yield manager
+    manager.close()
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8-sig", newline="") as csv_file:
+        csv.writer(csv_file).writerows(rows)
+    return str(path)
+
+
+def read_rejects(path):
+    with open(path, encoding="utf-8-sig", newline="") as csv_file:
+        return list(csv.reader(csv_file))
+
+
+ROWS = [
+    ("Courriel", "Prénom", "Nom", "Ville", "Province"),  # aliases, any order
+    ("jean@mail.ca", "Jean", "Roy", "Laval", "Québec"),  # line 2
+    ("marie@example.com", "Marie", "Gagnon", "Toronto", "Ontario"),  # 3: already in the database
+    ("luc@mail", "Luc", "Côté", "Laval", "Québec"),  # 4: invalid email
+    ("", "", "", "", ""),  # 5: blank line, skipped
+    ("jean@mail.ca", "Jean", "Bis", "Laval", "Québec"),  # 6: duplicate of line 2
+    ("anne@mail.ca", "Anne", "", "Laval", "Québec"),  # 7: missing last name
+    ("sophie@example.com", "Sophie", "Gagnon", "Toronto", "Ontario"),  # 8
+    ("Marie@Example.com", "Marie", "Roy", "Laval", "Québec"),  # 9: another email for SQLite's unique index
+]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_import_writes_valid_rows_and_rejects_the_others(db, tmp_path, workers):
+    path = write_csv(tmp_path / "inscriptions.csv", ROWS)
+    report = import_students(db, path, chunk_size=2, batch_size=2, workers=workers)
+    assert (report["read"], report["valid"], report["imported"], report["rejected"]) == (7, 3, 3, 4)
+    assert sorted(student.emailAddress for student in db.get_all_students()) == \
+        ["Marie@Example.com", "jean@mail.ca", "marie@example.com", "sophie@example.com"]
+    assert db.get_student_by_id(1).lastName == "Tremblay"
+
+    header, *rejects = read_rejects(report["reject_path"])
+    assert report["reject_path"] == str(tmp_path / "inscriptions.rejets.csv")
+    assert header == ["line", "firstName", "lastName", "city", "state", "emailAddress", "code", "reason"]
+    assert [(line, code) for line, *_, code, _ in rejects] == [
+        ("3", "duplicate_in_database"), ("4", "email_domain_without_dot"), ("6", "duplicate_in_file"),
+        ("7", "missing_field")]
+    assert rejects[0][1:6] == ["Marie", "Gagnon", "Toronto", "Ontario", "marie@example.com"]
+
+
+def test_dry_run_writes_nothing(db, tmp_path):
+    path = write_csv(tmp_path / "inscriptions.csv", ROWS)
+    rejects = str(tmp_path / "rejets.csv")
+    report = import_students(db, path, dry_run=True, reject_path=rejects, workers=0)
+    assert (report["valid"], report["imported"], report["rejected"]) == (3, 0, 4)
+    assert db.get_student_count() == 1
+    assert len(read_rejects(rejects)) == 5
+
+
+def test_rows_refused_by_the_database_are_rejected(db, tmp_path):
+    path = write_csv(tmp_path / "inscriptions.csv",
+                     ROWS[:2] + [("x" * 50 + "@mail.ca", "Long", "Email", "Laval", "Québec")])
+    # SQLite does not enforce VARCHAR lengths: refuse the row with a trigger instead
+    conn = db.get_connection()
+    conn.cursor().execute("CREATE TRIGGER refuse_long BEFORE INSERT ON students_info "
+                          "WHEN length(new.emailAddress) > 45 BEGIN SELECT RAISE(ABORT, 'email trop long'); END")
+    conn.close()
+    report = import_students(db, path, workers=0)
+    assert (report["valid"], report["imported"], report["rejected"]) == (2, 1, 1)
+    (line, *_, code, reason), = read_rejects(report["reject_path"])[1:]
+    assert (line, code, reason) == ("3", "database_error", "email trop long")
+
+
+def test_missing_column(db, tmp_path):
+    path = write_csv(tmp_path / "inscriptions.csv", [("firstName", "lastName", "city", "state")])
+    with pytest.raises(ValueError, match="emailAddress"):
+        import_students(db, path, workers=0)
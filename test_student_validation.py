@@ -0,0 +1,99 @@
+"""
+Validation rules: the regular expression fast path must agree with the rules it stands for.
+"""
+import re
+
+import pytest
+
+import student_validation
+from student_validation import (EMAIL_BAD_EDGE, EMAIL_DOMAIN_WITHOUT_DOT, EMAIL_DOUBLE_DOT, EMAIL_EMPTY_PART,
+                                EMAIL_MISSING_AT, EMAIL_MULTIPLE_AT, MESSAGES, MISSING_FIELD, check_email,
+                                check_rows, check_student, validate_student)
+
+EMAILS = [
+    ("jean@mail.ca", None),
+    ("a@b.c", None),
+    ("jean+inscriptions@mail.ca", None),
+    ("jean.roy@etu.mail.ca", None),
+    ("jean.@mail.ca", None),
+    ("jean@.mail.ca", None),
+    ("élève@école.fr", None),  # internationalized local part and domain
+    ("jean@bücher.de", None),
+    ('"jean roy"@mail.ca', None),  # quoted local part
+    ("jean roy@mail.ca", None),
+    (" jean@mail.ca ", None),  # surrounding spaces are ignored
+    ("jean@mail.ca\n", None),
+    ("\tjean@mail.ca", None),
+    ("", EMAIL_MISSING_AT),
+    ("jean.mail.ca", EMAIL_MISSING_AT),
+    ("jean@@mail.ca", EMAIL_MULTIPLE_AT),
+    ('"a@b"@mail.ca', EMAIL_MULTIPLE_AT),
+    ("jean@mail.ca@", EMAIL_MULTIPLE_AT),
+    ("@", EMAIL_EMPTY_PART),
+    ("@mail.ca", EMAIL_EMPTY_PART),
+    ("jean@", EMAIL_EMPTY_PART),
+    ("jean@mail", EMAIL_DOMAIN_WITHOUT_DOT),
+    ("jean@localhost ", EMAIL_DOMAIN_WITHOUT_DOT),
+    ("jean..roy@mail.ca", EMAIL_DOUBLE_DOT),
+    ("jean@mail..ca", EMAIL_DOUBLE_DOT),
+    ("jean@mail.ca..", EMAIL_DOUBLE_DOT),
+    ("jean@mail.ca.", EMAIL_BAD_EDGE),  # trailing dot
+    (".jean@mail.ca", EMAIL_BAD_EDGE),
+    ("jean@.", EMAIL_BAD_EDGE),
+]
+
+
+@pytest.fixture
+def rules_only(monkeypatch):
+    # A pattern that never matches: every email goes through the rule-by-rule checks
+    monkeypatch.setattr(student_validation, "_VALID_EMAIL", re.compile(r"(?!)"))
+
+
+@pytest.mark.parametrize("email, code", EMAILS)
+def test_email_fast_path(email, code):
+    assert check_email(email) == code
+
+
+@pytest.mark.parametrize("email, code", EMAILS)
+def test_email_rules(rules_only, email, code):
+    assert check_email(email) == code
+
+
+def test_batch_reports_the_same_codes():
+    rows = [("Jean", "Roy", "Laval", "Québec", email) for email, _ in EMAILS]
+    errors = {row: error.code for row, error in check_rows(rows)}
+    # An empty email is a missing field for a whole record
+    assert errors == {row: code if email else MISSING_FIELD
+                      for row, (email, code) in enumerate(EMAILS) if code is not None}
+
+
+def test_student_reports_the_first_broken_rule():
+    assert check_student("Jean", "Roy", "Laval", "Québec", "jean@mail.ca") is None
+    # Missing fields in the order of the form: first name, last name, email, state, city
+    assert check_student("", "", "", "", "").field == "first_name"
+    assert check_student("Jean", "", "", "", "").field == "last_name"
+    assert check_student("Jean", "Roy", "", "", "").field == "email"
+    assert check_student("Jean", "Roy", "", "", "jean@mail.ca").field == "state"
+    assert check_student("Jean", "Roy", "", "Québec", "jean@mail.ca") == \
+        (MISSING_FIELD, "city", MESSAGES[MISSING_FIELD])
+    assert check_student("Jean", "Roy", "Laval", "Québec", "jean@mail") == \
+        (EMAIL_DOMAIN_WITHOUT_DOT, "email", MESSAGES[EMAIL_DOMAIN_WITHOUT_DOT])
+    assert validate_student("Jean", "Roy", "Laval", "Québec", "jean") == MESSAGES[EMAIL_MISSING_AT]
+
+
+def test_rows():
+    assert check_rows([]) == []
+    valid = ("Jean", "Roy", "Laval", "Québec", "jean@mail.ca")
+    assert check_rows([valid] * 3) == []
+    rows = [
+        valid,
+        ("Marie", "", "Laval", "Québec", "marie@mail"),  # missing field wins over the email
+        ("Luc", "Côté", "", "Québec", "luc@mail.ca"),
+        ("Anne", "Roy", "Laval", "Québec", "anne@mail..ca"),
+        valid,
+    ]
+    assert [(row, error.code, error.field) for row, error in check_rows(rows)] == [
+        (1, MISSING_FIELD, "last_name"),
+        (2, MISSING_FIELD, "city"),
+        (3, EMAIL_DOUBLE_DOT, "email"),
+    ]
@@ -0,0 +1,145 @@
+"""
+WriteBehindQueue against a temporary SQLite database and journal.
+
+Batches are sent by calling _flush() from the test thread, so the signals
+are delivered right away and the order of the steps is under control.
+"""
+import sqlite3
+import time
+
+import pytest
+
+from connect_database import DatabaseManager
+from storage_backends import SQLiteBackend
+from write_behind import CONFLICT, REFUSED, WriteBehindQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(backend=SQLiteBackend(str(tmp_path / "students.sqlite3")), pool_size=2)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "journal.sqlite3")
+
+
+@pytest.fixture
+def queue(db, journal_path):
+    write_queue = WriteBehindQueue(db, journal_path)
+    write_queue.events = []
+    write_queue.written.connect(lambda entry, student: write_queue.events.append(("written", entry, student)))
+    write_queue.rejected.connect(
+        lambda entry, reason, message, current: write_queue.events.append((reason, entry, current)))
+    yield write_queue
+    write_queue.stop()
+
+
+def test_adds_and_updates_are_sent(db, queue):
+    student_id = db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    add = queue.enqueue_add(("Jean", "Roy", "Laval", "Québec", "jean@example.com"))
+    update = queue.enqueue_update(db.get_student_by_id(student_id),
+                                  ("Marie", "Gagnon", "Montréal", "Québec", "marie@example.com"))
+    assert add.as_student().studentId == -add.write_id
+    assert queue._flush() is None
+    assert queue.pending_count() == 0
+    assert [(event, entry.write_id) for event, entry, _ in queue.events] == \
+        [("written", add.write_id), ("written", update.write_id)]
+    assert queue.events[0][2].emailAddress == "jean@example.com"
+    student = db.get_student_by_id(student_id)
+    assert (student.lastName, student.version) == ("Gagnon", 2)
+
+
+def test_journal_is_replayed_after_a_restart(db, queue, journal_path):
+    queue.enqueue_add(("Jean", "Roy", "Laval", "Québec", "jean@example.com"))
+    queue.enqueue_add(("Luc", "Côté", "Montréal", "Québec", "luc@example.com"))
+    queue.stop()  # nothing sent yet
+
+    restarted = WriteBehindQueue(db, journal_path, flush_delay=0)
+    assert [entry.fields[4] for entry in restarted.pending()] == ["jean@example.com", "luc@example.com"]
+    restarted.start()
+    try:
+        deadline = time.monotonic() + 10
+        while restarted.pending_count() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert restarted.pending_count() == 0
+    finally:
+        restarted.stop()
+    assert sorted(student.emailAddress for student in db.get_all_students()) == \
+        ["jean@example.com", "luc@example.com"]
+
+
+def test_refused_update_is_split_from_its_batch(db, queue):
+    marie = db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    jean = db.add_student("Jean", "Roy", "Laval", "Québec", "jean@example.com")
+    good = queue.enqueue_update(db.get_student_by_id(marie),
+                                ("Marie", "Gagnon", "Montréal", "Québec", "marie@example.com"))
+    # Duplicate email: the batch transaction is rolled back, then each update is retried alone
+    bad = queue.enqueue_update(db.get_student_by_id(jean), ("Jean", "Roy", "Laval", "Québec", "marie@example.com"))
+    assert queue._flush() is None
+    assert queue.pending_count() == 0
+    assert sorted((event, entry.write_id) for event, entry, _ in queue.events) == \
+        sorted([("written", good.write_id), (REFUSED, bad.write_id)])
+    assert db.get_student_by_id(marie)[2] == "Gagnon"
+    assert db.get_student_by_id(jean)[5:7] == ("jean@example.com", 1)
+
+
+def test_update_queued_behind_a_written_one_expects_its_version(db, queue):
+    student_id = db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    base = db.get_student_by_id(student_id)
+    first = queue.enqueue_update(base, ("Marie", "Gagnon", "Montréal", "Québec", "marie@example.com"))
+    batch = queue._take_batch()
+    # The first update is being sent: the second one is queued behind it, not merged into it
+    second = queue.enqueue_update(base, ("Marie", "Gagnon", "Laval", "Québec", "marie@example.com"))
+    assert second.write_id != first.write_id and second.expected_version == 1
+    assert queue._flush_updates(batch) is None
+    queue._in_flight.clear()
+    assert [entry.expected_version for entry in queue.pending()] == [2]
+    assert queue._flush() is None
+    assert [event for event, _, _ in queue.events] == ["written", "written"]
+    student = db.get_student_by_id(student_id)
+    assert (student.city, student.version) == ("Laval", 3)
+
+
+def test_update_of_a_student_changed_meanwhile_is_a_conflict(db, queue):
+    student_id = db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    base = db.get_student_by_id(student_id)
+    queue.enqueue_update(base, ("Marie", "Gagnon", "Montréal", "Québec", "marie@example.com"))
+    db.update_student(student_id, "Marie", "Roy", "Montréal", "Québec", "marie@example.com")
+    assert queue._flush() is None
+    (event, _, current), = queue.events
+    assert event == CONFLICT and current[2] == "Roy"
+    assert queue.pending_count() == 0
+
+
+def test_writes_being_sent_cannot_be_amended_or_cancelled(queue):
+    add = queue.enqueue_add(("Jean", "Roy", "Laval", "Québec", "jean@example.com"))
+    other = queue.enqueue_add(("Luc", "Côté", "Montréal", "Québec", "luc@example.com"))
+    assert queue.cancel(other.write_id)
+    batch = queue._take_batch()
+    assert [entry.write_id for entry in batch] == [add.write_id]
+    assert queue.amend(add.write_id, ("Jean", "Roy", "Québec", "Québec", "jean@example.com")) is None
+    assert not queue.cancel(add.write_id)
+    assert queue._flush_adds(batch) is None
+    queue._in_flight.clear()
+    # Written and gone from the journal
+    assert queue.amend(add.write_id, ("Jean", "Roy", "Québec", "Québec", "jean@example.com")) is None
+    assert not queue.cancel(add.write_id)
+    assert queue.events[0][2].city == "Laval"
+
+
+def test_failed_journal_cleanup_is_rolled_back(db, queue):
+    student_id = db.add_student("Marie", "Tremblay", "Montréal", "Québec", "marie@example.com")
+    queue.enqueue_update(db.get_student_by_id(student_id),
+                         ("Marie", "Gagnon", "Montréal", "Québec", "marie@example.com"))
+    queue._journal.execute("CREATE TRIGGER no_delete BEFORE DELETE ON pending_writes "
+                           "BEGIN SELECT RAISE(ABORT, 'disque plein'); END")
+    with pytest.raises(sqlite3.Error, match="disque plein"):
+        queue._flush()
+    assert not queue._journal.in_transaction
+    queue._journal.execute("DROP TRIGGER no_delete")
+    # The journal is still usable and the write is still there
+    queue.enqueue_add(("Jean", "Roy", "Laval", "Québec", "jean@example.com"))
+    assert queue.pending_count() == 2
@@ -0,0 +1,369 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from PySide6.QtCore import QObject, Signal
+
+from student_record import Student
+
+# Journal columns holding the fields, in the argument order of DatabaseManager.add_student
+_FIELD_COLUMNS = ("firstName", "lastName", "city", "state", "emailAddress")
+
+# Reasons of a rejected write
+REFUSED = "refused"  # the database refused the values (duplicate email...)
+CONFLICT = "conflict"  # the student was changed by someone else since the edit
+DELETED = "deleted"  # the student no longer exists
+
+
+class PendingWrite(NamedTuple):
+    """
+    A student write waiting in the journal
+    """
+    write_id: int
+    kind: str  # "add" or "update"
+    student_id: Optional[int]  # updated student, None for an add
+    expected_version: Optional[int]  # version the update applies to
+    fields: Tuple[str, str, str, str, str]  # (first_name, last_name, city, state, email)
+    base: Optional[Student]  # student the update was made on
+    attempts: int
+    last_error: Optional[str]
+
+    def as_student(self) -> Student:
+        """
+        Student shown until the write reaches the database (an add has the negative write_id as ID)
+        """
+        first_name, last_name, city, state, email = self.fields
+        if self.kind == "add":
+            return Student(-self.write_id, first_name, last_name, state, city, email, None)
+        return self.base._replace(firstName=first_name, lastName=last_name, state=state, city=city,
+                                  emailAddress=email)
+
+
+class WriteBehindQueue(QObject):
+    """
+    Write-behind queue for the student form: adds and updates are committed to
+    a local SQLite journal, which takes a few milliseconds, and a background
+    thread sends them to the database in batches.
+
+    Adds go through DatabaseManager.insert_students (one transaction per batch)
+    and updates through update_students with the version they were made on,
+    so the usual optimistic concurrency applies. A write the database refuses
+    (duplicate email, student changed or deleted by someone else) leaves the
+    journal and is reported by `rejected`; when the database fails or cannot
+    be reached, the batch stays in the journal and is retried with an
+    exponential backoff. The journal survives a restart of the application.
+
+    Signals are emitted from the background thread; connections to GUI
+    objects are queued to the event loop.
+    """
+
+    # (PendingWrite, student tuple as stored, or None if it could not be read back)
+    written = Signal(object, object)
+    # (PendingWrite, reason: REFUSED/CONFLICT/DELETED, message, current student tuple for a CONFLICT)
+    rejected = Signal(object, str, str, object)
+    # (number of writes in the journal, last error message or "")
+    state_changed = Signal(int, str)
+
+    def __init__(self, db, journal_path: str, batch_size: int = 200, flush_delay: float = 0.2,
+                 max_retry_delay: float = 60.0, parent=None):
+        """
+        Args:
+            db: DatabaseManager the writes go to
+            journal_path: SQLite file keeping the writes until they are sent
+            batch_size: Largest number of writes sent at once
+            flush_delay: Seconds to wait after a write for others to join its batch
+            max_retry_delay: Longest wait between two attempts while the database fails
+            parent: Parent QObject
+        """
+        super().__init__(parent)
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self.max_retry_delay = max_retry_delay
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._in_flight: set = set()  # write_ids being sent
+        self._journal = sqlite3.connect(journal_path, check_same_thread=False, isolation_level=None)
+        self._journal.execute("PRAGMA journal_mode = WAL")
+        # A write acknowledged to the user must survive a power failure
+        self._journal.execute("PRAGMA synchronous = FULL")
+        self._journal.execute(f"""
+            CREATE TABLE IF NOT EXISTS pending_writes (
+                writeId INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                studentId INTEGER,
+                expectedVersion INTEGER,
+                {", ".join(f"{column} TEXT" for column in _FIELD_COLUMNS)},
+                base TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lastError TEXT,
+                queuedAt TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def start(self):
+        """
+        Start the background thread (it sends what a previous session left in the journal)
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+            self._wake.set()
+
+    def stop(self, timeout: Optional[float] = 10.0):
+        """
+        Stop the background thread after the batch in progress; unsent writes stay in the journal
+        """
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            self._journal.close()
+
+    def enqueue_add(self, fields: Sequence[str]) -> PendingWrite:
+        """
+        Queue a new student
+
+        Args:
+            fields: (first_name, last_name, city, state, email)
+
+        Returns:
+            The queued write
+        """
+        with self._lock:
+            cursor = self._journal.execute(
+                f"INSERT INTO pending_writes (kind, {', '.join(_FIELD_COLUMNS)}) VALUES ('add', ?, ?, ?, ?, ?)",
+                tuple(fields))
+            entry = self._entry(cursor.lastrowid)
+        self._changed()
+        return entry
+
+    def enqueue_update(self, base: Student, fields: Sequence[str]) -> PendingWrite:
+        """
+        Queue new values for a student
+
+        A queued update of the same student that is not being sent yet is
+        amended instead, so it keeps the version the first edit was made on.
+
+        Args:
+            base: Student the changes were made on (its version is the one expected)
+            fields: (first_name, last_name, city, state, email)
+
+        Returns:
+            The queued write
+        """
+        with self._lock:
+            row = self._journal.execute(
+                "SELECT MAX(writeId) FROM pending_writes WHERE kind = 'update' AND studentId = ?",
+                (base.studentId,)).fetchone()
+            if row[0] is not None and row[0] not in self._in_flight:
+                self._set_fields(row[0], fields)
+                return self._entry(row[0])
+            # Behind an update being sent: the version it expects is fixed once that one is written
+            cursor = self._journal.execute(
+                f"INSERT INTO pending_writes (kind, studentId, expectedVersion, {', '.join(_FIELD_COLUMNS)}, base) "
+                f"VALUES ('update', ?, ?, ?, ?, ?, ?, ?, ?)",
+                (base.studentId, base.version) + tuple(fields) + (json.dumps(base, default=str),))
+            entry = self._entry(cursor.lastrowid)
+        self._changed()
+        return entry
+
+    def amend(self, write_id: int, fields: Sequence[str]) -> Optional[PendingWrite]:
+        """
+        Change the values of a queued write
+
+        Returns:
+            The amended write, or None if it is being sent or already gone
+        """
+        with self._lock:
+            if write_id in self._in_flight:
+                return None
+            self._set_fields(write_id, fields)
+            return self._entry(write_id)
+
+    def cancel(self, write_id: int) -> bool:
+        """
+        Drop a queued write
+
+        Returns:
+            False if it is being sent or already gone
+        """
+        with self._lock:
+            if write_id in self._in_flight:
+                return False
+            removed = self._journal.execute("DELETE FROM pending_writes WHERE writeId = ?", (write_id,)).rowcount
+        self._changed()
+        return removed == 1
+
+    def pending(self) -> List[PendingWrite]:
+        """
+        Get the writes still in the journal, oldest first
+        """
+        with self._lock:
+            return [self._to_entry(row) for row in self._journal.execute(self._SELECT + " ORDER BY writeId")]
+
+    def pending_count(self) -> int:
+        """
+        Get the number of writes still in the journal
+        """
+        with self._lock:
+            return self._journal.execute("SELECT COUNT(*) FROM pending_writes").fetchone()[0]
+
+    _SELECT = (f"SELECT writeId, kind, studentId, expectedVersion, {', '.join(_FIELD_COLUMNS)}, base, "
+               f"attempts, lastError FROM pending_writes")
+
+    @staticmethod
+    def _to_entry(row) -> PendingWrite:
+        base = json.loads(row[9]) if row[9] is not None else None
+        return PendingWrite(row[0], row[1], row[2], row[3], tuple(row[4:9]),
+                            Student(*base) if base is not None else None, row[10], row[11])
+
+    def _entry(self, write_id: int) -> Optional[PendingWrite]:
+        row = self._journal.execute(self._SELECT + " WHERE writeId = ?", (write_id,)).fetchone()
+        return None if row is None else self._to_entry(row)
+
+    def _set_fields(self, write_id: int, fields: Sequence[str]):
+        assignments = ", ".join(f"{column} = ?" for column in _FIELD_COLUMNS)
+        self._journal.execute(f"UPDATE pending_writes SET {assignments} WHERE writeId = ?",
+                              tuple(fields) + (write_id,))
+
+    def _changed(self, error: str = ""):
+        self.state_changed.emit(self.pending_count(), error)
+        self._wake.set()
+
+    def _run(self):
+        failures = 0
+        while not self._stopping.is_set():
+            # Idle until something is queued; after a failure, until the next attempt is due
+            self._wake.wait(None if failures == 0 else min(self.max_retry_delay, 2 ** (failures - 1)))
+            self._wake.clear()
+            if self._stopping.wait(self.flush_delay):
+                break
+            error = self._flush()
+            failures = failures + 1 if error else 0
+            self.state_changed.emit(self.pending_count(), error or "")
+
+    def _flush(self) -> Optional[str]:
+        """
+        Send the journal batch by batch; returns the error that stopped it, if any
+        """
+        while not self._stopping.is_set():
+            batch = self._take_batch()
+            if not batch:
+                return None
+            try:
+                error = self._flush_adds([entry for entry in batch if entry.kind == "add"])
+                error = self._flush_updates([entry for entry in batch if entry.kind == "update"]) or error
+            finally:
+                with self._lock:
+                    self._in_flight.clear()
+            if error:
+                return error
+        return None
+
+    def _take_batch(self) -> List[PendingWrite]:
+        with self._lock:
+            batch, students = [], set()
+            for row in self._journal.execute(self._SELECT + " ORDER BY writeId"):
+                entry = self._to_entry(row)
+                if entry.kind == "update":
+                    # One update per student and batch: the next one needs the version this one produces
+                    if entry.student_id in students:
+                        continue
+                    students.add(entry.student_id)
+                batch.append(entry)
+                if len(batch) == self.batch_size:
+                    break
+            self._in_flight = {entry.write_id for entry in batch}
+            return batch
+
+    def _flush_adds(self, entries: List[PendingWrite]) -> Optional[str]:
+        if not entries:
+            return None
+        report = self.db.insert_students([entry.fields for entry in entries])
+        added = [(entries[index], student) for index, student in report["added"]]
+        rejected = [(entries[index], message) for index, message in report["rejected"]]
+        self._remove([entry for entry, _ in added + rejected])
+        for entry, student in added:
+            self.written.emit(entry, student)
+        for entry, message in rejected:
+            self.rejected.emit(entry, REFUSED, message, None)
+        if report["error"]:
+            finished = {entry.write_id for entry, _ in added + rejected}
+            self._failed([entry for entry in entries if entry.write_id not in finished], report["error"])
+        return report["error"]
+
+    def _flush_updates(self, entries: List[PendingWrite]) -> Optional[str]:
+        if not entries:
+            return None
+        changes: Dict[int, Dict[str, str]] = {}
+        for entry in entries:
+            changes[entry.student_id] = dict(zip(_FIELD_COLUMNS, entry.fields))
+        versions = {entry.student_id: entry.expected_version for entry in entries}
+        report = self.db.update_students(changes, versions)
+        if report["error"]:
+            if not report["rejected"]:
+                self._failed(entries, report["error"])
+                return report["error"]
+            if len(entries) > 1:
+                # The whole batch was rolled back: send the updates one by one to find the refused one
+                errors = [self._flush_updates([entry]) for entry in entries]
+                return next((error for error in errors if error), None)
+            self._remove(entries)
+            self.rejected.emit(entries[0], REFUSED, report["error"], None)
+            return None
+
+        by_student = {entry.student_id: entry for entry in entries}
+        updated = [(by_student.pop(student.studentId), student) for student in report["updated"]]
+        conflicts = [(by_student.pop(student.studentId), student) for student in report["conflicts"]]
+        missing = list(by_student.values())
+        self._remove(entries, updated)
+        for entry, student in updated:
+            self.written.emit(entry, student)
+        for entry, student in conflicts:
+            self.rejected.emit(entry, CONFLICT, "L'étudiant a été modifié par un autre utilisateur", student)
+        for entry in missing:
+            self.rejected.emit(entry, DELETED, f"L'étudiant ID {entry.student_id} n'existe plus", None)
+        return None
+
+    def _remove(self, entries: List[PendingWrite], updated: Sequence[Tuple[PendingWrite, Student]] = ()):
+        """
+        Drop finished writes from the journal, in one transaction
+        """
+        if not entries:
+            return
+        with self._lock:
+            self._journal.execute("BEGIN IMMEDIATE")
+            # Commits, or rolls back if a statement fails (the connection is left out of the transaction)
+            with self._journal:
+                self._journal.executemany("DELETE FROM pending_writes WHERE writeId = ?",
+                                          [(entry.write_id,) for entry in entries])
+                # Updates queued behind a written one were made on the version it replaced
+                self._journal.executemany("""
+                    UPDATE pending_writes SET expectedVersion = ?
+                    WHERE kind = 'update' AND studentId = ? AND expectedVersion = ?
+                """, [(student.version, entry.student_id, entry.expected_version) for entry, student in updated])
+
+    def _failed(self, entries: List[PendingWrite], error: str):
+        with self._lock:
+            self._journal.executemany(
+                "UPDATE pending_writes SET attempts = attempts + 1, lastError = ? WHERE writeId = ?",
+                [(error, entry.write_id) for entry in entries])
+
+
+def write_queue_from_environment(db, parent=None) -> Optional[WriteBehindQueue]:
+    """
+    Build the write-behind queue selected by the STUDENTS_WRITE_BEHIND environment variable
+
+    STUDENTS_WRITE_BEHIND names the journal file; unset or empty, the form
+    writes to the database directly and None is returned.
+    """
+    journal_path = os.environ.get("STUDENTS_WRITE_BEHIND")
+    if not journal_path:
+        return None
+    return WriteBehindQueue(db, journal_path, parent=parent)